@@ -0,0 +1,6 @@
+"""
+Benchmark suites for the Financial Dashboard backend.
+
+Run them from the backend/ directory, e.g.:
+    python -m benchmarks.parser_bench
+"""
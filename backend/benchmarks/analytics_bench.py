@@ -0,0 +1,159 @@
+"""
+JSON Portfolio Upload Benchmark
+
+Times PortfolioAnalytics on synthetic JSON portfolios (the /portfolio/upload
+payload) and compares the columnar pipeline with the previous row-by-row one:
+- standardize: column mapping and ETF/Stock classification
+- save: Portfolio + Position rows written to Postgres
+
+The save stage runs inside an outer transaction that is rolled back, so the
+database is left untouched. It needs one existing user (see benchmarks.seed).
+
+Usage (from backend/):
+    python -m benchmarks.analytics_bench --rows 10000 --auth0-id seed|0
+    python -m benchmarks.analytics_bench --skip-db
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from benchmarks.seeding import UNIVERSE
+from src.core.config import settings
+from src.models.portfolio import Portfolio, Position
+from src.models.user import User
+from src.services.analytics import PortfolioAnalytics
+
+
+def generate_portfolio(rows: int, seed: int = 0) -> dict:
+    """JSON portfolio in the upload format (Spanish keys), serialized and parsed like a real upload"""
+    rng = random.Random(seed)
+    names = ["VANGUARD S&P 500 ETF", "Vanguard Total World", "AMAZON COM INC", "WALMART DE MEXICO", "CETES 28D"]
+    positions = []
+    for i in range(rows):
+        ticker = UNIVERSE[i % len(UNIVERSE)][0]
+        qty = rng.randint(1, 500)
+        price = round(rng.uniform(5, 900), 2)
+        positions.append({
+            "emisora": f"{ticker}{i // len(UNIVERSE)}",
+            "descripcion": rng.choice(names),
+            "titulos": qty,
+            "costo_promedio": round(price * rng.uniform(0.7, 1.2), 2),
+            "ultimo_precio": price,
+        })
+    return json.loads(json.dumps({"efectivo": 12500.50, "posiciones": positions}))
+
+
+def legacy_standardize(analytics: PortfolioAnalytics) -> None:
+    """Previous _standardize_df with per-row classification, for comparison"""
+    analytics.df.rename(columns={"emisora": "ticker", "descripcion": "name"}, inplace=True)
+    if "value" not in analytics.df.columns:
+        analytics.df["value"] = analytics.df["qty"] * analytics.df["price"]
+    analytics.df["type"] = analytics.df["name"].apply(lambda x: "ETF" if "VANGUARD" in x.upper() else "Stock")
+
+
+async def legacy_save(analytics: PortfolioAnalytics, db: AsyncSession, user_id: str) -> str:
+    """Previous iterrows + one ORM object per position, for comparison"""
+    invested = analytics.df["value"].sum()
+    portfolio = Portfolio(
+        user_id=user_id, name="Mi Portafolio", total_net_worth=analytics.cash + invested,
+        cash_balance=analytics.cash, invested_value=invested,
+    )
+    db.add(portfolio)
+    await db.flush()
+    for _, row in analytics.df.iterrows():
+        db.add(Position(
+            portfolio_id=portfolio.id, ticker=row["ticker"], name=row["name"], asset_type=row["type"],
+            quantity=row["qty"], avg_cost=row["avg_cost"], current_price=row["price"], market_value=row["value"],
+        ))
+    await db.commit()
+    return portfolio.id
+
+
+def time_sync(fn: Callable[[], None], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def time_save(engine, raw: dict, user_id: str, save, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        analytics = PortfolioAnalytics(raw)
+        async with engine.connect() as conn:
+            outer = await conn.begin()
+            # commit() inside save releases a savepoint; the outer rollback discards everything
+            session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+            start = time.perf_counter()
+            await save(analytics, session, user_id)
+            samples.append(time.perf_counter() - start)
+            await session.close()
+            await outer.rollback()
+    return statistics.median(samples)
+
+
+async def run_db(raw: dict, auth0_id: str, repeat: int) -> Optional[dict]:
+    engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI)
+    try:
+        async with AsyncSession(engine) as session:
+            user = (await session.execute(select(User).where(User.auth0_id == auth0_id))).scalar_one_or_none()
+        if user is None:
+            print(f"User {auth0_id} not found; seed the database or pass --auth0-id", file=sys.stderr)
+            return None
+        legacy = await time_save(engine, raw, user.id, legacy_save, repeat)
+        columnar = await time_save(
+            engine, raw, user.id, lambda analytics, db, user_id: analytics.save_to_db(db, user_id), repeat
+        )
+        return {"legacy": legacy, "columnar": columnar}
+    finally:
+        await engine.dispose()
+
+
+def print_row(stage: str, legacy: float, columnar: float) -> None:
+    speedup = legacy / columnar if columnar else 0.0
+    print(f"{stage:<12} {legacy * 1000:>12.1f} {columnar * 1000:>13.1f} {speedup:>8.1f}x")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark JSON portfolio standardization and persistence")
+    parser.add_argument("--rows", type=int, default=10_000, help="Positions per portfolio")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--auth0-id", default="seed|0", help="Existing user that owns the benchmark portfolio")
+    parser.add_argument("--skip-db", action="store_true", help="Only time the in-memory stages")
+    args = parser.parse_args(argv)
+
+    if settings.ENVIRONMENT == "production":
+        print("Refusing to benchmark against a production environment", file=sys.stderr)
+        return 2
+
+    raw = generate_portfolio(args.rows)
+    analytics = PortfolioAnalytics(raw)
+
+    print(f"{args.rows} positions, median of {args.repeat} runs")
+    print(f"{'stage':<12} {'legacy ms':>12} {'columnar ms':>13} {'speedup':>9}")
+    print_row(
+        "standardize",
+        time_sync(lambda: legacy_standardize(analytics), args.repeat),
+        time_sync(analytics._standardize_df, args.repeat),
+    )
+    if not args.skip_db:
+        saved = asyncio.run(run_db(raw, args.auth0_id, args.repeat))
+        if saved is None:
+            return 1
+        print_row("save", saved["legacy"], saved["columnar"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Delta Position Storage Benchmark
+
+Feeds the same synthetic statement history through SnapshotService.create_snapshot
+twice, once per SNAPSHOT_POSITION_STORAGE mode, and compares:
+- storage: snapshot_positions rows and bytes (pg_column_size) per portfolio
+- reads: get_snapshot_by_id over every snapshot, and load_positions (the whole
+  history, as the attribution cache reads it)
+
+From one statement to the next each position changes (new price and value)
+with probability --change; the rest are repeated as-is, as on a real statement
+of a mostly buy-and-hold account. Both modes must reconstruct exactly the same
+positions; the benchmark fails otherwise.
+
+A temporary user with two portfolios (prefix "deltabench") is created and
+deleted afterwards. Tickers are taken from the securities table, so seed the
+database first (benchmarks.seed) or pass fewer --positions.
+
+Usage (from backend/, against a disposable local database):
+    python -m benchmarks.delta_storage_bench --snapshots 60 --positions 15 --change 0.2
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, select, text
+
+from src.core.config import settings
+from src.core.database import SessionLocal, engine
+from src.models.portfolio import Portfolio
+from src.models.security import Security
+from src.models.snapshot import UploadHistory
+from src.models.user import User
+from src.services.snapshot_series import load_positions
+from src.services.snapshot_service import SnapshotService
+
+MODES = ("full", "delta")
+
+
+def _month_end(start: date, months: int) -> date:
+    year, month = divmod(start.month - 1 + months, 12)
+    first_of_next = date(start.year + year + (month + 1) // 12, (month + 1) % 12 + 1, 1)
+    return date.fromordinal(first_of_next.toordinal() - 1)
+
+
+def generate_statements(tickers: List[str], snapshots: int, change: float, seed: int) -> List[dict]:
+    """Parsed statements (create_snapshot's upload_data), oldest first"""
+    rng = random.Random(seed)
+    holdings = {
+        ticker: {"quantity": rng.randint(1, 500), "avg_cost": round(rng.uniform(5, 900), 2)}
+        for ticker in tickers
+    }
+    prices = {ticker: holding["avg_cost"] for ticker, holding in holdings.items()}
+    statements = []
+    for month in range(snapshots):
+        breakdown = []
+        for ticker, holding in holdings.items():
+            if month and rng.random() < change:
+                prices[ticker] = round(prices[ticker] * rng.uniform(0.9, 1.1), 2)
+            quantity, avg_cost, price = holding["quantity"], holding["avg_cost"], prices[ticker]
+            gain = round((price - avg_cost) * quantity, 2)
+            breakdown.append({
+                "ticker": ticker,
+                "name": ticker,
+                "quantity": quantity,
+                "avg_cost": avg_cost,
+                "current_price": price,
+                "market_value": round(price * quantity, 2),
+                "unrealized_gain": gain,
+                "unrealized_gain_percent": round(gain / (avg_cost * quantity) * 100, 2),
+            })
+        equity = round(sum(p["market_value"] for p in breakdown), 2)
+        statements.append({
+            "statement_date": _month_end(date(2020, 1, 1), month).isoformat(),
+            "account_holder": "Delta Bench",
+            "currency": "MXN",
+            "portfolio_summary": {
+                "total_value": equity + 1000, "equity_value": equity,
+                "fixed_income_value": 0, "cash_value": 1000,
+            },
+            "breakdown": breakdown,
+        })
+    return statements
+
+
+async def load_mode(user_id: str, mode: str, statements: List[dict]) -> str:
+    """Create a portfolio and upload every statement with the given storage mode; returns its id"""
+    settings.SNAPSHOT_POSITION_STORAGE = mode
+    async with SessionLocal() as db:
+        portfolio_id = str(uuid.uuid4())
+        db.add(Portfolio(id=portfolio_id, user_id=user_id, name=f"deltabench {mode}"))
+        await db.commit()
+        for i, statement in enumerate(statements):
+            await SnapshotService.create_snapshot(
+                db, portfolio_id, statement, f"deltabench {mode} {i}".encode(), f"deltabench-{i}.pdf", user_id
+            )
+    return portfolio_id
+
+
+async def storage(portfolio_id: str) -> Dict[str, int]:
+    async with SessionLocal() as db:
+        rows, size = (await db.execute(
+            text(
+                "SELECT count(*), coalesce(sum(pg_column_size(p.*)), 0) "
+                "FROM snapshot_positions AS p WHERE p.portfolio_id = :portfolio_id"
+            ),
+            {"portfolio_id": portfolio_id},
+        )).one()
+    return {"rows": rows, "bytes": size}
+
+
+async def read_snapshots(portfolio_id: str) -> tuple:
+    """(per-snapshot read seconds, reconstructed positions per statement date)"""
+    async with SessionLocal() as db:
+        history = await SnapshotService.get_snapshots_history(db, portfolio_id, limit=10_000, with_positions=False)
+    timings, contents = [], {}
+    for snapshot in history:
+        # Fresh session per read: nothing served from the identity map
+        async with SessionLocal() as db:
+            start = time.perf_counter()
+            loaded = await SnapshotService.get_snapshot_by_id(db, snapshot.id)
+            timings.append(time.perf_counter() - start)
+        contents[loaded.snapshot_date] = sorted(
+            (p.ticker, p.quantity, p.avg_cost, p.current_price, p.market_value,
+             p.unrealized_gain, p.unrealized_gain_percent)
+            for p in loaded.positions
+        )
+    return timings, contents
+
+
+async def time_load_positions(portfolio_id: str, repeat: int = 5) -> tuple:
+    """(best seconds, rows) of load_positions over the whole history"""
+    best, rows = float("inf"), []
+    for _ in range(repeat):
+        async with SessionLocal() as db:
+            start = time.perf_counter()
+            rows = await load_positions(db, portfolio_id)
+            best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+async def run(snapshots: int, positions: int, change: float) -> int:
+    async with SessionLocal() as db:
+        tickers = list((await db.execute(
+            select(Security.ticker).order_by(Security.id).limit(positions)
+        )).scalars().all())
+        if len(tickers) < positions:
+            print(f"Only {len(tickers)} securities registered; seed the database or lower --positions",
+                  file=sys.stderr)
+            return 2
+        user_id = str(uuid.uuid4())
+        db.add(User(id=user_id, auth0_id=f"deltabench|{user_id}", email=f"deltabench-{user_id}@example.com"))
+        await db.commit()
+
+    statements = generate_statements(tickers, snapshots, change, seed=0)
+    original_mode = settings.SNAPSHOT_POSITION_STORAGE
+    try:
+        results = {}
+        for mode in MODES:
+            start = time.perf_counter()
+            portfolio_id = await load_mode(user_id, mode, statements)
+            upload = time.perf_counter() - start
+            timings, contents = await read_snapshots(portfolio_id)
+            load_seconds, rows = await time_load_positions(portfolio_id)
+            results[mode] = {
+                **await storage(portfolio_id),
+                "upload": upload,
+                "read_mean": statistics.mean(timings),
+                "read_p95": sorted(timings)[int(0.95 * (len(timings) - 1))],
+                "load_positions": load_seconds,
+                "contents": contents,
+                # Per snapshot in date order; snapshot ids differ between the portfolios
+                "history": [sorted(tuple(row[1:]) for row in group) for _, group in groupby(rows, key=itemgetter(0))],
+            }
+
+        full, delta = results["full"], results["delta"]
+        if full["contents"] != delta["contents"] or full["history"] != delta["history"]:
+            print("Delta storage reconstructed different positions than full storage", file=sys.stderr)
+            return 1
+
+        print(f"{snapshots} snapshots x {positions} positions, change probability {change}, "
+              f"keyframe every {settings.SNAPSHOT_KEYFRAME_INTERVAL}")
+        print(f"{'mode':<7} {'rows':>7} {'KB':>8} {'upload s':>9} {'get_by_id ms':>13} {'p95 ms':>8} "
+              f"{'load_positions ms':>18}")
+        for mode in MODES:
+            r = results[mode]
+            print(f"{mode:<7} {r['rows']:>7} {r['bytes'] / 1000:>8.1f} {r['upload']:>9.2f} "
+                  f"{r['read_mean'] * 1000:>13.2f} {r['read_p95'] * 1000:>8.2f} {r['load_positions'] * 1000:>18.2f}")
+        print(f"delta stores {delta['bytes'] / full['bytes']:.0%} of the position bytes; "
+              "reconstructed snapshots are identical")
+    finally:
+        settings.SNAPSHOT_POSITION_STORAGE = original_mode
+        async with SessionLocal() as db:
+            # Portfolios, snapshots and positions go with the user (ON DELETE CASCADE)
+            await db.execute(delete(UploadHistory).where(UploadHistory.user_id == user_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare full and delta snapshot position storage")
+    parser.add_argument("--snapshots", type=int, default=60, help="Statements uploaded per portfolio")
+    parser.add_argument("--positions", type=int, default=15, help="Positions per statement")
+    parser.add_argument("--change", type=float, default=0.2, help="Probability a position changes month to month")
+    args = parser.parse_args(argv)
+
+    if settings.ENVIRONMENT == "production":
+        print("Refusing to benchmark against a production environment", file=sys.stderr)
+        return 2
+    return asyncio.run(run(args.snapshots, args.positions, args.change))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
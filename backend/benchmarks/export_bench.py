@@ -0,0 +1,116 @@
+"""
+Snapshot Export Benchmark
+
+Measures the streamed export (GET /import/export) of one large portfolio and
+compares its peak Python memory with loading the whole result at once:
+- streamed: export_snapshots() consumed chunk by chunk, per format
+- materialized: the same query fetched with .all() and encoded as one CSV
+
+A temporary user/portfolio is COPYed in first (prefix "exportbench") and
+deleted afterwards. Peak memory is measured with tracemalloc, which slows
+both paths down; compare the timings relative to each other.
+
+Usage (from backend/, against a disposable local database):
+    python -m benchmarks.export_bench --snapshots 120 --positions 2000
+"""
+
+import argparse
+import asyncio
+import csv
+import gc
+import io
+import sys
+import time
+import tracemalloc
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import asyncpg
+from sqlalchemy import delete
+
+from benchmarks.seeding import SeedScale, copy_batches, generate_user, partition_statements
+from src.core.config import settings
+from src.core.database import SessionLocal, engine
+from src.models.user import User
+from src.services.export import EXPORT_FORMATS, export_query, export_snapshots
+
+
+def _dsn() -> str:
+    # asyncpg expects a plain postgresql:// URL
+    return settings.SQLALCHEMY_DATABASE_URI.replace("postgresql+asyncpg", "postgresql")
+
+
+async def seed_portfolio(scale: SeedScale) -> Tuple[str, str, int]:
+    """COPY one synthetic user; returns (user_id, portfolio_id, position rows)"""
+    batch = generate_user(scale, 0)
+    user_id, portfolio_id = batch.rows["users"][0][0], batch.rows["portfolios"][0][0]
+    conn = await asyncpg.connect(_dsn())
+    try:
+        for statement in partition_statements(scale):
+            await conn.execute(statement)
+        async with conn.transaction():
+            counts = await copy_batches(conn, [batch])
+    finally:
+        await conn.close()
+    return user_id, portfolio_id, counts["snapshot_positions"]
+
+
+async def measure(run: Callable[[], Awaitable[int]]) -> Tuple[int, float, float]:
+    """(bytes produced, seconds, peak traced MB) of one run"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = await run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak / 1_000_000
+
+
+async def run(snapshots: int, positions: int) -> int:
+    # Row ids derive from (seed, user index): a fresh seed avoids clashing with seeded users
+    scale = SeedScale(
+        users=1, snapshots_per_portfolio=snapshots, positions_per_snapshot=positions,
+        prefix="exportbench", seed=time.time_ns(),
+    )
+    user_id, portfolio_id, rows = await seed_portfolio(scale)
+    gc.collect()
+    try:
+        async def streamed(export_format: str) -> int:
+            return sum([len(part) async for part in export_snapshots(portfolio_id, export_format)])
+
+        async def materialized() -> int:
+            async with SessionLocal() as db:
+                result = (await db.execute(export_query(portfolio_id))).all()
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(result)
+            return len(buffer.getvalue().encode())
+
+        print(f"{rows} position rows, chunks of {settings.EXPORT_CHUNK_ROWS}")
+        print(f"{'mode':<22} {'MB out':>9} {'seconds':>9} {'peak MB':>9}")
+        for export_format in EXPORT_FORMATS:
+            size, elapsed, peak = await measure(lambda: streamed(export_format))
+            print(f"{'streamed ' + export_format:<22} {size / 1_000_000:>9.1f} {elapsed:>9.2f} {peak:>9.1f}")
+        size, elapsed, peak = await measure(materialized)
+        print(f"{'materialized csv':<22} {size / 1_000_000:>9.1f} {elapsed:>9.2f} {peak:>9.1f}")
+    finally:
+        async with SessionLocal() as db:
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the streamed snapshot export")
+    parser.add_argument("--snapshots", type=int, default=120, help="Snapshots in the exported portfolio")
+    parser.add_argument("--positions", type=int, default=2000, help="Positions per snapshot")
+    args = parser.parse_args(argv)
+
+    if settings.ENVIRONMENT == "production":
+        print("Refusing to benchmark against a production environment", file=sys.stderr)
+        return 2
+    return asyncio.run(run(args.snapshots, args.positions))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Synthetic GBM Statement Generator
+
+Builds GBM-layout PDF statements entirely offline so the parser can be
+benchmarked without real customer files. The text rows follow the layout
+that GBMStatementParser expects:
+- NOMBRE / Contrato header and the "DEL 1 AL 31 DE <MES> DE <AÑO>" period line
+- RESUMEN DEL PORTAFOLIO rows (RENTA VARIABLE, DEUDA, EFECTIVO, VALOR DEL PORTAFOLIO)
+- ACCIONES DEL SIC rows (international stocks/ETFs)
+- ACCIONES rows (Mexican stocks)
+- MOVIMIENTOS rows (buys, sells, dividends, deposits)
+
+The PDF is written by hand (Helvetica, one content stream per page) so no
+PDF-writing dependency is required.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import List
+
+MONTHS = [
+    "ENERO", "FEBRERO", "MARZO", "ABRIL", "MAYO", "JUNIO", "JULIO",
+    "AGOSTO", "SEPTIEMBRE", "OCTUBRE", "NOVIEMBRE", "DICIEMBRE",
+]
+
+SIC_TICKERS = ["VOO", "VEA", "VNQ", "VWO", "VTI", "PFE", "AAPL", "MSFT", "GOOGL"]
+MX_TICKERS = ["AEROMEX", "WALMEX", "AMX", "CEMEX", "FEMSA", "GMEXICO", "BIMBO", "ALSEA"]
+
+# Page geometry (A4 portrait, points)
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+FONT_SIZE = 7
+LEADING = 10
+TOP_MARGIN = 40
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * TOP_MARGIN) // LEADING
+
+DISCLAIMER = (
+    "LOS VALORES MOSTRADOS SON INFORMATIVOS Y PUEDEN DIFERIR DE LOS PRECIOS DE MERCADO VIGENTES"
+)
+
+
+@dataclass(frozen=True)
+class StatementSpec:
+    """Shape of a synthetic statement"""
+    pages: int = 2
+    sic_positions: int = 5
+    mx_positions: int = 3
+    movements: int = 20
+    year: int = 2021
+    month: int = 12
+    seed: int = 0
+
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def _ticker(base: List[str], index: int) -> str:
+    """Unique uppercase ticker; letters only so the parser regexes accept it"""
+    name = base[index % len(base)]
+    suffix = index // len(base)
+    while suffix:
+        suffix, rem = divmod(suffix - 1, 26)
+        name += chr(ord("A") + rem)
+    return name
+
+
+def build_statement_lines(spec: StatementSpec) -> List[str]:
+    """Build the text rows of a statement, in reading order"""
+    rng = random.Random(spec.seed)
+    last_day = 28 if spec.month == 2 else 30 if spec.month in (4, 6, 9, 11) else 31
+
+    sic_rows = []
+    equity = 0.0
+    for i in range(spec.sic_positions):
+        quantity = rng.randint(1, 400)
+        avg_cost = rng.uniform(200, 9000)
+        current_price = avg_cost * rng.uniform(0.70, 0.99)  # SIC rows are reported at a loss
+        market_value = quantity * current_price
+        loss = quantity * (avg_cost - current_price)
+        equity += market_value
+        sic_rows.append(
+            f"{_ticker(SIC_TICKERS, i)} * 0 {quantity} 0 {avg_cost:,.6f} {_money(quantity * avg_cost)} "
+            f"{current_price:,.6f} {current_price * 0.97:,.6f} {_money(market_value)} "
+            f"({_money(loss)}) {rng.uniform(0.01, 9.99):.2f}"
+        )
+
+    mx_rows = []
+    for i in range(spec.mx_positions):
+        quantity = rng.randint(100, 20000)
+        avg_cost = rng.uniform(1, 90)
+        current_price = avg_cost * rng.uniform(1.01, 1.60)
+        market_value = quantity * current_price
+        gain = quantity * (current_price - avg_cost)
+        equity += market_value
+        mx_rows.append(
+            f"{_ticker(MX_TICKERS, i)} * 0 {quantity:,} 0 {avg_cost:.6f} {_money(quantity * avg_cost)} "
+            f"{current_price:.6f} {current_price * 1.02:.6f} {_money(market_value)} "
+            f"{_money(gain)} {rng.uniform(0.01, 9.99):.2f}"
+        )
+
+    fixed_income = rng.uniform(100, 50000)
+    cash = rng.uniform(1, 5000)
+    total = equity + fixed_income + cash
+
+    def pct(value: float) -> str:
+        return f"{value / total * 100:.2f}"
+
+    movement_rows = []
+    concepts = ["COMPRA", "VENTA", "DIVIDENDO", "DEPOSITO", "RETIRO", "ISR"]
+    for _ in range(spec.movements):
+        day = rng.randint(1, last_day)
+        concept = rng.choice(concepts)
+        ticker = rng.choice(SIC_TICKERS + MX_TICKERS)
+        movement_rows.append(
+            f"{day:02d}/{spec.month:02d} {concept} {ticker} FOLIO {rng.randint(100000, 999999)} "
+            f"{rng.randint(1, 500)} {_money(rng.uniform(1, 50000))} {_money(rng.uniform(1, 500000))}"
+        )
+
+    month_name = MONTHS[spec.month - 1]
+    return [
+        "GBM GRUPO BURSATIL MEXICANO S.A. DE C.V. CASA DE BOLSA",
+        "ESTADO DE CUENTA 01",
+        "NOMBRE:",
+        "JUAN PEREZ GOMEZ Contrato: 1234567",
+        f"PERIODO DEL 1 AL {last_day} DE {month_name} DE {spec.year}",
+        "RESUMEN DEL PORTAFOLIO",
+        f"CONCEPTO SALDO ANTERIOR SALDO AL {last_day}-{month_name[:3]}-{str(spec.year)[2:]} %",
+        f"RENTA VARIABLE 0.00 {_money(equity)} {pct(equity)}",
+        f"DEUDA 0.00 {_money(fixed_income)} {pct(fixed_income)}",
+        f"EFECTIVO 0.00 {_money(cash)} {pct(cash)}",
+        f"VALOR DEL PORTAFOLIO 0.00 {_money(total)} 100.00",
+        "ACCIONES DEL SIC",
+        "EMISORA SERIE PRESTAMO DISPONIBLE GARANTIA COSTO PROMEDIO COSTO TOTAL PRECIO MERCADO",
+        *sic_rows,
+        "ACCIONES",
+        "EMISORA SERIE PRESTAMO DISPONIBLE GARANTIA COSTO PROMEDIO COSTO TOTAL PRECIO MERCADO",
+        *mx_rows,
+        "MOVIMIENTOS DEL PERIODO",
+        "FECHA CONCEPTO EMISORA FOLIO TITULOS PRECIO IMPORTE",
+        *movement_rows,
+    ]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(lines: List[str]) -> bytes:
+    ops = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL 30 {PAGE_HEIGHT - TOP_MARGIN} Td"]
+    for line in lines:
+        ops.append(f"({_escape(line)}) Tj T*")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def render_pdf(pages: List[List[str]]) -> bytes:
+    """Render pages of text lines into a minimal, valid PDF document"""
+    # Object numbering: 1 catalog, 2 page tree, 3 font, then (page, content) pairs
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: (
+            f"<< /Type /Pages /Kids [{' '.join(f'{pid} 0 R' for pid in page_ids)}] "
+            f"/Count {len(pages)} >>"
+        ).encode(),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    for page_id, lines in zip(page_ids, pages):
+        stream = _page_stream(lines)
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>"
+        ).encode()
+        objects[page_id + 1] = (
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n".encode() + objects[obj_id] + b"\nendobj\n"
+
+    xref_offset = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    for obj_id in range(1, size):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def generate_statement(spec: StatementSpec) -> bytes:
+    """
+    Generate a GBM-layout statement PDF for the given spec.
+
+    Content rows are laid out top to bottom; if they need more pages than
+    `spec.pages` the document grows, otherwise the remaining pages are filled
+    with disclaimer text (as real statements do).
+    """
+    lines = build_statement_lines(spec)
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+    while len(pages) < spec.pages:
+        pages.append([f"{DISCLAIMER} {n}" for n in range(LINES_PER_PAGE)])
+    return render_pdf(pages)
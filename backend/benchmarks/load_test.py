@@ -0,0 +1,286 @@
+"""
+End-to-End API Load Test
+
+Seeds a local Postgres database, starts `benchmarks.loadtest_app` (the real
+app with a stub auth dependency) under uvicorn, and drives these endpoints
+with concurrent clients:
+- GET  /portfolio/dashboard/stats
+- GET  /portfolio/transactions
+- GET  /portfolio/dashboard/chart (per-ticker allocation)
+- GET  /portfolio/performance (TWR / XIRR)
+- GET  /portfolio/risk
+- GET  /import/history
+- POST /import/upload (parse only, CPU bound)
+- POST /import/bulk-upload (synthetic GBM statements)
+
+Reports p50/p95/p99 latency, throughput and error count per endpoint.
+
+The database settings come from the usual POSTGRES_* environment variables.
+Point them at a disposable local database - the harness creates tables and
+can truncate them with --reset.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --users 50 --snapshots 36 --concurrency 16 --duration 20
+    python -m benchmarks.load_test --skip-seed --base-url http://localhost:8000 --endpoint stats
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.gbm_statement import StatementSpec, generate_statement
+from benchmarks.loadtest_app import LOADTEST_USER_HEADER
+from benchmarks.seeding import (
+    SeedScale, TABLE_MODELS, auth0_id_for, generate_dataset, insert_batch, partition_statements,
+)
+from src.core.config import settings
+from src.models import Base
+
+API = settings.API_V1_STR
+
+
+@dataclass
+class EndpointResult:
+    """Latency samples (seconds) and error count for one endpoint"""
+    name: str
+    samples: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        count = len(self.samples)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "throughput_rps": round(count / self.elapsed, 2) if self.elapsed else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+        }
+
+
+# Unique statement dates for uploads (far from seeded history so they never collide)
+_upload_counter = itertools.count()
+
+
+def _bulk_upload_files(files_per_request: int) -> list:
+    files = []
+    for _ in range(files_per_request):
+        n = next(_upload_counter)
+        spec = StatementSpec(pages=2, sic_positions=8, mx_positions=4, movements=30,
+                             year=2100 + n // 12, month=n % 12 + 1, seed=n)
+        files.append(("files", (f"statement_{n}.pdf", generate_statement(spec), "application/pdf")))
+    return files
+
+
+def build_endpoints(files_per_upload: int) -> Dict[str, Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]]:
+    return {
+        "stats": lambda client: client.get(f"{API}/portfolio/dashboard/stats"),
+        "transactions": lambda client: client.get(f"{API}/portfolio/transactions"),
+        "chart": lambda client: client.get(f"{API}/portfolio/dashboard/chart", params={"group_by": "ticker"}),
+        "performance": lambda client: client.get(f"{API}/portfolio/performance", params={"period": "1y"}),
+        "risk": lambda client: client.get(f"{API}/portfolio/risk"),
+        "series": lambda client: client.get(f"{API}/portfolio/history/series", params={"points": 200}),
+        "history": lambda client: client.get(f"{API}/import/history", params={"limit": 12}),
+        "upload": lambda client: client.post(
+            f"{API}/import/upload", files=[("file", _bulk_upload_files(1)[0][1])]
+        ),
+        "bulk_upload": lambda client: client.post(
+            f"{API}/import/bulk-upload", files=_bulk_upload_files(files_per_upload)
+        ),
+    }
+
+
+async def seed(scale: SeedScale, reset: bool) -> None:
+    """Create tables (if missing) and load the synthetic dataset"""
+    engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in partition_statements(scale):
+            await conn.execute(text(statement))
+        if reset:
+            tables = ", ".join(reversed(list(TABLE_MODELS)))
+            await conn.execute(text(f"TRUNCATE {tables} CASCADE"))
+
+    start = time.perf_counter()
+    for batch in generate_dataset(scale):
+        async with engine.begin() as conn:
+            await insert_batch(conn, batch)
+    await engine.dispose()
+    print(
+        f"Seeded {scale.users} users, {scale.total_snapshots} snapshots, "
+        f"{scale.total_positions} positions in {time.perf_counter() - start:.1f}s",
+        file=sys.stderr,
+    )
+
+
+async def _worker(
+    base_url: str,
+    call: Callable[[httpx.AsyncClient], Awaitable[httpx.Response]],
+    users: List[str],
+    deadline: float,
+    result: EndpointResult,
+    rng: random.Random,
+) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+        while time.perf_counter() < deadline:
+            client.headers[LOADTEST_USER_HEADER] = rng.choice(users)
+            start = time.perf_counter()
+            try:
+                response = await call(client)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            result.samples.append(time.perf_counter() - start)
+            if failed:
+                result.errors += 1
+
+
+async def run_endpoint(
+    base_url: str,
+    name: str,
+    call: Callable[[httpx.AsyncClient], Awaitable[httpx.Response]],
+    users: List[str],
+    concurrency: int,
+    duration: float,
+) -> EndpointResult:
+    """Hammer one endpoint with `concurrency` clients for `duration` seconds"""
+    result = EndpointResult(name=name)
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*[
+        _worker(base_url, call, users, deadline, result, random.Random(i))
+        for i in range(concurrency)
+    ])
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def start_server(port: int, workers: int, command: Optional[List[str]] = None) -> subprocess.Popen:
+    """
+    Launch the stub-auth app and wait until /health/live answers.
+
+    By default runs plain uvicorn; `command` replaces the launcher (e.g. src.serve).
+    """
+    command = command or [
+        sys.executable, "-m", "uvicorn", "benchmarks.loadtest_app:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+        "--log-level", "warning",
+    ]
+    process = subprocess.Popen(command, env=os.environ.copy())
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited before becoming healthy")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}{API}/health/live", timeout=1.0).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 60s")
+
+
+def print_report(results: List[EndpointResult]) -> None:
+    header = f"{'endpoint':<14} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        s = result.summary()
+        print(
+            f"{result.name:<14} {s['requests']:>9} {s['errors']:>7} {s['throughput_rps']:>9.2f} "
+            f"{s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f}"
+        )
+
+
+def seed_scale(args: argparse.Namespace) -> SeedScale:
+    return SeedScale(
+        users=args.users,
+        snapshots_per_portfolio=args.snapshots,
+        positions_per_snapshot=args.positions,
+        prefix=args.prefix,
+    )
+
+
+async def run(args: argparse.Namespace) -> List[EndpointResult]:
+    scale = seed_scale(args)
+    users = [auth0_id_for(scale, i) for i in range(scale.users)]
+    endpoints = build_endpoints(args.files_per_upload)
+    names = args.endpoint or list(endpoints)
+
+    results = []
+    for name in names:
+        print(f"Running {name} ({args.concurrency} clients, {args.duration}s)...", file=sys.stderr)
+        results.append(
+            await run_endpoint(args.base_url, name, endpoints[name], users, args.concurrency, args.duration)
+        )
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the API against a local Postgres")
+    parser.add_argument("--users", type=int, default=20, help="Seeded users (one portfolio each)")
+    parser.add_argument("--snapshots", type=int, default=24, help="Snapshots per portfolio")
+    parser.add_argument("--positions", type=int, default=12, help="Positions per snapshot")
+    parser.add_argument("--prefix", default="loadtest", help="auth0_id/email prefix of seeded users")
+    parser.add_argument("--reset", action="store_true", help="Truncate all seeded tables before seeding")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded database")
+    parser.add_argument("--endpoint", action="append", choices=["stats", "transactions", "chart", "performance", "risk", "history", "series", "upload", "bulk_upload"])
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients per endpoint")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per endpoint")
+    parser.add_argument("--files-per-upload", type=int, default=1, help="PDFs sent per bulk-upload request")
+    parser.add_argument("--base-url", help="Use an already running loadtest_app instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn workers when starting the server")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if settings.ENVIRONMENT == "production":
+        print("Refusing to seed and load-test a production environment", file=sys.stderr)
+        return 2
+
+    # Seed before starting the server: its startup reads the tables (security index, partitions)
+    if not args.skip_seed:
+        asyncio.run(seed(seed_scale(args), reset=args.reset))
+
+    server = None
+    if not args.base_url:
+        server = start_server(args.port, args.server_workers)
+        args.base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({r.name: r.summary() for r in results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""
+Load-Test Application
+
+The regular FastAPI app with `get_current_user_from_token` replaced by a stub
+that trusts the `X-Loadtest-User` header (an auth0_id of a seeded user).
+
+NEVER deploy this module - it disables authentication. It only exists so the
+load-test harness can drive authenticated endpoints without Auth0:
+    uvicorn benchmarks.loadtest_app:app
+"""
+
+from typing import Dict
+
+from fastapi import Header
+
+from src.core.auth0 import get_current_user_from_token
+from src.core.config import settings
+from src.main import app
+
+LOADTEST_USER_HEADER = "X-Loadtest-User"
+
+if settings.ENVIRONMENT == "production":
+    raise RuntimeError("benchmarks.loadtest_app disables authentication and cannot run in production")
+
+
+async def stub_current_user(x_loadtest_user: str = Header(...)) -> Dict:
+    """Stand-in for get_current_user_from_token; returns the same claim shape"""
+    return {
+        "auth0_id": x_loadtest_user,
+        "email": f"{x_loadtest_user.replace('|', '-')}@example.com",
+        "name": x_loadtest_user,
+        "picture": None,
+        "user_id": None,
+        "email_verified": True,
+    }
+
+
+app.dependency_overrides[get_current_user_from_token] = stub_current_user
@@ -0,0 +1,167 @@
+"""
+GBM Statement Parser Benchmark
+
+Measures GBMStatementParser throughput on synthetic statements and compares
+the results against a stored baseline so slowdowns show up as a diff.
+
+Stages timed per statement:
+- open: pdfplumber.open() plus loading the page tree
+- text: text extraction of every page
+- summary: account holder, statement date and RESUMEN DEL PORTAFOLIO regexes
+- positions: SIC and Mexican equity position extraction
+- total: parse_gbm_pdf() end to end
+
+Usage (from backend/):
+    python -m benchmarks.parser_bench                    # run and diff vs baseline
+    python -m benchmarks.parser_bench --check            # exit 1 on regression
+    python -m benchmarks.parser_bench --update-baseline  # store new baseline
+"""
+
+import argparse
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pdfplumber
+
+from benchmarks.gbm_statement import StatementSpec, generate_statement
+from src.services.pdf_parser import GBMStatementParser, parse_gbm_pdf
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "parser.json"
+
+SCENARIOS: Dict[str, StatementSpec] = {
+    "small": StatementSpec(pages=2, sic_positions=5, mx_positions=3, movements=20),
+    "medium": StatementSpec(pages=6, sic_positions=25, mx_positions=15, movements=150),
+    "large": StatementSpec(pages=20, sic_positions=80, mx_positions=40, movements=800),
+    "padded": StatementSpec(pages=12, sic_positions=10, mx_positions=5, movements=50),
+}
+
+STAGES = ["open", "text", "summary", "positions", "total"]
+
+
+def _timed(fn: Callable) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _parse_summary(text: str) -> None:
+    GBMStatementParser._extract_account_holder(text)
+    GBMStatementParser._extract_statement_date(text)
+    GBMStatementParser._find_value(text, "RENTA VARIABLE")
+    GBMStatementParser._find_value(text, "DEUDA")
+    GBMStatementParser._find_value(text, "EFECTIVO")
+    GBMStatementParser._find_total_value(text)
+
+
+def run_scenario(spec: StatementSpec, repeat: int) -> dict:
+    """Time every stage `repeat` times and return median milliseconds per stage"""
+    content = generate_statement(spec)
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    # Sanity check: the generator and the parser must agree on the layout
+    parsed = parse_gbm_pdf(content)
+    expected = spec.sic_positions + spec.mx_positions
+    if len(parsed["breakdown"]) != expected:
+        raise RuntimeError(
+            f"Parser extracted {len(parsed['breakdown'])} positions, generator wrote {expected}"
+        )
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with pdfplumber.open(io.BytesIO(content)) as pdf:
+            page_count = len(pdf.pages)
+            samples["open"].append(time.perf_counter() - start)
+
+            text_holder = {}
+            samples["text"].append(
+                _timed(lambda: text_holder.update(text=GBMStatementParser._extract_text(pdf)))
+            )
+        text = text_holder["text"]
+        samples["summary"].append(_timed(lambda: _parse_summary(text)))
+        samples["positions"].append(_timed(lambda: GBMStatementParser._extract_positions(text)))
+        samples["total"].append(_timed(lambda: parse_gbm_pdf(content)))
+
+    medians = {stage: statistics.median(values) * 1000 for stage, values in samples.items()}
+    return {
+        "pages": page_count,
+        "positions": expected,
+        "pdf_bytes": len(content),
+        "stages_ms": {stage: round(ms, 3) for stage, ms in medians.items()},
+        "pages_per_second": round(page_count / (medians["total"] / 1000), 2),
+    }
+
+
+def diff_against_baseline(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Print a comparison table and return the list of regressions.
+
+    A stage regresses when it is slower than the baseline by more than
+    `threshold` (relative) AND by more than `min_delta_ms` (absolute), so
+    sub-millisecond stages do not flap on timer noise.
+    """
+    regressions = []
+    header = f"{'scenario':<10} {'stage':<10} {'baseline ms':>12} {'current ms':>12} {'delta':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        for stage in STAGES:
+            current = result["stages_ms"][stage]
+            if not base:
+                print(f"{name:<10} {stage:<10} {'-':>12} {current:>12.3f} {'new':>8}")
+                continue
+            previous = base["stages_ms"][stage]
+            delta = (current - previous) / previous if previous else 0.0
+            flag = ""
+            if delta > threshold and current - previous > min_delta_ms:
+                flag = "  <-- regression"
+                regressions.append(f"{name}/{stage}: {previous:.3f}ms -> {current:.3f}ms ({delta:+.0%})")
+            print(f"{name:<10} {stage:<10} {previous:>12.3f} {current:>12.3f} {delta:>+8.0%}{flag}")
+        pps = result["pages_per_second"]
+        base_pps = base["pages_per_second"] if base else None
+        print(f"{name:<10} {'pages/s':<10} {base_pps if base_pps is not None else '-':>12} {pps:>12.2f}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the GBM statement parser")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario (median is reported)")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Run only these scenarios")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Relative slowdown that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this (ms)")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if any stage regressed")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    names = args.scenario or list(SCENARIOS)
+    results = {}
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = run_scenario(SCENARIOS[name], args.repeat)
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    regressions = diff_against_baseline(results, baseline, args.threshold, args.min_delta_ms)
+
+    if args.update_baseline:
+        scenarios = dict(baseline.get("scenarios", {}))
+        scenarios.update(results)
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps({"repeat": args.repeat, "scenarios": scenarios}, indent=2) + "\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    if regressions:
+        print("\nRegressions above threshold:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1 if args.check else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
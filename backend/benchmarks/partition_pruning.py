@@ -0,0 +1,171 @@
+"""
+Partition Pruning Check
+
+Runs the hot SnapshotService reads for one seeded portfolio, captures the SQL
+they send (engine events) and EXPLAIN ANALYZEs every statement with its own
+parameters, listing the yearly partitions of portfolio_snapshots /
+snapshot_positions each one actually executed. Partitions pruned at plan time
+are absent from the plan; partitions pruned at run time, or skipped because a
+LIMIT was already satisfied, show as never executed and are not counted.
+
+Each call declares the years it may read. A statement that filters or orders
+on snapshot_date and executes a partition outside those years fails the check
+(exit code 1). Lookups by id only (get_snapshot_by_id's first query) and
+whole-history reads (ticker history) cannot be pruned and are listed for
+information.
+
+Usage (from backend/, against the seeded local database, see benchmarks.seed):
+    python -m benchmarks.partition_pruning --user seed|0
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import event, select
+
+from src.core.config import settings
+from src.core.database import SessionLocal, engine
+from src.models.portfolio import Portfolio
+from src.models.user import User
+from src.services.allocation import AllocationService
+from src.services.partitions import PARTITIONED_TABLES
+from src.services.rollups import RollupService
+from src.services.snapshot_service import SnapshotService
+
+_WHERE = re.compile(r"\bWHERE\b")
+_PARTITION = re.compile(rf"^(?:{'|'.join(PARTITIONED_TABLES)})_y(\d{{4}})$")
+
+
+@dataclass
+class Check:
+    label: str
+    call: Callable[..., Awaitable[object]]
+    years: Optional[Set[int]]  # Years the call may read; None if it cannot be pruned
+
+
+def executed_years(plan: dict) -> Tuple[Set[int], int]:
+    """(years of the partitions executed, partition scans in the plan); without ANALYZE every scan counts"""
+    years, scans = set(), 0
+
+    def walk(node: dict) -> Iterator[dict]:
+        yield node
+        for child in node.get("Plans", []):
+            yield from walk(child)
+
+    for node in walk(plan["Plan"]):
+        match = _PARTITION.match(node.get("Relation Name", ""))
+        if match:
+            scans += 1
+            if node.get("Actual Loops", 1) > 0:
+                years.add(int(match.group(1)))
+    return years, scans
+
+
+async def capture(call: Callable[..., Awaitable[object]]) -> List[Tuple[str, tuple]]:
+    """Statements (with parameters) that read the partitioned tables during one call"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "SELECT" in statement and any(t in statement for t in PARTITIONED_TABLES):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with SessionLocal() as db:
+            await call(db)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    return statements
+
+
+async def explain(statement: str, parameters: tuple) -> dict:
+    """
+    Plan of a statement; queries are also executed (ANALYZE) to see run-time
+    pruning, writes (INSERT ... SELECT) are only planned.
+    """
+    analyze = "ANALYZE, " if statement.lstrip().upper().startswith("SELECT") else ""
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(f"EXPLAIN ({analyze}FORMAT JSON) " + statement, parameters)
+        plan = result.scalar()
+        await conn.rollback()
+    return plan[0]
+
+
+async def build_checks(auth0_id: str) -> Tuple[List[Check], Set[int]]:
+    async with SessionLocal() as db:
+        portfolio_id = (await db.execute(
+            select(Portfolio.id).join(User, User.id == Portfolio.user_id).where(User.auth0_id == auth0_id)
+        )).scalar_one()
+        history = await SnapshotService.get_snapshots_history(db, portfolio_id, limit=10_000, with_positions=False)
+    if len(history) < 25:
+        raise SystemExit(f"{auth0_id} needs at least 25 snapshots (seed with --snapshots 25 or more)")
+
+    latest, older, cursor = history[0], history[13], history[12]
+    page = history[13:25]
+    all_years = {s.snapshot_date.year for s in history}
+
+    async def rollup_refresh(db):
+        # Rolled back by the session: only the plan matters
+        await RollupService.refresh(db, portfolio_id, older.snapshot_date)
+
+    return [
+        Check("get_latest_snapshot", lambda db: SnapshotService.get_latest_snapshot(db, portfolio_id),
+              {y for y in range(latest.snapshot_date.year, 10_000)}),
+        Check("get_snapshots_history (cursor page)",
+              lambda db: SnapshotService.get_snapshots_history(
+                  db, portfolio_id, limit=12, before=(cursor.snapshot_date, cursor.id)),
+              {s.snapshot_date.year for s in page}),
+        Check("get_snapshot_by_id", lambda db: SnapshotService.get_snapshot_by_id(db, older.id),
+              {older.snapshot_date.year}),
+        Check("get_holdings", lambda db: SnapshotService.get_holdings(db, older),
+              {older.snapshot_date.year}),
+        Check("get_position_changes", lambda db: SnapshotService.get_position_changes(db, older, latest),
+              {older.snapshot_date.year, latest.snapshot_date.year}),
+        Check("allocation by ticker", lambda db: AllocationService.get_allocation(db, older, "ticker"),
+              {older.snapshot_date.year}),
+        Check("RollupService.refresh", rollup_refresh, {older.snapshot_date.year}),
+        Check("get_ticker_history", lambda db: SnapshotService.get_ticker_history(db, portfolio_id, "VOO"), None),
+    ], all_years
+
+
+async def run(auth0_id: str) -> int:
+    checks, all_years = await build_checks(auth0_id)
+    failures = 0
+    print(f"{'call':<38} {'#':>2} {'scans':>5} {'executed years':<28} verdict")
+    try:
+        for check in checks:
+            for index, (statement, parameters) in enumerate(await capture(check.call), start=1):
+                years, scans = executed_years(await explain(statement, parameters))
+                date_bounded = "snapshot_date" in _WHERE.split(statement, 1)[-1]
+                if check.years is None or not date_bounded:
+                    verdict = "not prunable (info)"
+                elif years <= check.years:
+                    verdict = "pruned"
+                else:
+                    verdict = f"FAIL: outside {sorted(check.years)}"
+                    failures += 1
+                shown = ",".join(map(str, sorted(years))) or "-"
+                print(f"{check.label:<38} {index:>2} {scans:>5} {shown:<28} {verdict}")
+    finally:
+        await engine.dispose()
+    print(f"{len(all_years)} years of history; {failures} statement(s) read partitions they should have pruned")
+    return 1 if failures else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify partition pruning of the hot snapshot queries")
+    parser.add_argument("--user", default="seed|0", help="auth0_id of a seeded user")
+    args = parser.parse_args(argv)
+
+    if settings.ENVIRONMENT == "production":
+        print("Refusing to run EXPLAIN ANALYZE against a production environment", file=sys.stderr)
+        return 2
+    return asyncio.run(run(args.user))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+Query Plan Regression Check
+
+Runs the hot lookups of one seeded user (the auth0_id and portfolio lookups
+every endpoint starts with, check_duplicate_upload, and the reads of the
+snapshot summary: latest snapshot, history pages, portfolio version, the
+snapshot series and rollup refresh), captures the SQL they send (engine
+events) and EXPLAINs every statement with its own parameters. Each check
+names the scans it expects on a table: the node type (Index Scan or Index
+Only Scan) and the index. A scan of that table by any other node (a Seq
+Scan, a Bitmap Heap Scan) or by another index fails the check (exit code 1).
+Scans of partitions are attributed to the partitioned table and their
+indexes to the parent index, and counted per table / node / index.
+Partitions left empty (e.g. by test uploads that were deleted again) are not
+checked: every index is equally cheap there, so the planner's pick says
+nothing about the index.
+
+The seeded tables are small enough that a sequential scan is often cheaper
+than any index, so plans are taken with enable_seqscan off: the check asks
+whether the expected index serves the query, not which plan the planner
+would pick for this data volume. The tables are VACUUM ANALYZEd first so the
+visibility map allows index-only scans, as autovacuum keeps it in production.
+
+Usage (from backend/, against the seeded local database, see benchmarks.seed):
+    python -m benchmarks.query_plans --user seed|0
+
+tests/test_query_plans.py runs every check as a test case (skipped when the
+database is unreachable or not seeded).
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import SessionLocal, engine
+from src.models.portfolio import Portfolio
+from src.models.snapshot import PortfolioSnapshot, UploadHistory
+from src.models.user import User
+from src.services.rollups import RollupService
+from src.services.snapshot_series import get_portfolio_version, load_snapshot_rows
+from src.services.snapshot_service import SnapshotService
+
+INDEX_SCAN = frozenset({"Index Scan"})
+INDEX_ONLY_SCAN = frozenset({"Index Only Scan"})
+
+CHECKED_TABLES = ("users", "portfolios", "upload_history", "portfolio_snapshots")
+
+DEFAULT_USER = "seed|0"
+
+_PARTITION = re.compile(r"^(\w+)_y\d{4}$")
+
+
+@dataclass
+class Expected:
+    scans: FrozenSet[str]  # Allowed node types
+    indexes: FrozenSet[str]  # Allowed indexes (parent index names for partitioned tables)
+
+
+@dataclass
+class Context:
+    """The seeded user the checks run for"""
+    auth0_id: str
+    user_id: str
+    portfolio_id: str
+    statement_date: datetime  # Of one of the user's uploads
+    cursor: PortfolioSnapshot  # 12th newest snapshot: history cursor, rollup period and series prefix
+    empty_partitions: FrozenSet[str]  # Without rows as of the VACUUM ANALYZE; their scans are not checked
+
+
+@dataclass
+class Check:
+    label: str
+    call: Callable[[AsyncSession, Context], Awaitable[object]]
+    expected: Dict[str, Expected]  # Per table; other tables are not checked
+
+
+@dataclass
+class Finding:
+    table: str
+    node: str
+    index: Optional[str]
+    count: int
+    failure: Optional[str]  # None when the scan is the expected one
+
+
+SUMMARY = {"portfolio_snapshots": Expected(INDEX_SCAN, frozenset({"idx_portfolio_snapshot_summary"}))}
+SUMMARY_ONLY = {"portfolio_snapshots": Expected(INDEX_ONLY_SCAN, frozenset({"idx_portfolio_snapshot_summary"}))}
+
+CHECKS = [
+    Check("User by auth0_id", lambda db, ctx: db.execute(select(User).where(User.auth0_id == ctx.auth0_id)),
+          {"users": Expected(INDEX_SCAN, frozenset({"ix_users_auth0_id"}))}),
+    Check("Portfolio by user_id",
+          lambda db, ctx: db.execute(select(Portfolio).where(Portfolio.user_id == ctx.user_id).limit(1)),
+          {"portfolios": Expected(INDEX_SCAN, frozenset({"ix_portfolios_user_id"}))}),
+    # Unknown hash: both the hash and the statement date lookups run
+    Check("check_duplicate_upload",
+          lambda db, ctx: SnapshotService.check_duplicate_upload(db, ctx.user_id, "0" * 64, ctx.statement_date),
+          {"upload_history": Expected(INDEX_SCAN, frozenset({"idx_user_file_hash", "idx_user_statement_date"}))}),
+    Check("get_latest_snapshot",
+          lambda db, ctx: SnapshotService.get_latest_snapshot(db, ctx.portfolio_id, with_positions=False), SUMMARY),
+    Check("get_snapshots_history (first page)",
+          lambda db, ctx: SnapshotService.get_snapshots_history(db, ctx.portfolio_id, with_positions=False), SUMMARY),
+    Check("get_snapshots_history (cursor page)",
+          lambda db, ctx: SnapshotService.get_snapshots_history(
+              db, ctx.portfolio_id, before=(ctx.cursor.snapshot_date, ctx.cursor.id), with_positions=False),
+          SUMMARY),
+    Check("get_portfolio_version", lambda db, ctx: get_portfolio_version(db, ctx.portfolio_id), SUMMARY_ONLY),
+    Check("get_portfolio_version (held prefix)",
+          lambda db, ctx: get_portfolio_version(db, ctx.portfolio_id, until=ctx.cursor.snapshot_date), SUMMARY_ONLY),
+    Check("load_snapshot_rows", lambda db, ctx: load_snapshot_rows(db, ctx.portfolio_id), SUMMARY_ONLY),
+    Check("load_snapshot_rows (newer snapshots)",
+          lambda db, ctx: load_snapshot_rows(db, ctx.portfolio_id, after=ctx.cursor.snapshot_date), SUMMARY_ONLY),
+    # Rolled back by the session: only the plan matters
+    Check("RollupService.refresh",
+          lambda db, ctx: RollupService.refresh(db, ctx.portfolio_id, ctx.cursor.snapshot_date), SUMMARY_ONLY),
+]
+
+
+def scans(plan: dict, skip: FrozenSet[str] = frozenset()) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """(table, node type, index) of every scan of a checked table but `skip`; bitmap scans report their index child"""
+    def walk(node: dict) -> Iterator[dict]:
+        yield node
+        for child in node.get("Plans", []):
+            yield from walk(child)
+
+    for node in walk(plan["Plan"]):
+        relation = node.get("Relation Name")
+        if not relation or relation in skip:
+            continue
+        match = _PARTITION.match(relation)
+        table = match.group(1) if match else relation
+        if table not in CHECKED_TABLES:
+            continue
+        index = node.get("Index Name")
+        if index is None and node["Node Type"] == "Bitmap Heap Scan":
+            index = next((child.get("Index Name") for child in walk(node) if child.get("Index Name")), None)
+        yield table, node["Node Type"], index
+
+
+async def parent_indexes() -> Dict[str, str]:
+    """Partition index name -> index of the partitioned table it is attached to"""
+    async with engine.connect() as conn:
+        result = await conn.execute(text(
+            "SELECT c.relname, p.relname FROM pg_inherits AS i "
+            "JOIN pg_class AS c ON c.oid = i.inhrelid JOIN pg_class AS p ON p.oid = i.inhparent "
+            "WHERE c.relkind = 'i'"
+        ))
+        return dict(result.all())
+
+
+async def empty_partitions() -> FrozenSet[str]:
+    """Partitions with no rows according to the statistics (of the last ANALYZE)"""
+    async with engine.connect() as conn:
+        result = await conn.execute(text(
+            "SELECT c.relname FROM pg_inherits AS i JOIN pg_class AS c ON c.oid = i.inhrelid "
+            "WHERE c.relkind = 'r' AND c.reltuples = 0"
+        ))
+        return frozenset(result.scalars())
+
+
+async def vacuum() -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in CHECKED_TABLES:
+            await conn.exec_driver_sql(f"VACUUM (ANALYZE) {table}")
+
+
+async def capture(call: Callable[[AsyncSession], Awaitable[object]]) -> List[Tuple[str, tuple]]:
+    """Statements (with parameters) sent during one call; the session is rolled back"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with SessionLocal() as db:
+            await call(db)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    return statements
+
+
+async def explain(statement: str, parameters: tuple) -> dict:
+    """Plan only (writes are not executed), with sequential scans disabled"""
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = result.scalar()
+        await conn.rollback()
+    return plan[0]
+
+
+async def build_context(auth0_id: str) -> Context:
+    """Raises LookupError unless `auth0_id` is a seeded user with at least 13 snapshots"""
+    async with SessionLocal() as db:
+        ids = (await db.execute(
+            select(User.id, Portfolio.id).join(Portfolio, Portfolio.user_id == User.id).where(User.auth0_id == auth0_id)
+        )).one_or_none()
+        if ids is None:
+            raise LookupError(f"{auth0_id} has no portfolio (seed the database, see benchmarks.seed)")
+        user_id, portfolio_id = ids
+        history = await SnapshotService.get_snapshots_history(db, portfolio_id, limit=10_000, with_positions=False)
+        statement_date = (await db.execute(
+            select(UploadHistory.statement_date).where(UploadHistory.user_id == user_id).limit(1)
+        )).scalar_one_or_none()
+    if len(history) < 13 or statement_date is None:
+        raise LookupError(f"{auth0_id} needs at least 13 uploaded snapshots (seed with --snapshots 13 or more)")
+    return Context(auth0_id, user_id, portfolio_id, statement_date, history[11], await empty_partitions())
+
+
+async def verify(check: Check, context: Context, parents: Dict[str, str]) -> List[Finding]:
+    """Scans of the checked tables by every statement of the call, with a failure for each unexpected one"""
+    found = Counter()
+    for statement, parameters in await capture(lambda db: check.call(db, context)):
+        found.update(
+            (table, node, parents.get(index, index))
+            for table, node, index in scans(await explain(statement, parameters), context.empty_partitions)
+            if table in check.expected
+        )
+    findings = []
+    for (table, node, index), count in sorted(found.items(), key=str):
+        expected = check.expected[table]
+        failure = None
+        if node not in expected.scans or index not in expected.indexes:
+            failure = f"expected {'/'.join(sorted(expected.scans))} on {'/'.join(sorted(expected.indexes))}"
+        findings.append(Finding(table, node, index, count, failure))
+    for table in sorted(check.expected.keys() - {table for table, _, _ in found}):
+        findings.append(Finding(table, "-", None, 0, "table not read"))
+    return findings
+
+
+async def run(auth0_id: str) -> int:
+    try:
+        await vacuum()
+        try:
+            context = await build_context(auth0_id)
+        except LookupError as error:
+            print(error, file=sys.stderr)
+            return 2
+        parents = await parent_indexes()
+        failures = 0
+        print(f"{'call':<40} {'table':<20} {'scan':<16} {'index':<31} {'#':>2} verdict")
+        for check in CHECKS:
+            for finding in await verify(check, context, parents):
+                failures += finding.failure is not None
+                verdict = f"FAIL: {finding.failure}" if finding.failure else "ok"
+                print(f"{check.label:<40} {finding.table:<20} {finding.node:<16} {finding.index or '-':<31} "
+                      f"{finding.count:>2} {verdict}")
+    finally:
+        await engine.dispose()
+    print(f"{len(CHECKS)} hot queries; {failures} scan(s) off their expected index")
+    return 1 if failures else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify the hot queries are served by their indexes")
+    parser.add_argument("--user", default=DEFAULT_USER, help="auth0_id of a seeded user")
+    args = parser.parse_args(argv)
+
+    if settings.ENVIRONMENT == "production":
+        print("Refusing to VACUUM and EXPLAIN against a production environment", file=sys.stderr)
+        return 2
+    return asyncio.run(run(args.user))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
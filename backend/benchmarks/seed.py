@@ -0,0 +1,138 @@
+"""
+Scale Seeding Tool
+
+Bulk-loads synthetic users, portfolios, upload history, snapshots and
+positions with COPY, so queries like SnapshotService.get_snapshots_history
+and get_latest_snapshot can be exercised against millions of rows.
+
+Users are split across worker processes; each worker generates rows for a
+chunk of users and COPYs them in one transaction per chunk.
+
+Usage (from backend/, against a disposable local database):
+    python -m benchmarks.seed --users 10000 --snapshots 120 --positions 20 --jobs 4
+    python -m benchmarks.seed --users 500 --prefix scale2   # add more users later
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.seeding import SeedScale, TABLE_MODELS, copy_batches, generate_user, partition_statements
+from src.core.config import settings
+from src.models import Base
+
+
+def _dsn() -> str:
+    # asyncpg expects a plain postgresql:// URL
+    return settings.SQLALCHEMY_DATABASE_URI.replace("postgresql+asyncpg", "postgresql")
+
+
+async def _load_slice(scale: SeedScale, job: int, jobs: int, chunk_users: int) -> Dict[str, int]:
+    """Generate and COPY every user whose index falls into this job's slice"""
+    totals = {table: 0 for table in TABLE_MODELS}
+    conn = await asyncpg.connect(_dsn())
+    try:
+        # Seed data is reproducible, losing the tail of it on a crash is fine
+        await conn.execute("SET synchronous_commit = off")
+        indexes = list(range(job, scale.users, jobs))
+        for start in range(0, len(indexes), chunk_users):
+            batches = [generate_user(scale, i) for i in indexes[start:start + chunk_users]]
+            async with conn.transaction():
+                counts = await copy_batches(conn, batches)
+            for table, count in counts.items():
+                totals[table] += count
+    finally:
+        await conn.close()
+    return totals
+
+
+def _run_job(scale: SeedScale, job: int, jobs: int, chunk_users: int) -> Dict[str, int]:
+    return asyncio.run(_load_slice(scale, job, jobs, chunk_users))
+
+
+async def prepare_schema(scale: SeedScale, reset: bool) -> None:
+    """Create missing tables and partitions, and optionally truncate the seeded tables"""
+    engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in partition_statements(scale):
+            await conn.execute(text(statement))
+        if reset:
+            tables = ", ".join(reversed(list(TABLE_MODELS)))
+            await conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    await engine.dispose()
+
+
+async def analyze() -> None:
+    """Refresh planner statistics so EXPLAIN reflects the new data volume"""
+    conn = await asyncpg.connect(_dsn())
+    try:
+        for table in TABLE_MODELS:
+            await conn.execute(f"ANALYZE {table}")
+    finally:
+        await conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic portfolio history with COPY")
+    parser.add_argument("--users", type=int, default=1000, help="Users to create (one portfolio each)")
+    parser.add_argument("--snapshots", type=int, default=60, help="Monthly snapshots per portfolio")
+    parser.add_argument("--positions", type=int, default=15, help="Positions per snapshot")
+    parser.add_argument("--start-year", type=int, default=2015, help="Year of the first snapshot")
+    parser.add_argument("--prefix", default="seed", help="auth0_id/email prefix; must be unique per run unless --reset")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (same seed, same data)")
+    parser.add_argument("--jobs", type=int, default=1, help="Parallel worker processes")
+    parser.add_argument("--chunk-users", type=int, default=100, help="Users per COPY transaction")
+    parser.add_argument("--reset", action="store_true", help="Truncate all seeded tables first")
+    args = parser.parse_args(argv)
+
+    if settings.ENVIRONMENT == "production":
+        print("Refusing to seed a production environment", file=sys.stderr)
+        return 2
+
+    scale = SeedScale(
+        users=args.users,
+        snapshots_per_portfolio=args.snapshots,
+        positions_per_snapshot=args.positions,
+        start_year=args.start_year,
+        prefix=args.prefix,
+        seed=args.seed,
+    )
+    print(
+        f"Seeding {scale.users} users, {scale.total_snapshots} snapshots, "
+        f"{scale.total_positions} positions with {args.jobs} job(s)...",
+        file=sys.stderr,
+    )
+
+    asyncio.run(prepare_schema(scale, args.reset))
+    start = time.perf_counter()
+    totals = {table: 0 for table in TABLE_MODELS}
+    if args.jobs == 1:
+        results = [_run_job(scale, 0, 1, args.chunk_users)]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = [pool.submit(_run_job, scale, job, args.jobs, args.chunk_users) for job in range(args.jobs)]
+            results = [future.result() for future in futures]
+    for counts in results:
+        for table, count in counts.items():
+            totals[table] += count
+    elapsed = time.perf_counter() - start
+
+    asyncio.run(analyze())
+
+    for table, count in totals.items():
+        print(f"{table:<20} {count:>12,} rows")
+    rows = sum(totals.values())
+    print(f"Loaded {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
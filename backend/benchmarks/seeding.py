@@ -0,0 +1,382 @@
+"""
+Synthetic Dataset Generator
+
+Produces users, portfolios, upload history, snapshots and snapshot positions
+that respect the model constraints:
+- unique users.auth0_id / users.email
+- one snapshot per portfolio per date (idx_portfolio_snapshot_date)
+- one upload per user per file hash (idx_user_file_hash)
+- month-over-month value drift from a per-ticker price random walk, with
+  total_change / total_change_percent computed against the previous snapshot
+- snapshot dates fall in partitions created up front (partition_statements)
+
+Rows are plain tuples in TABLE_COLUMNS order so they can be inserted with
+executemany or streamed with COPY. Securities are shared by every user: each
+load registers them with ON CONFLICT DO NOTHING and fills in the positions'
+security_id from the ticker.
+"""
+
+import calendar
+import csv
+import hashlib
+import io
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import asyncpg
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.models import PortfolioSnapshot, SnapshotPosition, UploadHistory, User, Portfolio, PortfolioRollup, Security
+from src.services.partitions import PARTITIONED_TABLES, create_partition_sql
+from src.services.rollups import GRANULARITIES, period_bounds
+
+# Column order for every seeded table (snapshot_positions.id comes from its sequence)
+TABLE_COLUMNS: Dict[str, List[str]] = {
+    "securities": ["ticker", "name", "asset_class", "exchange", "created_at", "updated_at"],
+    "users": [
+        "id", "auth0_id", "email", "name", "picture", "is_active", "email_verified",
+        "created_at", "updated_at", "last_login_at",
+    ],
+    "portfolios": [
+        "id", "user_id", "name", "description", "currency", "total_net_worth",
+        "cash_balance", "invested_value", "snapshot_count", "is_active", "created_at", "updated_at",
+    ],
+    "upload_history": [
+        "id", "user_id", "filename", "file_hash", "file_size_bytes", "statement_date",
+        "account_holder", "uploaded_at", "upload_ip", "status", "error_message",
+    ],
+    "portfolio_snapshots": [
+        "id", "portfolio_id", "upload_id", "snapshot_date", "created_at", "equity_value",
+        "fixed_income_value", "cash_value", "total_value", "total_change",
+        "total_change_percent", "currency", "account_holder", "notes",
+    ],
+    "snapshot_positions": [
+        "snapshot_id", "portfolio_id", "snapshot_date", "ticker", "security_id", "quantity", "avg_cost",
+        "current_price", "market_value", "unrealized_gain", "unrealized_gain_percent",
+        "created_at",
+    ],
+    "portfolio_rollups": [
+        "portfolio_id", "granularity", "period_start", "last_snapshot_date", "snapshot_count",
+        "close_value", "min_value", "max_value", "period_return", "updated_at",
+    ],
+}
+
+# Insert order (parents before children)
+TABLE_MODELS = {
+    "securities": Security,
+    "users": User,
+    "portfolios": Portfolio,
+    "upload_history": UploadHistory,
+    "portfolio_snapshots": PortfolioSnapshot,
+    "snapshot_positions": SnapshotPosition,
+    "portfolio_rollups": PortfolioRollup,
+}
+
+# (ticker, name, asset class, exchange)
+UNIVERSE: List[Tuple[str, str, str, str]] = [
+    ("VOO", "Vanguard S&P 500 ETF", "ETF", "SIC"),
+    ("VEA", "Vanguard FTSE Developed Markets ETF", "ETF", "SIC"),
+    ("VNQ", "Vanguard Real Estate ETF", "ETF", "SIC"),
+    ("VWO", "Vanguard FTSE Emerging Markets ETF", "ETF", "SIC"),
+    ("VTI", "Vanguard Total Stock Market ETF", "ETF", "SIC"),
+    ("PFE", "Pfizer Inc.", "Stock", "SIC"),
+    ("AAPL", "Apple Inc.", "Stock", "SIC"),
+    ("MSFT", "Microsoft Corporation", "Stock", "SIC"),
+    ("GOOGL", "Alphabet Inc.", "Stock", "SIC"),
+    ("AEROMEX", "Grupo Aeromexico", "Stock", "BMV"),
+    ("WALMEX", "Walmart de Mexico", "Stock", "BMV"),
+    ("AMX", "America Movil", "Stock", "BMV"),
+    ("CEMEX", "Cemex", "Stock", "BMV"),
+    ("FEMSA", "Fomento Economico Mexicano", "Stock", "BMV"),
+    ("GMEXICO", "Grupo Mexico", "Stock", "BMV"),
+    ("BIMBO", "Grupo Bimbo", "Stock", "BMV"),
+]
+
+CENT = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class SeedScale:
+    """How much data to generate"""
+    users: int = 10
+    snapshots_per_portfolio: int = 24
+    positions_per_snapshot: int = 12
+    start_year: int = 2015
+    prefix: str = "loadtest"
+    seed: int = 0
+
+    @property
+    def total_snapshots(self) -> int:
+        return self.users * self.snapshots_per_portfolio
+
+    @property
+    def total_positions(self) -> int:
+        return self.total_snapshots * self.positions_per_snapshot
+
+    @property
+    def years(self) -> range:
+        """Calendar years of the generated snapshot dates"""
+        return range(self.start_year, self.start_year + (self.snapshots_per_portfolio - 1) // 12 + 1)
+
+
+@dataclass
+class SeedBatch:
+    """All rows belonging to one user, keyed by table name"""
+    rows: Dict[str, List[tuple]] = field(default_factory=lambda: {t: [] for t in TABLE_COLUMNS})
+
+
+def auth0_id_for(scale: SeedScale, user_index: int) -> str:
+    """auth0_id of a seeded user (the load-test stub auth sends this)"""
+    return f"{scale.prefix}|{user_index}"
+
+
+def month_end(year: int, month: int) -> datetime:
+    return datetime(year, month, calendar.monthrange(year, month)[1])
+
+
+def _money(value: float) -> Decimal:
+    return Decimal(value).quantize(CENT)
+
+
+def _ticker_universe(count: int) -> List[Tuple[str, str, str, str]]:
+    """`count` distinct (ticker, name, asset_class, exchange) entries, extending the base universe if needed"""
+    tickers = list(UNIVERSE[:count])
+    i = 0
+    while len(tickers) < count:
+        base_ticker, base_name, asset_class, exchange = UNIVERSE[i % len(UNIVERSE)]
+        suffix = chr(ord("A") + (i // len(UNIVERSE)) % 26) + chr(ord("A") + i % 26)
+        tickers.append((f"{base_ticker}{suffix}", f"{base_name} {suffix}", asset_class, exchange))
+        i += 1
+    return tickers
+
+
+def rollup_rows(portfolio_id: str, points: List[Tuple[datetime, Decimal]], now: datetime) -> List[tuple]:
+    """portfolio_rollups rows of a date-ordered (snapshot_date, total_value) history"""
+    rows = []
+    for granularity in GRANULARITIES:
+        periods: Dict[datetime, List[Tuple[datetime, Decimal]]] = {}
+        for point in points:
+            periods.setdefault(period_bounds(granularity, point[0])[0], []).append(point)
+        previous_close = None
+        for period_start, period in periods.items():
+            values = [total for _, total in period]
+            close = values[-1]
+            period_return = (close / previous_close * 100 - 100).quantize(CENT) if previous_close else None
+            rows.append((
+                portfolio_id, granularity, period_start, period[-1][0], len(period),
+                close, min(values), max(values), period_return, now,
+            ))
+            previous_close = close
+    return rows
+
+
+def generate_user(scale: SeedScale, user_index: int) -> SeedBatch:
+    """Generate one user with a portfolio and its full snapshot history"""
+    rng = random.Random(f"{scale.seed}-{user_index}")
+    batch = SeedBatch()
+    now = datetime.utcnow()
+
+    user_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    portfolio_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    holder = f"USUARIO {scale.prefix.upper()} {user_index}"
+
+    batch.rows["users"].append((
+        user_id, auth0_id_for(scale, user_index), f"{scale.prefix}{user_index}@example.com",
+        holder.title(), None, True, True, now, now, now,
+    ))
+
+    # Per-ticker state: quantity, average cost, current price
+    holdings = []
+    for ticker, name, asset_class, exchange in _ticker_universe(scale.positions_per_snapshot):
+        batch.rows["securities"].append((ticker, name, asset_class, exchange, now, now))
+        price = rng.uniform(20, 8000)
+        holdings.append({
+            "ticker": ticker,
+            "quantity": Decimal(rng.randint(1, 500)),
+            "avg_cost": price * rng.uniform(0.8, 1.1),
+            "price": price,
+        })
+
+    previous_total = None
+    totals = []
+    fixed_income = rng.uniform(1000, 200000)
+    cash = rng.uniform(10, 20000)
+    last_snapshot = None
+
+    for n in range(scale.snapshots_per_portfolio):
+        year = scale.start_year + n // 12
+        month = n % 12 + 1
+        snapshot_date = month_end(year, month)
+        snapshot_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        upload_id = str(uuid.UUID(int=rng.getrandbits(128)))
+
+        equity = Decimal("0.00")
+        for h in holdings:
+            # Monthly drift ~0.6% with ~5% volatility
+            h["price"] = max(0.5, h["price"] * (1 + rng.gauss(0.006, 0.05)))
+            if rng.random() < 0.10:
+                # Occasional buy: update quantity and weighted average cost
+                bought = Decimal(rng.randint(1, 50))
+                total_cost = float(h["quantity"]) * h["avg_cost"] + float(bought) * h["price"]
+                h["quantity"] += bought
+                h["avg_cost"] = total_cost / float(h["quantity"])
+
+            quantity = h["quantity"]
+            avg_cost = _money(h["avg_cost"])
+            price = _money(h["price"])
+            market_value = _money(float(quantity) * h["price"])
+            gain = _money((h["price"] - h["avg_cost"]) * float(quantity))
+            cost_basis = float(quantity) * h["avg_cost"]
+            gain_pct = _money(float(gain) / cost_basis * 100) if cost_basis > 0 else Decimal("0.00")
+            equity += market_value
+
+            batch.rows["snapshot_positions"].append((
+                # security_id is filled in from the ticker at load time (link_securities)
+                snapshot_id, portfolio_id, snapshot_date, h["ticker"], None, quantity, avg_cost,
+                price, market_value, gain, gain_pct, now,
+            ))
+
+        fixed_income *= 1 + rng.gauss(0.004, 0.002)
+        cash = max(0.0, cash + rng.gauss(0, 2000))
+        fixed_income_value = _money(fixed_income)
+        cash_value = _money(cash)
+        total = equity + fixed_income_value + cash_value
+
+        total_change = None
+        total_change_percent = None
+        if previous_total is not None:
+            total_change = total - previous_total
+            if previous_total > 0:
+                total_change_percent = max(
+                    Decimal("-999.99"), min(Decimal("999.99"), (total_change / previous_total * 100).quantize(CENT))
+                )
+        previous_total = total
+        totals.append((snapshot_date, total))
+
+        file_hash = hashlib.sha256(f"{scale.prefix}-{user_index}-{n}".encode()).hexdigest()
+        batch.rows["upload_history"].append((
+            upload_id, user_id, f"{year}-{month:02d}.pdf", file_hash, rng.randint(40_000, 400_000),
+            snapshot_date, holder, snapshot_date, None, "processed", None,
+        ))
+        batch.rows["portfolio_snapshots"].append((
+            snapshot_id, portfolio_id, upload_id, snapshot_date, snapshot_date, equity,
+            fixed_income_value, cash_value, total, total_change, total_change_percent,
+            "MXN", holder, None,
+        ))
+        last_snapshot = (total, cash_value, equity + fixed_income_value)
+
+    batch.rows["portfolio_rollups"].extend(rollup_rows(portfolio_id, totals, now))
+
+    net_worth, cash_balance, invested = last_snapshot or (Decimal("0.00"),) * 3
+    batch.rows["portfolios"].append((
+        portfolio_id, user_id, "Mi Portafolio Principal", "Portafolio de prueba de carga", "MXN",
+        net_worth, cash_balance, invested, len(totals), True, now, now,
+    ))
+    return batch
+
+
+def generate_dataset(scale: SeedScale) -> Iterator[SeedBatch]:
+    """Yield one SeedBatch per user so memory stays bounded at any scale"""
+    for user_index in range(scale.users):
+        yield generate_user(scale, user_index)
+
+
+def partition_statements(scale: SeedScale) -> List[str]:
+    """
+    DDL of the yearly snapshot partitions the dataset needs. Run it once before
+    loading (not inside concurrent COPY transactions: it locks the parent tables).
+    """
+    return [create_partition_sql(table, year) for year in scale.years for table in PARTITIONED_TABLES]
+
+
+def unique_securities(rows: Iterable[tuple]) -> List[tuple]:
+    """Securities rows, one per ticker"""
+    return list({row[0]: row for row in rows}.values())
+
+
+def link_securities(rows: List[tuple], security_ids: Dict[str, int]) -> List[tuple]:
+    """snapshot_positions rows with security_id set from their ticker"""
+    columns = TABLE_COLUMNS["snapshot_positions"]
+    ticker_at, id_at = columns.index("ticker"), columns.index("security_id")
+    return [row[:id_at] + (security_ids[row[ticker_at]],) + row[id_at + 1:] for row in rows]
+
+
+async def insert_batch(conn: AsyncConnection, batch: SeedBatch) -> None:
+    """Insert a batch with executemany (fine for load-test sized datasets)"""
+    securities = [dict(zip(TABLE_COLUMNS["securities"], row)) for row in unique_securities(batch.rows["securities"])]
+    await conn.execute(pg_insert(Security).on_conflict_do_nothing(index_elements=["ticker"]), securities)
+    result = await conn.execute(
+        select(Security.ticker, Security.id).where(Security.ticker.in_([s["ticker"] for s in securities]))
+    )
+    security_ids = dict(result.all())
+
+    for table, model in TABLE_MODELS.items():
+        rows = batch.rows[table]
+        if not rows or table == "securities":
+            continue
+        if table == "snapshot_positions":
+            rows = link_securities(rows, security_ids)
+        columns = TABLE_COLUMNS[table]
+        await conn.execute(insert(model.__table__), [dict(zip(columns, row)) for row in rows])
+
+
+def encode_csv(rows: Iterable[tuple]) -> bytes:
+    """Encode rows as CSV for COPY (None becomes an unquoted empty field, i.e. NULL)"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def register_securities(conn: asyncpg.Connection, rows: List[tuple]) -> Tuple[Dict[str, int], int]:
+    """
+    Insert securities not registered yet (COPY cannot skip conflicts).
+    Returns (security id per ticker, rows inserted).
+    """
+    columns = TABLE_COLUMNS["securities"]
+    placeholders = ", ".join(f"${i + 1}" for i in range(len(columns)))
+    inserted = 0
+    for row in rows:
+        status = await conn.execute(
+            f"INSERT INTO securities ({', '.join(columns)}) VALUES ({placeholders}) ON CONFLICT (ticker) DO NOTHING",
+            *row,
+        )
+        inserted += int(status.split()[-1])
+    records = await conn.fetch("SELECT ticker, id FROM securities WHERE ticker = ANY($1)", [row[0] for row in rows])
+    return {record["ticker"]: record["id"] for record in records}, inserted
+
+
+async def copy_batches(conn: asyncpg.Connection, batches: Iterable[SeedBatch]) -> Dict[str, int]:
+    """
+    Bulk-load batches with COPY FROM STDIN, one COPY per table.
+
+    Tables are copied parents first so foreign keys hold at every step.
+    Returns the number of rows copied per table (securities: newly registered).
+    """
+    merged = {table: [] for table in TABLE_COLUMNS}
+    for batch in batches:
+        for table, rows in batch.rows.items():
+            merged[table].extend(rows)
+
+    counts = {}
+    security_ids, counts["securities"] = await register_securities(conn, unique_securities(merged["securities"]))
+    merged["snapshot_positions"] = link_securities(merged["snapshot_positions"], security_ids)
+    for table in TABLE_MODELS:
+        if table == "securities":
+            continue
+        rows = merged[table]
+        counts[table] = len(rows)
+        if not rows:
+            continue
+        await conn.copy_to_table(
+            table,
+            source=io.BytesIO(encode_csv(rows)),
+            columns=TABLE_COLUMNS[table],
+            format="csv",
+        )
+    return counts
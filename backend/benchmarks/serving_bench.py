@@ -0,0 +1,100 @@
+"""
+Serving Mode Benchmark
+
+Starts `benchmarks.loadtest_app` through `python -m src.serve` once in single
+mode and once in multi mode, drives the same endpoints against both, and
+prints the throughput/latency side by side. Mixed CPU-bound (PDF parse) and
+I/O-bound (dashboard reads) endpoints show where the worker pool helps.
+
+Needs a database seeded by benchmarks.seed or benchmarks.load_test.
+
+Usage (from backend/):
+    python -m benchmarks.serving_bench --prefix seed --users 200 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, List, Optional
+
+from benchmarks.load_test import build_endpoints, run_endpoint, start_server
+from benchmarks.seeding import SeedScale, auth0_id_for
+from src.core.config import settings
+from src.serve import worker_count
+
+DEFAULT_ENDPOINTS = ["stats", "transactions", "upload"]
+
+
+async def _drive(base_url: str, names: List[str], users: List[str], args: argparse.Namespace) -> Dict[str, dict]:
+    endpoints = build_endpoints(files_per_upload=1)
+    summaries = {}
+    for name in names:
+        result = await run_endpoint(base_url, name, endpoints[name], users, args.concurrency, args.duration)
+        summaries[name] = result.summary()
+    return summaries
+
+
+def run_mode(mode: str, workers: int, users: List[str], args: argparse.Namespace) -> Dict[str, dict]:
+    print(f"Running {mode} mode ({workers} worker(s))...", file=sys.stderr)
+    command = [
+        sys.executable, "-m", "src.serve", "--app", "benchmarks.loadtest_app:app",
+        "--mode", mode, "--workers", str(workers), "--host", "127.0.0.1", "--port", str(args.port),
+    ]
+    server = start_server(args.port, workers, command=command)
+    try:
+        return asyncio.run(_drive(f"http://127.0.0.1:{args.port}", args.endpoint, users, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def print_comparison(single: Dict[str, dict], multi: Dict[str, dict], workers: int) -> None:
+    header = (
+        f"{'endpoint':<14} {'single req/s':>13} {f'multi x{workers} req/s':>16} {'speedup':>8} "
+        f"{'single p95':>11} {'multi p95':>10} {'errors':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name in single:
+        s, m = single[name], multi[name]
+        speedup = m["throughput_rps"] / s["throughput_rps"] if s["throughput_rps"] else 0.0
+        print(
+            f"{name:<14} {s['throughput_rps']:>13.2f} {m['throughput_rps']:>16.2f} {speedup:>7.2f}x "
+            f"{s['p95_ms']:>11.1f} {m['p95_ms']:>10.1f} {s['errors'] + m['errors']:>7}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare single-process and multi-worker serving")
+    parser.add_argument("--users", type=int, default=20, help="Seeded users to spread requests over")
+    parser.add_argument("--prefix", default="loadtest", help="auth0_id prefix of seeded users")
+    parser.add_argument("--workers", type=int, default=0, help="Workers in multi mode (0 = one per CPU)")
+    parser.add_argument("--endpoint", action="append", choices=["stats", "transactions", "history", "upload"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per endpoint and mode")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    args.endpoint = args.endpoint or DEFAULT_ENDPOINTS
+
+    if settings.ENVIRONMENT == "production":
+        print("Refusing to load-test a production environment", file=sys.stderr)
+        return 2
+
+    scale = SeedScale(users=args.users, snapshots_per_portfolio=0, positions_per_snapshot=0, prefix=args.prefix)
+    users = [auth0_id_for(scale, i) for i in range(args.users)]
+    workers = args.workers or worker_count()
+
+    single = run_mode("single", 1, users, args)
+    multi = run_mode("multi", workers, users, args)
+
+    print_comparison(single, multi, workers)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"workers": workers, "single": single, "multi": multi}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
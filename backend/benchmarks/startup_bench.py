@@ -0,0 +1,121 @@
+"""
+API Startup Benchmark
+
+Measures how fast a new API replica comes up and enforces a budget:
+- import time of src.main in a fresh interpreter (median of several runs)
+- heavy modules (pandas, numpy, pdfplumber, pdfminer) must NOT be loaded by
+  importing the app; they load on first upload/parse instead
+- time from spawning uvicorn to the first 200 from /health/live
+
+Usage (from backend/, with the usual environment variables set):
+    python -m benchmarks.startup_bench            # report
+    python -m benchmarks.startup_bench --check    # exit 1 when over budget (CI)
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import httpx
+
+from src.core.config import settings
+
+HEAVY_MODULES = ["pandas", "numpy", "pdfplumber", "pdfminer"]
+
+IMPORT_PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import src.main\n"
+    "elapsed = time.perf_counter() - start\n"
+    f"print(json.dumps({{'seconds': elapsed, 'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+)
+
+
+def measure_import(runs: int) -> dict:
+    """Import src.main in `runs` fresh interpreters"""
+    seconds = []
+    heavy = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            check=True, capture_output=True, text=True, env=os.environ.copy(),
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        seconds.append(result["seconds"])
+        heavy.update(result["heavy"])
+    return {"median_s": statistics.median(seconds), "max_s": max(seconds), "heavy_modules": sorted(heavy)}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_time_to_healthy(runs: int, timeout: float = 60.0) -> dict:
+    """Spawn uvicorn and time until /health/live answers 200"""
+    seconds = []
+    for _ in range(runs):
+        port = _free_port()
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--log-level", "warning"],
+            env=os.environ.copy(),
+        )
+        try:
+            url = f"http://127.0.0.1:{port}{settings.API_V1_STR}/health/live"
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError("uvicorn exited before becoming healthy")
+                if time.perf_counter() - start > timeout:
+                    raise RuntimeError(f"uvicorn not healthy after {timeout}s")
+                try:
+                    if httpx.get(url, timeout=0.5).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.02)
+            seconds.append(time.perf_counter() - start)
+        finally:
+            process.terminate()
+            process.wait()
+    return {"median_s": statistics.median(seconds), "max_s": max(seconds)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure API import time and time-to-first-healthy")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters / server starts to measure")
+    parser.add_argument("--import-budget", type=float, default=1.5, help="Max median import time of src.main (s)")
+    parser.add_argument("--healthy-budget", type=float, default=3.0, help="Max median spawn-to-healthy time (s)")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when a budget is exceeded")
+    args = parser.parse_args(argv)
+
+    imports = measure_import(args.runs)
+    healthy = measure_time_to_healthy(args.runs)
+
+    print(f"import src.main      median {imports['median_s']:.3f}s  max {imports['max_s']:.3f}s  (budget {args.import_budget}s)")
+    print(f"spawn -> /health/live median {healthy['median_s']:.3f}s  max {healthy['max_s']:.3f}s  (budget {args.healthy_budget}s)")
+    print(f"heavy modules loaded at import: {', '.join(imports['heavy_modules']) or 'none'}")
+
+    failures = []
+    if imports["heavy_modules"]:
+        failures.append(f"heavy modules imported at startup: {imports['heavy_modules']}")
+    if imports["median_s"] > args.import_budget:
+        failures.append(f"import time {imports['median_s']:.3f}s > {args.import_budget}s")
+    if healthy["median_s"] > args.healthy_budget:
+        failures.append(f"time to healthy {healthy['median_s']:.3f}s > {args.healthy_budget}s")
+
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    return 1 if failures and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
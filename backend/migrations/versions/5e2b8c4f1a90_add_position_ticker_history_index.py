@@ -0,0 +1,50 @@
+"""add_position_ticker_history_index
+
+Revision ID: 5e2b8c4f1a90
+Revises: 034cff1247f1
+Create Date: 2026-10-19 10:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b8c4f1a90'
+down_revision: Union[str, None] = '034cff1247f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Denormalize portfolio_id / snapshot_date onto positions (nullable until backfilled)
+    op.add_column('snapshot_positions', sa.Column('portfolio_id', sa.String(), nullable=True))
+    op.add_column('snapshot_positions', sa.Column('snapshot_date', sa.DateTime(), nullable=True))
+
+    op.execute(
+        """
+        UPDATE snapshot_positions AS p
+        SET portfolio_id = s.portfolio_id, snapshot_date = s.snapshot_date
+        FROM portfolio_snapshots AS s
+        WHERE s.id = p.snapshot_id
+        """
+    )
+
+    op.alter_column('snapshot_positions', 'portfolio_id', nullable=False)
+    op.alter_column('snapshot_positions', 'snapshot_date', nullable=False)
+
+    # One ticker's history across every snapshot of a portfolio, already in date order
+    op.create_index(
+        'idx_position_portfolio_ticker_date',
+        'snapshot_positions',
+        ['portfolio_id', 'ticker', 'snapshot_date'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_position_portfolio_ticker_date', table_name='snapshot_positions')
+    op.drop_column('snapshot_positions', 'snapshot_date')
+    op.drop_column('snapshot_positions', 'portfolio_id')
@@ -0,0 +1,72 @@
+"""add_portfolio_rollups
+
+Revision ID: 7a3d9e61c2b4
+Revises: 5e2b8c4f1a90
+Create Date: 2026-10-19 13:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3d9e61c2b4'
+down_revision: Union[str, None] = '5e2b8c4f1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'portfolio_rollups',
+        sa.Column('portfolio_id', sa.String(), nullable=False),
+        sa.Column('granularity', sa.String(), nullable=False),
+        sa.Column('period_start', sa.DateTime(), nullable=False),
+        sa.Column('last_snapshot_date', sa.DateTime(), nullable=False),
+        sa.Column('snapshot_count', sa.Integer(), nullable=False),
+        sa.Column('close_value', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('min_value', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('max_value', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('period_return', sa.Numeric(precision=12, scale=2), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('portfolio_id', 'granularity', 'period_start')
+    )
+
+    # Backfill every period of the existing snapshots, returns chained with lag()
+    op.execute(
+        """
+        INSERT INTO portfolio_rollups (
+            portfolio_id, granularity, period_start, last_snapshot_date, snapshot_count,
+            close_value, min_value, max_value, period_return, updated_at
+        )
+        SELECT
+            portfolio_id, granularity, period_start, last_snapshot_date, snapshot_count,
+            close_value, min_value, max_value,
+            CASE WHEN lag(close_value) OVER w > 0
+                 THEN round((close_value / lag(close_value) OVER w - 1) * 100, 2)
+            END,
+            now() AT TIME ZONE 'utc'
+        FROM (
+            SELECT
+                s.portfolio_id,
+                g.granularity,
+                date_trunc(g.granularity, s.snapshot_date) AS period_start,
+                max(s.snapshot_date) AS last_snapshot_date,
+                count(*) AS snapshot_count,
+                (array_agg(s.total_value ORDER BY s.snapshot_date DESC))[1] AS close_value,
+                min(s.total_value) AS min_value,
+                max(s.total_value) AS max_value
+            FROM portfolio_snapshots AS s
+            CROSS JOIN (VALUES ('month'), ('quarter'), ('year')) AS g (granularity)
+            GROUP BY s.portfolio_id, g.granularity, date_trunc(g.granularity, s.snapshot_date)
+        ) AS periods
+        WINDOW w AS (PARTITION BY portfolio_id, granularity ORDER BY period_start)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('portfolio_rollups')
@@ -0,0 +1,40 @@
+"""add_portfolio_snapshot_count
+
+Revision ID: 9c1f4b7d2e35
+Revises: 7a3d9e61c2b4
+Create Date: 2026-10-19 15:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1f4b7d2e35'
+down_revision: Union[str, None] = '7a3d9e61c2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Maintained snapshot counter (history total_count without a COUNT(*) per request)
+    op.add_column('portfolios', sa.Column('snapshot_count', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(
+        """
+        UPDATE portfolios AS p
+        SET snapshot_count = s.snapshot_count
+        FROM (
+            SELECT portfolio_id, count(*) AS snapshot_count
+            FROM portfolio_snapshots
+            GROUP BY portfolio_id
+        ) AS s
+        WHERE s.portfolio_id = p.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('portfolios', 'snapshot_count')
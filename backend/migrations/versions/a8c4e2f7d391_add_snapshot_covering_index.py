@@ -0,0 +1,68 @@
+"""add_snapshot_covering_index
+
+Revision ID: a8c4e2f7d391
+Revises: f1a7c3e9b254
+Create Date: 2026-10-19 22:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c4e2f7d391'
+down_revision: Union[str, None] = 'f1a7c3e9b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SUMMARY_INDEX = 'idx_portfolio_snapshot_summary'
+SUMMARY_KEY = 'portfolio_id, snapshot_date DESC, id DESC'
+SUMMARY_INCLUDE = 'total_value, equity_value, fixed_income_value, cash_value, created_at'
+
+# Covered by the primary key or by idx_user_file_hash / idx_user_statement_date (no query filters
+# upload_history without user_id)
+REDUNDANT_UPLOAD_INDEXES = {
+    'ix_upload_history_id': 'id',
+    'ix_upload_history_user_id': 'user_id',
+    'ix_upload_history_file_hash': 'file_hash',
+    'ix_upload_history_statement_date': 'statement_date',
+}
+
+
+def upgrade() -> None:
+    # Every index is built without blocking writes (CONCURRENTLY cannot run in a transaction).
+    # A partitioned parent cannot be indexed concurrently: its index is created ON ONLY the
+    # parent (invalid, no partition scanned), each partition is indexed concurrently and
+    # attached, and the parent index becomes valid with the last partition.
+    # Partitions created later get the index from the parent.
+    with op.get_context().autocommit_block():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {SUMMARY_INDEX} ON ONLY portfolio_snapshots ({SUMMARY_KEY}) "
+                   f"INCLUDE ({SUMMARY_INCLUDE})")
+        partitions = op.get_bind().execute(sa.text(
+            "SELECT c.relname FROM pg_inherits AS i JOIN pg_class AS c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'portfolio_snapshots'::regclass ORDER BY c.relname"
+        )).scalars().all()
+        for partition in partitions:
+            index = f'{partition}_summary_idx'
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {partition} ({SUMMARY_KEY}) "
+                       f"INCLUDE ({SUMMARY_INCLUDE})")
+            op.execute(f"ALTER INDEX {SUMMARY_INDEX} ATTACH PARTITION {index}")
+
+        for name in REDUNDANT_UPLOAD_INDEXES:
+            op.drop_index(name, table_name='upload_history', postgresql_concurrently=True, if_exists=True)
+
+    # Prefix of idx_portfolio_snapshot_date and of the new index. Indexes of a partitioned
+    # table cannot be dropped concurrently; this one takes a brief exclusive lock
+    op.drop_index('ix_portfolio_snapshots_portfolio_id', table_name='portfolio_snapshots')
+
+
+def downgrade() -> None:
+    op.create_index('ix_portfolio_snapshots_portfolio_id', 'portfolio_snapshots', ['portfolio_id'], unique=False)
+    with op.get_context().autocommit_block():
+        for name, column in REDUNDANT_UPLOAD_INDEXES.items():
+            op.create_index(name, 'upload_history', [column], unique=False, postgresql_concurrently=True,
+                            if_not_exists=True)
+    # Drops the partitions' indexes with it
+    op.drop_index(SUMMARY_INDEX, table_name='portfolio_snapshots')
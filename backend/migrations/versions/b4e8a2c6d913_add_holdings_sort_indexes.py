@@ -0,0 +1,28 @@
+"""add_holdings_sort_indexes
+
+Revision ID: b4e8a2c6d913
+Revises: 9c1f4b7d2e35
+Create Date: 2026-10-19 16:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8a2c6d913'
+down_revision: Union[str, None] = '9c1f4b7d2e35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Holdings of one snapshot in market value / gain order, id as tiebreak (scanned backward for DESC)
+    op.create_index('idx_position_snapshot_market_value', 'snapshot_positions', ['snapshot_id', 'market_value', 'id'], unique=False)
+    op.create_index('idx_position_snapshot_gain', 'snapshot_positions', ['snapshot_id', 'unrealized_gain', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_position_snapshot_gain', table_name='snapshot_positions')
+    op.drop_index('idx_position_snapshot_market_value', table_name='snapshot_positions')
@@ -0,0 +1,103 @@
+"""add_securities_master
+
+Revision ID: d2f6a9c4b718
+Revises: b4e8a2c6d913
+Create Date: 2026-10-19 18:10:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6a9c4b718'
+down_revision: Union[str, None] = 'b4e8a2c6d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tickers the statement parser used to name from a hard-coded table
+KNOWN_SECURITIES = [
+    ("PFE", "Pfizer Inc.", "Stock", "SIC"),
+    ("VEA", "Vanguard FTSE Developed Markets ETF", "ETF", "SIC"),
+    ("VNQ", "Vanguard Real Estate ETF", "ETF", "SIC"),
+    ("VOO", "Vanguard S&P 500 ETF", "ETF", "SIC"),
+    ("VWO", "Vanguard FTSE Emerging Markets ETF", "ETF", "SIC"),
+    ("AEROMEX", "Grupo Aeromexico", "Stock", "BMV"),
+    ("AAPL", "Apple Inc.", "Stock", "SIC"),
+    ("MSFT", "Microsoft Corporation", "Stock", "SIC"),
+    ("GOOGL", "Alphabet Inc.", "Stock", "SIC"),
+    ("VTI", "Vanguard Total Stock Market ETF", "ETF", "SIC"),
+]
+
+
+def upgrade() -> None:
+    securities = op.create_table(
+        'securities',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('ticker', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('asset_class', sa.String(), nullable=False),
+        sa.Column('exchange', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('ticker')
+    )
+    now = datetime.utcnow()
+    op.bulk_insert(securities, [
+        {
+            'ticker': ticker, 'name': name, 'asset_class': asset_class, 'exchange': exchange,
+            'created_at': now, 'updated_at': now,
+        }
+        for ticker, name, asset_class, exchange in KNOWN_SECURITIES
+    ])
+
+    # Every other ticker already held: latest name and asset type seen for it
+    op.execute(
+        """
+        INSERT INTO securities (ticker, name, asset_class, exchange, created_at, updated_at)
+        SELECT DISTINCT ON (ticker)
+            ticker, name, coalesce(asset_type, 'Stock'), NULL,
+            now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'
+        FROM snapshot_positions
+        ORDER BY ticker, snapshot_date DESC
+        ON CONFLICT (ticker) DO NOTHING
+        """
+    )
+
+    # Positions reference the security by id instead of repeating its name and type
+    op.add_column('snapshot_positions', sa.Column('security_id', sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE snapshot_positions AS p
+        SET security_id = s.id
+        FROM securities AS s
+        WHERE s.ticker = p.ticker
+        """
+    )
+    op.alter_column('snapshot_positions', 'security_id', nullable=False)
+    op.create_foreign_key(
+        'snapshot_positions_security_id_fkey', 'snapshot_positions', 'securities', ['security_id'], ['id']
+    )
+    op.drop_column('snapshot_positions', 'asset_type')
+    op.drop_column('snapshot_positions', 'name')
+
+
+def downgrade() -> None:
+    op.add_column('snapshot_positions', sa.Column('name', sa.String(), nullable=True))
+    op.add_column('snapshot_positions', sa.Column('asset_type', sa.String(), nullable=True))
+    op.execute(
+        """
+        UPDATE snapshot_positions AS p
+        SET name = s.name, asset_type = s.asset_class
+        FROM securities AS s
+        WHERE s.id = p.security_id
+        """
+    )
+    op.alter_column('snapshot_positions', 'name', nullable=False)
+    op.drop_constraint('snapshot_positions_security_id_fkey', 'snapshot_positions', type_='foreignkey')
+    op.drop_column('snapshot_positions', 'security_id')
+    op.drop_table('securities')
@@ -0,0 +1,55 @@
+"""add_delta_position_storage
+
+Revision ID: e5b3c8d1a627
+Revises: d2f6a9c4b718
+Create Date: 2026-10-19 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b3c8d1a627'
+down_revision: Union[str, None] = 'd2f6a9c4b718'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing snapshots stay fully stored (base_snapshot_id NULL)
+    op.add_column('portfolio_snapshots', sa.Column('base_snapshot_id', sa.String(), nullable=True))
+    op.add_column('portfolio_snapshots', sa.Column('removed_tickers', postgresql.ARRAY(sa.String()), nullable=True))
+    op.create_foreign_key(
+        'portfolio_snapshots_base_snapshot_id_fkey', 'portfolio_snapshots', 'portfolio_snapshots',
+        ['base_snapshot_id'], ['id']
+    )
+    op.create_index(op.f('ix_portfolio_snapshots_base_snapshot_id'), 'portfolio_snapshots', ['base_snapshot_id'], unique=False)
+
+
+def downgrade() -> None:
+    # Write the inherited positions out so every snapshot is complete again
+    op.execute(
+        """
+        INSERT INTO snapshot_positions (
+            snapshot_id, portfolio_id, snapshot_date, ticker, security_id, quantity, avg_cost,
+            current_price, market_value, unrealized_gain, unrealized_gain_percent, created_at
+        )
+        SELECT
+            s.id, s.portfolio_id, s.snapshot_date, k.ticker, k.security_id, k.quantity, k.avg_cost,
+            k.current_price, k.market_value, k.unrealized_gain, k.unrealized_gain_percent, k.created_at
+        FROM portfolio_snapshots AS s
+        JOIN snapshot_positions AS k ON k.snapshot_id = s.base_snapshot_id
+        WHERE k.ticker <> ALL (COALESCE(s.removed_tickers, '{}'))
+          AND NOT EXISTS (
+              SELECT 1 FROM snapshot_positions AS p WHERE p.snapshot_id = s.id AND p.ticker = k.ticker
+          )
+        """
+    )
+    op.drop_index(op.f('ix_portfolio_snapshots_base_snapshot_id'), table_name='portfolio_snapshots')
+    op.drop_constraint('portfolio_snapshots_base_snapshot_id_fkey', 'portfolio_snapshots', type_='foreignkey')
+    op.drop_column('portfolio_snapshots', 'removed_tickers')
+    op.drop_column('portfolio_snapshots', 'base_snapshot_id')
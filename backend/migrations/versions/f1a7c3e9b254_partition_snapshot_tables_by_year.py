@@ -0,0 +1,159 @@
+"""partition_snapshot_tables_by_year
+
+Revision ID: f1a7c3e9b254
+Revises: e5b3c8d1a627
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a7c3e9b254'
+down_revision: Union[str, None] = 'e5b3c8d1a627'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SNAPSHOT_COLUMNS = [
+    'id', 'portfolio_id', 'upload_id', 'snapshot_date', 'created_at', 'equity_value', 'fixed_income_value',
+    'cash_value', 'total_value', 'total_change', 'total_change_percent', 'currency', 'account_holder', 'notes',
+    'base_snapshot_id', 'removed_tickers',
+]
+POSITION_COLUMNS = [
+    'id', 'snapshot_id', 'portfolio_id', 'snapshot_date', 'ticker', 'security_id', 'quantity', 'avg_cost',
+    'current_price', 'market_value', 'unrealized_gain', 'unrealized_gain_percent', 'created_at',
+]
+
+
+def _create_tables(suffix: str, partitioned: bool) -> None:
+    """Both tables without keys or indexes (added after the copy)"""
+    partition_by = {'postgresql_partition_by': 'RANGE (snapshot_date)'} if partitioned else {}
+    op.create_table(
+        f'portfolio_snapshots{suffix}',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('portfolio_id', sa.String(), nullable=False),
+        sa.Column('upload_id', sa.String(), nullable=True),
+        sa.Column('snapshot_date', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('equity_value', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('fixed_income_value', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('cash_value', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('total_value', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('total_change', sa.Numeric(precision=15, scale=2), nullable=True),
+        sa.Column('total_change_percent', sa.Numeric(precision=5, scale=2), nullable=True),
+        sa.Column('currency', sa.String(), nullable=False),
+        sa.Column('account_holder', sa.String(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('base_snapshot_id', sa.String(), nullable=True),
+        sa.Column('removed_tickers', postgresql.ARRAY(sa.String()), nullable=True),
+        **partition_by
+    )
+    op.create_table(
+        f'snapshot_positions{suffix}',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('snapshot_positions_id_seq'::regclass)"),
+                  nullable=False),
+        sa.Column('snapshot_id', sa.String(), nullable=False),
+        sa.Column('portfolio_id', sa.String(), nullable=False),
+        sa.Column('snapshot_date', sa.DateTime(), nullable=False),
+        sa.Column('ticker', sa.String(), nullable=False),
+        sa.Column('security_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Numeric(precision=15, scale=4), nullable=False),
+        sa.Column('avg_cost', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('current_price', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('market_value', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('unrealized_gain', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('unrealized_gain_percent', sa.Numeric(precision=8, scale=2), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        **partition_by
+    )
+
+
+def _rebuild(partitioned: bool) -> None:
+    """
+    Copy both tables into new ones (yearly partitioned or plain), swap them in
+    and recreate keys, indexes and foreign keys under their existing names.
+    """
+    suffix = '_partitioned' if partitioned else '_unpartitioned'
+    # Writes wait until the migration commits (reads go on until the swap), so no snapshot
+    # uploaded or deleted during the copy is lost. Uploads are unavailable meanwhile.
+    op.execute("LOCK TABLE portfolio_snapshots, snapshot_positions IN EXCLUSIVE MODE")
+    op.drop_constraint('snapshot_positions_snapshot_id_fkey', 'snapshot_positions', type_='foreignkey')
+    if partitioned:
+        # Delta storage keyframe reference: a foreign key into the partitioned table would need
+        # the keyframe's date as well, so it is only kept on the plain table
+        op.drop_constraint('portfolio_snapshots_base_snapshot_id_fkey', 'portfolio_snapshots', type_='foreignkey')
+
+    _create_tables(suffix, partitioned)
+    if partitioned:
+        # Every year with snapshots, plus this year and the next (the app creates later ones)
+        now = datetime.utcnow().year
+        years = {int(year) for (year,) in op.get_bind().execute(
+            sa.text("SELECT DISTINCT extract(year FROM snapshot_date) FROM portfolio_snapshots")
+        )} | {now, now + 1}
+        for year in sorted(years):
+            for table in ('portfolio_snapshots', 'snapshot_positions'):
+                op.execute(
+                    f"CREATE TABLE {table}_y{year} PARTITION OF {table}{suffix} "
+                    f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+                )
+
+    for table, columns in (('portfolio_snapshots', SNAPSHOT_COLUMNS), ('snapshot_positions', POSITION_COLUMNS)):
+        column_list = ', '.join(columns)
+        op.execute(f"INSERT INTO {table}{suffix} ({column_list}) SELECT {column_list} FROM {table}")
+
+    # The id sequence outlives the old positions table
+    op.execute("ALTER SEQUENCE snapshot_positions_id_seq OWNED BY NONE")
+    op.drop_table('snapshot_positions')
+    op.drop_table('portfolio_snapshots')
+    op.rename_table(f'portfolio_snapshots{suffix}', 'portfolio_snapshots')
+    op.rename_table(f'snapshot_positions{suffix}', 'snapshot_positions')
+    op.execute("ALTER SEQUENCE snapshot_positions_id_seq OWNED BY snapshot_positions.id")
+
+    # The partition key has to be part of the primary key (and of the key a foreign key references),
+    # so the database no longer enforces unique ids on its own: the app does (uuid4 snapshot ids,
+    # position ids from the one sequence), see src/models/snapshot.py
+    key = ['id', 'snapshot_date'] if partitioned else ['id']
+    op.create_primary_key('portfolio_snapshots_pkey', 'portfolio_snapshots', key)
+    op.create_primary_key('snapshot_positions_pkey', 'snapshot_positions', key)
+
+    op.create_index('idx_portfolio_snapshot_date', 'portfolio_snapshots', ['portfolio_id', 'snapshot_date'], unique=True)
+    for column in ('base_snapshot_id', 'id', 'portfolio_id', 'snapshot_date', 'upload_id'):
+        op.create_index(f'ix_portfolio_snapshots_{column}', 'portfolio_snapshots', [column], unique=False)
+    op.create_index('idx_snapshot_ticker', 'snapshot_positions', ['snapshot_id', 'ticker'], unique=False)
+    op.create_index('idx_position_portfolio_ticker_date', 'snapshot_positions',
+                    ['portfolio_id', 'ticker', 'snapshot_date'], unique=False)
+    op.create_index('idx_position_snapshot_market_value', 'snapshot_positions',
+                    ['snapshot_id', 'market_value', 'id'], unique=False)
+    op.create_index('idx_position_snapshot_gain', 'snapshot_positions',
+                    ['snapshot_id', 'unrealized_gain', 'id'], unique=False)
+    for column in ('id', 'snapshot_id', 'ticker'):
+        op.create_index(f'ix_snapshot_positions_{column}', 'snapshot_positions', [column], unique=False)
+
+    op.create_foreign_key('portfolio_snapshots_portfolio_id_fkey', 'portfolio_snapshots', 'portfolios',
+                          ['portfolio_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('portfolio_snapshots_upload_id_fkey', 'portfolio_snapshots', 'upload_history',
+                          ['upload_id'], ['id'], ondelete='SET NULL')
+    op.create_foreign_key('snapshot_positions_security_id_fkey', 'snapshot_positions', 'securities',
+                          ['security_id'], ['id'])
+    op.create_foreign_key('snapshot_positions_snapshot_id_fkey', 'snapshot_positions', 'portfolio_snapshots',
+                          ['snapshot_id', 'snapshot_date'] if partitioned else ['snapshot_id'], key,
+                          ondelete='CASCADE')
+    if not partitioned:
+        op.create_foreign_key('portfolio_snapshots_base_snapshot_id_fkey', 'portfolio_snapshots',
+                              'portfolio_snapshots', ['base_snapshot_id'], ['id'])
+
+    op.execute("ANALYZE portfolio_snapshots")
+    op.execute("ANALYZE snapshot_positions")
+
+
+def upgrade() -> None:
+    _rebuild(partitioned=True)
+
+
+def downgrade() -> None:
+    _rebuild(partitioned=False)
@@ -2,5 +2,5 @@
 set -e
 echo "Running migrations..."
 alembic upgrade head
-echo "Starting Uvicorn..."
-uvicorn src.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+echo "Starting server (SERVER_MODE=${SERVER_MODE:-single})..."
+exec python -m src.serve
@@ -0,0 +1,50 @@
+"""
+Shared API Dependencies
+
+Resolve the authenticated Auth0 user to our database user and portfolio, so
+endpoints declare what they need instead of repeating the lookups:
+
+    portfolio: Optional[Portfolio] = Depends(get_current_portfolio)
+
+FastAPI caches dependencies per request, so get_db yields the same session to
+these lookups and to the endpoint.
+"""
+
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.auth0 import get_current_user_from_token
+from src.core.database import get_db
+from src.models.portfolio import Portfolio
+from src.models.user import User
+
+
+async def get_current_db_user(
+    current_user: dict = Depends(get_current_user_from_token),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Database user of the token (401 without an auth0_id, 404 if not synced yet)"""
+    auth0_id = current_user.get("auth0_id")
+    if not auth0_id:
+        raise HTTPException(status_code=401, detail="Invalid authentication token")
+
+    user_result = await db.execute(select(User).where(User.auth0_id == auth0_id))
+    user = user_result.scalar_one_or_none()
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found. Please sync your account first.")
+    return user
+
+
+async def get_current_portfolio(
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db)
+) -> Optional[Portfolio]:
+    """The user's portfolio, or None before the first upload (endpoints answer with an empty response)"""
+    portfolio_result = await db.execute(
+        select(Portfolio).where(Portfolio.user_id == user.id).limit(1)
+    )
+    return portfolio_result.scalar_one_or_none()
@@ -0,0 +1,73 @@
+"""
+Admin Endpoints
+
+Operational toggles protected by the privileged X-Profile-Token header
+(settings.PROFILER_TOKEN). Currently: arming the request profiler and
+downloading captured profiles.
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from src.core.profiling import profiler
+
+router = APIRouter()
+
+
+class ArmProfilerRequest(BaseModel):
+    path_prefix: str = Field(..., description="Profile requests whose path starts with this prefix")
+    count: int = Field(1, ge=1, le=20, description="How many matching requests to profile")
+
+
+class ProfileInfo(BaseModel):
+    id: str
+    method: str
+    path: str
+    status: int
+    duration_ms: float
+    samples: int
+    interval_ms: float
+    created_at: str
+
+
+async def require_profiler_token(x_profile_token: Optional[str] = Header(None)) -> None:
+    """Allow the call only with the configured privileged token"""
+    if not profiler.enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiler is disabled")
+    if not profiler.check_token(x_profile_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profiler token")
+
+
+@router.post("/profiling/arm", dependencies=[Depends(require_profiler_token)])
+async def arm_profiler(body: ArmProfilerRequest):
+    """Profile the next `count` requests under `path_prefix` (still subject to the rate limit)"""
+    profiler.arm(body.path_prefix, body.count)
+    return {"status": "armed", "path_prefix": body.path_prefix, "count": body.count}
+
+
+@router.delete("/profiling/arm", dependencies=[Depends(require_profiler_token)])
+async def disarm_profiler():
+    """Cancel every armed prefix"""
+    profiler.disarm()
+    return {"status": "disarmed"}
+
+
+@router.get("/profiles", response_model=List[ProfileInfo], dependencies=[Depends(require_profiler_token)])
+async def list_profiles():
+    """List stored profiles, most recent first"""
+    return profiler.store.list()
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profiler_token)])
+async def download_profile(profile_id: str):
+    """Download a profile in collapsed-stack format (flamegraph.pl / speedscope)"""
+    collapsed = profiler.store.read(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(
+        collapsed,
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'},
+    )
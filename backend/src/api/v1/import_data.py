@@ -1,11 +1,16 @@
 from datetime import datetime
-from typing import List
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
+from typing import List, Literal, Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from src.services.pdf_parser import parse_gbm_pdf
 from src.services.snapshot_service import SnapshotService
+from src.services.snapshot_diff import SnapshotDiffService
+from src.services.rollups import GRANULARITIES, RollupService
+from src.services.export import EXPORT_FORMATS, export_snapshots
+from src.services.securities import SecurityService
 from src.schemas.import_data import (
     PortfolioSnapshotResponse,
     Metadata,
@@ -15,15 +20,19 @@ from src.schemas.import_data import (
     SnapshotHistoryResponse,
     SnapshotDetailResponse,
     SnapshotSummary,
+    PeriodSummary,
     SnapshotPositionDetail,
     BulkUploadResponse,
-    FileUploadResult
+    FileUploadResult,
+    SnapshotDiffResponse
 )
 from src.core.auth0 import get_current_user_from_token
+from src.api.deps import get_current_db_user, get_current_portfolio
 from src.core.database import get_db
+from src.core.pagination import decode_cursor, encode_cursor
 from src.models.user import User
 from src.models.portfolio import Portfolio
-from src.models.snapshot import UploadHistory
+from src.models.snapshot import PortfolioSnapshot, UploadHistory
 
 router = APIRouter()
 
@@ -178,8 +187,10 @@ async def save_snapshot(
 
 @router.get("/history", response_model=SnapshotHistoryResponse)
 async def get_snapshot_history(
-    limit: int = 12,
-    current_user: dict = Depends(get_current_user_from_token),
+    limit: int = Query(12, ge=1, le=500),
+    cursor: Optional[str] = None,
+    granularity: Optional[Literal["month", "quarter", "year"]] = None,
+    portfolio: Optional[Portfolio] = Depends(get_current_portfolio),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -188,33 +199,61 @@ async def get_snapshot_history(
     Returns up to `limit` snapshots ordered by date descending (most recent first).
     Each snapshot includes calculated change from previous month.
 
+    Paginated with an opaque cursor: when `has_more` is true, pass `next_cursor`
+    as `cursor` to get the next (older) page. `total_count` is the portfolio's
+    total number of snapshots.
+
+    With `granularity` (month, quarter, year), returns up to `limit` pre-aggregated
+    periods instead: period-end value, min/max within the period and the return
+    vs. the previous period, read from the maintained rollup table. Periods are
+    paged the same way (a cursor only continues the listing it came from), and
+    `total_count` is the number of periods.
+
     Backend handles ALL calculations - frontend only visualizes.
     """
-    # 1. Get user from database
-    auth0_id = current_user.get("auth0_id")
-    if not auth0_id:
-        raise HTTPException(status_code=401, detail="Invalid authentication token")
-
-    user_result = await db.execute(select(User).where(User.auth0_id == auth0_id))
-    user = user_result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    # 1. No portfolio before the first upload
+    if not portfolio:
+        return SnapshotHistoryResponse(snapshots=[], total_count=0, granularity=granularity)
 
-    # 2. Get user's portfolio
-    portfolio_result = await db.execute(
-        select(Portfolio).where(Portfolio.user_id == user.id).limit(1)
-    )
-    portfolio = portfolio_result.scalar_one_or_none()
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Period cursors carry their granularity where snapshot cursors carry an id
+    if before is not None and (before[1] if before[1] in GRANULARITIES else None) != granularity:
+        raise HTTPException(status_code=400, detail="Cursor belongs to a different listing")
+
+    # 2. Long-horizon view: one page of rollup periods
+    if granularity:
+        rollups = await RollupService.get_rollups(
+            db=db,
+            portfolio_id=portfolio.id,
+            granularity=granularity,
+            limit=limit + 1,
+            before=before[0] if before else None
+        )
+        has_more = len(rollups) > limit
+        periods = [PeriodSummary.model_validate(r) for r in rollups[:limit]]
+        return SnapshotHistoryResponse(
+            snapshots=[],
+            total_count=await RollupService.count_rollups(db, portfolio.id, granularity),
+            next_cursor=encode_cursor(rollups[limit - 1].period_start, granularity) if has_more else None,
+            has_more=has_more,
+            granularity=granularity,
+            periods=periods
+        )
 
-    if not portfolio:
-        return SnapshotHistoryResponse(snapshots=[], total_count=0)
+    # 3. Get one page of snapshot history from service (one extra row tells if there is more)
 
-    # 3. Get snapshot history from service
     snapshots = await SnapshotService.get_snapshots_history(
         db=db,
         portfolio_id=portfolio.id,
-        limit=limit
+        limit=limit + 1,
+        before=before,
+        with_positions=False
     )
+    has_more = len(snapshots) > limit
+    snapshots = snapshots[:limit]
 
     # 4. Convert to response models
     snapshot_summaries = [
@@ -232,16 +271,19 @@ async def get_snapshot_history(
         for s in snapshots
     ]
 
+    last = snapshots[-1] if snapshots else None
     return SnapshotHistoryResponse(
         snapshots=snapshot_summaries,
-        total_count=len(snapshot_summaries)
+        total_count=portfolio.snapshot_count,
+        next_cursor=encode_cursor(last.snapshot_date, last.id) if has_more else None,
+        has_more=has_more
     )
 
 
 @router.get("/snapshot/{snapshot_id}", response_model=SnapshotDetailResponse)
 async def get_snapshot_detail(
     snapshot_id: str,
-    current_user: dict = Depends(get_current_user_from_token),
+    user: User = Depends(get_current_db_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -249,23 +291,13 @@ async def get_snapshot_detail(
 
     This allows the user to see the exact state of their portfolio at a given time.
     """
-    # 1. Get user from database
-    auth0_id = current_user.get("auth0_id")
-    if not auth0_id:
-        raise HTTPException(status_code=401, detail="Invalid authentication token")
-
-    user_result = await db.execute(select(User).where(User.auth0_id == auth0_id))
-    user = user_result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # 2. Get snapshot
+    # 1. Get snapshot
     snapshot = await SnapshotService.get_snapshot_by_id(db=db, snapshot_id=snapshot_id)
 
     if not snapshot:
         raise HTTPException(status_code=404, detail="Snapshot not found")
 
-    # 3. Verify ownership (snapshot belongs to user's portfolio)
+    # 2. Verify ownership (snapshot belongs to user's portfolio)
     portfolio_result = await db.execute(
         select(Portfolio).where(Portfolio.id == snapshot.portfolio_id)
     )
@@ -274,7 +306,8 @@ async def get_snapshot_detail(
     if not portfolio or portfolio.user_id != user.id:
         raise HTTPException(status_code=403, detail="You don't have permission to view this snapshot")
 
-    # 4. Convert to response model
+    # 3. Convert to response model (position names from the security master)
+    securities = await SecurityService.describe(db, [p.security_id for p in snapshot.positions])
     return SnapshotDetailResponse(
         id=snapshot.id,
         snapshot_date=snapshot.snapshot_date,
@@ -290,7 +323,7 @@ async def get_snapshot_detail(
         positions=[
             SnapshotPositionDetail(
                 ticker=p.ticker,
-                name=p.name,
+                name=securities[p.security_id].name if p.security_id in securities else p.ticker,
                 quantity=float(p.quantity),
                 avg_cost=float(p.avg_cost),
                 current_price=float(p.current_price),
@@ -303,6 +336,59 @@ async def get_snapshot_detail(
     )
 
 
+@router.get("/diff", response_model=SnapshotDiffResponse)
+async def get_snapshot_diff(
+    from_id: str,
+    to_id: str,
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get what changed between two snapshots: new and closed positions,
+    quantity changes and price moves. Only changed positions are returned.
+    """
+    # 1. Get both snapshots, restricted to the user's portfolios (ownership check)
+    snapshot_result = await db.execute(
+        select(PortfolioSnapshot)
+        .join(Portfolio, Portfolio.id == PortfolioSnapshot.portfolio_id)
+        .where(PortfolioSnapshot.id.in_([from_id, to_id]), Portfolio.user_id == user.id)
+    )
+    snapshots = {s.id: s for s in snapshot_result.scalars().all()}
+
+    if from_id not in snapshots or to_id not in snapshots:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    if snapshots[from_id].portfolio_id != snapshots[to_id].portfolio_id:
+        raise HTTPException(status_code=400, detail="Snapshots belong to different portfolios")
+
+    # 2. Diff (cached per snapshot pair)
+    return await SnapshotDiffService.diff(db, snapshots[from_id], snapshots[to_id])
+
+
+@router.get("/export")
+async def export_snapshot_history(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    portfolio: Optional[Portfolio] = Depends(get_current_portfolio)
+):
+    """
+    Download every snapshot of the user's portfolio with its positions
+    (one row per position) as CSV, NDJSON or Parquet.
+
+    The file is streamed in chunks straight from a database cursor, so
+    exports of any size use constant memory.
+    """
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+
+    # Stream the export
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"portfolio-history-{datetime.utcnow():%Y%m%d}.{extension}"
+    return StreamingResponse(
+        export_snapshots(portfolio.id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.post("/bulk-upload", response_model=BulkUploadResponse)
 async def bulk_upload_files(
     files: List[UploadFile] = File(..., description="Multiple GBM PDF statement files (max 100)"),
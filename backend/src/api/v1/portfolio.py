@@ -1,40 +1,35 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from typing import Literal, Optional
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
 from sqlalchemy.orm import selectinload
 from src.core.database import get_db
-from src.core.auth0 import get_current_user_from_token
+from src.api.deps import get_current_db_user, get_current_portfolio
 from src.services.parser import PortfolioParser
 from src.services.analytics import PortfolioAnalytics
 from src.services.snapshot_service import SnapshotService
+from src.services.allocation import AllocationService, CHART_TITLES
+from src.services.securities import SecurityService
 from src.models.portfolio import Portfolio
 from src.models.user import User
 from src.models.snapshot import PortfolioSnapshot
-from src.schemas.dashboard import StatsResponse, ChartResponse, HoldingsResponse
+from src.schemas.dashboard import StatsResponse, ChartResponse, HoldingsResponse, PerformanceResponse, RiskResponse, TickerHistoryResponse, AttributionResponse, HistorySeriesResponse
+
+# NumPy-backed services (returns, risk, downsampling, attribution) are imported inside
+# their endpoints, so importing the app does not load NumPy (see tests/test_startup.py)
 
 router = APIRouter()
 
 @router.post("/upload")
 async def upload_portfolio(
     file: UploadFile = File(...),
-    current_user: dict = Depends(get_current_user_from_token),
+    user: User = Depends(get_current_db_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Upload portfolio data. Requires Auth0 authentication."""
     raw = await PortfolioParser.parse_json(file)
     analytics = PortfolioAnalytics(raw)
 
-    # Get user from DB using auth0_id
-    auth0_id = current_user.get("auth0_id")
-    if not auth0_id:
-        raise HTTPException(status_code=401, detail="Invalid authentication token")
-
-    user_result = await db.execute(select(User).where(User.auth0_id == auth0_id))
-    user = user_result.scalar_one_or_none()
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found. Please sync your account first.")
-
     p_id = await analytics.save_to_db(db, user.id)
     return {"status": "success", "data": {"portfolioId": p_id}}
 
@@ -49,30 +44,13 @@ async def get_portfolio_data(id: str, db: AsyncSession):
 
 @router.get("/dashboard/stats", response_model=StatsResponse)
 async def get_stats(
-    current_user: dict = Depends(get_current_user_from_token),
+    portfolio: Optional[Portfolio] = Depends(get_current_portfolio),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get portfolio statistics for the authenticated user.
     Now reads from the latest snapshot instead of the portfolio table.
     """
-    # Get user from DB using auth0_id
-    auth0_id = current_user.get("auth0_id")
-    if not auth0_id:
-        raise HTTPException(status_code=401, detail="Invalid authentication token")
-
-    user_result = await db.execute(select(User).where(User.auth0_id == auth0_id))
-    user = user_result.scalar_one_or_none()
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found. Please sync your account first.")
-
-    # Get user's portfolio
-    portfolio_result = await db.execute(
-        select(Portfolio).where(Portfolio.user_id == user.id).limit(1)
-    )
-    portfolio = portfolio_result.scalar_one_or_none()
-
     if not portfolio:
         # Return empty stats if no portfolio yet
         return StatsResponse(
@@ -83,7 +61,7 @@ async def get_stats(
         )
 
     # Get latest snapshot for this portfolio
-    latest_snapshot = await SnapshotService.get_latest_snapshot(db, portfolio.id)
+    latest_snapshot = await SnapshotService.get_latest_snapshot(db, portfolio.id, with_positions=False)
 
     if not latest_snapshot:
         # Return empty stats if no snapshots yet
@@ -106,51 +84,205 @@ async def get_stats(
         performance={"dailyChange": daily_change, "dailyChangePercentage": daily_change_pct, "trend": trend}
     )
 
-@router.get("/transactions", response_model=HoldingsResponse)
-async def get_transactions(
-    current_user: dict = Depends(get_current_user_from_token),
+@router.get("/dashboard/chart", response_model=ChartResponse)
+async def get_chart(
+    group_by: Literal["class", "ticker", "type"] = "class",
+    top: int = Query(10, ge=1, le=50, description="Tickers shown before grouping the rest as 'Otros'"),
+    portfolio: Optional[Portfolio] = Depends(get_current_portfolio),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get holdings/positions for the authenticated user.
-    Now reads from the latest snapshot instead of the positions table.
+    Get the allocation chart of the latest snapshot.
+
+    group_by:
+    - class: equity / fixed income / cash
+    - ticker: market value per ticker (top N + "Otros")
+    - type: market value per asset type
+    """
+    # Summary values only; per-ticker totals are aggregated in SQL
+    latest_snapshot = None
+    if portfolio:
+        latest_snapshot = await SnapshotService.get_latest_snapshot(db, portfolio.id, with_positions=False)
+
+    if not latest_snapshot:
+        # Return an empty chart if no portfolio or snapshots yet
+        return ChartResponse(chartTitle=CHART_TITLES[group_by], totalValue=0.0, segments=[])
+
+    return await AllocationService.get_allocation(db, latest_snapshot, group_by=group_by, top=top)
+
+@router.get("/performance", response_model=PerformanceResponse)
+async def get_performance(
+    period: Literal["1m", "3m", "6m", "ytd", "1y", "3y", "5y", "all"] = "all",
+    portfolio: Optional[Portfolio] = Depends(get_current_portfolio),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get time-weighted and money-weighted (XIRR) returns over `period`.
+
+    Unlike total_change, these separate deposits/withdrawals from investment gains.
+    """
+    from src.services.returns import ReturnsService
+
+    if not portfolio:
+        return PerformanceResponse(period=period, snapshots=0)
+
+    return await ReturnsService.get_performance(db, portfolio.id, period)
+
+@router.get("/risk", response_model=RiskResponse)
+async def get_risk(
+    portfolio: Optional[Portfolio] = Depends(get_current_portfolio),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get risk metrics over the snapshot history: volatility (total and rolling),
+    max drawdown with dates, Sharpe/Sortino and best/worst month.
+    """
+    from src.services.risk import RiskService
+
+    if not portfolio:
+        return RiskResponse(snapshots=0)
+
+    return await RiskService.get_risk(db, portfolio.id)
+
+@router.get("/history/series", response_model=HistorySeriesResponse)
+async def get_history_series(
+    points: int = Query(200, ge=3, le=5000),
+    portfolio: Optional[Portfolio] = Depends(get_current_portfolio),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get total portfolio value over time for the history chart.
+
+    Long histories are downsampled to at most `points` points (LTTB), keeping
+    the shape of the curve: peaks, troughs and the first/last snapshot.
+    """
+    from src.services.downsample import DownsampleService
+
+    if not portfolio:
+        return HistorySeriesResponse(resolution=points, totalPoints=0)
+
+    return await DownsampleService.get_value_series(db, portfolio.id, points)
+
+@router.get("/tickers/{ticker}/history", response_model=TickerHistoryResponse)
+async def get_ticker_history(
+    ticker: str,
+    portfolio: Optional[Portfolio] = Depends(get_current_portfolio),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get one ticker's quantity, price and gain across every snapshot.
+    Returned as parallel arrays, oldest snapshot first.
+    """
+    ticker = ticker.upper()
+
+    if not portfolio:
+        return TickerHistoryResponse(ticker=ticker, count=0)
+
+    rows = await SnapshotService.get_ticker_history(db, portfolio.id, ticker)
+    if not rows:
+        return TickerHistoryResponse(ticker=ticker, count=0)
+
+    dates, security_ids, quantity, avg_cost, price, market_value, gain, gain_pct = zip(*rows)
+    security = (await SecurityService.describe(db, [security_ids[-1]])).get(security_ids[-1])
+    return TickerHistoryResponse(
+        ticker=ticker,
+        name=security.name if security else None,
+        count=len(rows),
+        dates=[d.date() for d in dates],
+        quantity=[float(v) for v in quantity],
+        avgCost=[float(v) for v in avg_cost],
+        price=[float(v) for v in price],
+        marketValue=[float(v) for v in market_value],
+        unrealizedGain=[float(v) for v in gain],
+        unrealizedGainPercent=[float(v) for v in gain_pct],
+    )
+
+@router.get("/attribution", response_model=AttributionResponse)
+async def get_attribution(
+    from_id: str,
+    to_id: str,
+    mode: Literal["pair", "range"] = "pair",
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    # Get user from DB using auth0_id
-    auth0_id = current_user.get("auth0_id")
-    if not auth0_id:
-        raise HTTPException(status_code=401, detail="Invalid authentication token")
+    Break the value change between two snapshots into per-position price effect,
+    quantity (flow) effect, new positions and closed positions.
 
-    user_result = await db.execute(select(User).where(User.auth0_id == auth0_id))
-    user = user_result.scalar_one_or_none()
+    mode=pair compares the two snapshots directly; mode=range attributes every
+    consecutive interval between them and also returns the per-interval totals.
+    """
+    from src.services.attribution import AttributionService
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found. Please sync your account first.")
+    if from_id == to_id:
+        raise HTTPException(status_code=400, detail="from_id and to_id must be different snapshots")
 
-    # Get user's portfolio
-    portfolio_result = await db.execute(
-        select(Portfolio).where(Portfolio.user_id == user.id).limit(1)
+    # Get both snapshots, restricted to the user's portfolios (ownership check)
+    snapshot_result = await db.execute(
+        select(PortfolioSnapshot)
+        .join(Portfolio, Portfolio.id == PortfolioSnapshot.portfolio_id)
+        .where(PortfolioSnapshot.id.in_([from_id, to_id]), Portfolio.user_id == user.id)
     )
-    portfolio = portfolio_result.scalar_one_or_none()
+    snapshots = {s.id: s for s in snapshot_result.scalars().all()}
+
+    if from_id not in snapshots or to_id not in snapshots:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    if snapshots[from_id].portfolio_id != snapshots[to_id].portfolio_id:
+        raise HTTPException(status_code=400, detail="Snapshots belong to different portfolios")
+
+    return await AttributionService.get_attribution(db, snapshots[from_id], snapshots[to_id], mode=mode)
+
+@router.get("/transactions", response_model=HoldingsResponse)
+async def get_transactions(
+    sort: Literal["market_value", "unrealized_gain", "unrealized_gain_percent", "quantity", "ticker", "name"] = "market_value",
+    order: Literal["asc", "desc"] = "desc",
+    asset_type: Optional[str] = None,
+    ticker: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    portfolio: Optional[Portfolio] = Depends(get_current_portfolio),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get holdings/positions for the authenticated user.
+    Now reads from the latest snapshot instead of the positions table.
 
+    Sorting (`sort`, `order`), filtering (`asset_type`, `ticker` prefix) and
+    pagination (`limit`, `offset`) run in SQL; `count` is the number of holdings
+    matching the filters. Without `limit` every matching holding is returned.
+    """
     if not portfolio:
         # Return empty list if no portfolio yet
-        return HoldingsResponse(count=0, items=[])
+        return HoldingsResponse(count=0, items=[], limit=limit, offset=offset)
+
+    # Get latest snapshot (summary only; positions are paged below)
+    latest_snapshot = await SnapshotService.get_latest_snapshot(db, portfolio.id, with_positions=False)
 
-    # Get latest snapshot with positions
-    latest_snapshot = await SnapshotService.get_latest_snapshot(db, portfolio.id)
+    if not latest_snapshot:
+        # Return empty list if no snapshots
+        return HoldingsResponse(count=0, items=[], limit=limit, offset=offset)
 
-    if not latest_snapshot or not latest_snapshot.positions:
-        # Return empty list if no snapshots or no positions
-        return HoldingsResponse(count=0, items=[])
+    positions, total = await SnapshotService.get_holdings(
+        db,
+        latest_snapshot,
+        sort=sort,
+        descending=order == "desc",
+        asset_type=asset_type,
+        ticker=ticker,
+        limit=limit,
+        offset=offset
+    )
 
-    # Convert snapshot positions to holdings format
+    # Convert snapshot positions to holdings format (name and type from the security master)
+    securities = await SecurityService.describe(db, [position.security_id for position in positions])
     items = []
-    for position in latest_snapshot.positions:
+    for position in positions:
+        security = securities.get(position.security_id)
         items.append({
             "id": str(position.id),
             "ticker": position.ticker,
-            "name": position.name,
-            "type": position.asset_type or "Stock",
+            "name": security.name if security else position.ticker,
+            "type": security.asset_class if security else "Stock",
             "details": {
                 "quantity": float(position.quantity),
                 "avgCost": float(position.avg_cost),
@@ -163,4 +295,4 @@ async def get_transactions(
             }
         })
 
-    return HoldingsResponse(count=len(items), items=items)
\ No newline at end of file
+    return HoldingsResponse(count=total, items=items, limit=limit, offset=offset)
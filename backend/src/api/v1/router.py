@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from src.api.v1 import auth, portfolio, health, users, import_data
+from src.api.v1 import auth, portfolio, health, users, import_data, admin
 
 api_router = APIRouter()
 
@@ -8,4 +8,5 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(portfolio.router, prefix="/portfolio", tags=["portfolio"])
 api_router.include_router(import_data.router, prefix="/import", tags=["import"])
-api_router.include_router(health.router, tags=["health"])
\ No newline at end of file
+api_router.include_router(health.router, tags=["health"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
\ No newline at end of file
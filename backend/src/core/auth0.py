@@ -10,7 +10,6 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from src.core.config import settings
-import httpx
 
 # Security scheme for Bearer token
 security = HTTPBearer()
@@ -29,6 +28,9 @@ async def get_auth0_public_key() -> Dict:
     if _jwks_cache is not None:
         return _jwks_cache
 
+    # httpx is only needed here; importing it lazily keeps API startup lean
+    import httpx
+
     jwks_url = f"https://{settings.AUTH0_DOMAIN}/.well-known/jwks.json"
 
     async with httpx.AsyncClient() as client:
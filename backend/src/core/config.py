@@ -21,6 +21,53 @@ class Settings(BaseSettings):
     # CORS origins - accepts comma-separated string from environment
     BACKEND_CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000,http://localhost:8000"
 
+    # Observability: request metrics middleware and GET /metrics (Prometheus text format)
+    METRICS_ENABLED: bool = True
+
+    # Per-request SQL stats (Server-Timing header + /metrics) and query budget checks.
+    # QUERY_BUDGET_MODE: "off", "warn" (log) or "raise" (fail the request) - use warn/raise in dev/test.
+    # QUERY_BUDGET / QUERY_REPEAT_LIMIT of 0 disable the corresponding check.
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_BUDGET_MODE: str = "off"
+    QUERY_BUDGET: int = 0
+    QUERY_REPEAT_LIMIT: int = 0
+    SLOW_QUERY_MS: int = 500
+
+    # Opt-in request profiler (disabled while PROFILER_TOKEN is empty).
+    # Requests sent with "X-Profile-Token: <PROFILER_TOKEN>" are profiled, rate limited per process.
+    PROFILER_TOKEN: str = ""
+    PROFILER_INTERVAL_MS: int = 5
+    PROFILER_MAX_PER_MINUTE: int = 6
+    PROFILER_DIR: str = "/tmp/financial-profiles"
+    PROFILER_KEEP: int = 50
+
+    # Server (python -m src.serve). SERVER_MODE: "single" (one process) or "multi" (worker pool)
+    SERVER_MODE: str = "single"
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: int = 0  # Workers in multi mode; 0 = one per available CPU
+    WORKER_MAX_REQUESTS: int = 1000  # Recycle a worker after this many requests (0 = never)
+    WORKER_MAX_REQUESTS_JITTER: int = 100
+    WARM_WORKERS: bool = True  # Check the app imports in the supervisor; each worker imports it and pandas/pdfplumber before serving
+    SERVER_LOOP: str = "auto"  # auto picks uvloop when installed
+    SERVER_HTTP: str = "auto"  # auto picks httptools when installed
+    GRACEFUL_TIMEOUT: int = 30
+
+    # Risk metrics (GET /portfolio/risk). Annual risk-free rate as a fraction (e.g. 0.11 for CETES 28 días)
+    RISK_FREE_RATE: float = 0.0
+    RISK_ROLLING_WINDOW: int = 12  # Snapshots (months) per rolling volatility window
+
+    # Snapshot export (GET /import/export): rows fetched and encoded per chunk
+    EXPORT_CHUNK_ROWS: int = 5000
+
+    # Snapshot position storage. SNAPSHOT_POSITION_STORAGE: "full" (every position of every snapshot)
+    # or "delta" (only positions that differ from the last full snapshot, written every N snapshots)
+    SNAPSHOT_POSITION_STORAGE: str = "full"
+    SNAPSHOT_KEYFRAME_INTERVAL: int = 12
+
+    # Yearly partitions of the snapshot tables created ahead of time (at startup), besides the current year
+    SNAPSHOT_PARTITION_YEARS_AHEAD: int = 1
+
     # Database Config
     POSTGRES_SERVER: str
     POSTGRES_USER: str
@@ -1,11 +1,21 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from src.core.config import settings
+from src.core.query_stats import install_query_instrumentation
 
 # Create engine using the URI from settings
 # echo=False disables SQL query logging for cleaner output
 engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI, echo=False)
 
+# Per-request query counting / timing (see src/core/query_stats.py)
+if settings.QUERY_STATS_ENABLED:
+    install_query_instrumentation(
+        engine.sync_engine,
+        budget=settings.QUERY_BUDGET,
+        repeat_limit=settings.QUERY_REPEAT_LIMIT,
+        mode=settings.QUERY_BUDGET_MODE,
+    )
+
 SessionLocal = sessionmaker(
     autocommit=False, 
     autoflush=False, 
@@ -0,0 +1,32 @@
+"""
+Keyset Pagination Cursors
+
+Opaque cursors for keyset ("seek") pagination: the cursor carries the sort key
+of the last row of a page, and the next page is fetched with a WHERE on that
+key instead of OFFSET, so every page costs one index range scan no matter how
+deep it is.
+
+Cursors are URL-safe base64 so clients treat them as opaque tokens.
+"""
+
+import base64
+from datetime import datetime
+from typing import Tuple
+
+SnapshotKey = Tuple[datetime, str]
+
+
+def encode_cursor(snapshot_date: datetime, row_id: str) -> str:
+    """Cursor pointing after the row with this (snapshot_date, id) key"""
+    raw = f"{snapshot_date.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SnapshotKey:
+    """(snapshot_date, id) of a cursor; raises ValueError if it was not produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        snapshot_date, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(snapshot_date), row_id
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
@@ -0,0 +1,266 @@
+"""
+Opt-In Per-Request Profiler
+
+Captures a sampled call-stack profile of a single request, e.g. to see where
+an upload spends its time inside parse_gbm_pdf, SnapshotService or response
+serialization. Profiling is enabled per request by either:
+- sending `X-Profile-Token: <PROFILER_TOKEN>` with the request, or
+- arming the next N requests under a path prefix via POST /api/v1/admin/profiling/arm
+
+While a request is profiled, a background thread samples the stacks of every
+thread of the process every PROFILER_INTERVAL_MS: the event loop and the
+worker threads (threadpool) that run the request's blocking calls. Each stack
+is rooted at its thread's name. Profiles are stored in collapsed-stack format
+("thread;frame;frame count"), which flamegraph.pl and speedscope read
+directly, and can be downloaded from /api/v1/admin/profiles.
+
+Only one request per process is profiled at a time (other requests on the
+same loop would show up in its samples) and at most PROFILER_MAX_PER_MINUTE
+profiles are taken, so a misbehaving client cannot turn it on everywhere.
+The feature is disabled while PROFILER_TOKEN is empty.
+"""
+
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config import settings
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+PROFILE_TOKEN_HEADER = b"x-profile-token"
+ADMIN_PATH_PREFIX = f"{settings.API_V1_STR}/admin"
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    # Trim site-packages / project prefixes to keep stacks readable
+    for marker in ("site-packages" + os.sep, os.sep + "src" + os.sep):
+        index = filename.rfind(marker)
+        if index != -1:
+            filename = filename[index + len(marker):]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Background thread sampling the Python stacks of all other threads at a fixed interval"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Dict[str, int] = {}  # Stack -> count, over all threads
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.ticks += 1
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                key = ";".join(reversed(stack))
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.items())
+
+
+class ProfileStore:
+    """Profiles on local disk: <id>.folded (stacks) and <id>.json (metadata)"""
+
+    def __init__(self, directory: str, keep: int):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def save(self, metadata: dict, collapsed: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = metadata["id"]
+        (self.directory / f"{profile_id}.folded").write_text(collapsed)
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(metadata))
+        self._prune()
+
+    def list(self) -> List[dict]:
+        if not self.directory.exists():
+            return []
+        entries = [json.loads(path.read_text()) for path in self.directory.glob("*.json")]
+        return sorted(entries, key=lambda entry: entry["created_at"], reverse=True)
+
+    def read(self, profile_id: str) -> Optional[str]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.folded"
+        return path.read_text() if path.exists() else None
+
+    def _prune(self) -> None:
+        metadata_files = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in metadata_files[:-self.keep] if self.keep else []:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".folded").unlink(missing_ok=True)
+
+
+class RequestProfiler:
+    """Decides which requests get profiled and enforces the rate limit"""
+
+    def __init__(self, token: str, interval_ms: int, max_per_minute: int, store: ProfileStore):
+        self.token = token
+        self.interval = interval_ms / 1000
+        self.max_per_minute = max_per_minute
+        self.store = store
+        self.armed: Dict[str, int] = {}  # path prefix -> remaining requests
+        self._recent = deque()
+        self._busy = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    def check_token(self, candidate: Optional[str]) -> bool:
+        return self.enabled and candidate is not None and secrets.compare_digest(candidate, self.token)
+
+    def arm(self, path_prefix: str, count: int) -> None:
+        with self._lock:
+            self.armed[path_prefix] = count
+
+    def disarm(self) -> None:
+        with self._lock:
+            self.armed.clear()
+
+    def wants(self, path: str, token: Optional[str]) -> bool:
+        """True if this request asked to be profiled (header) or matches an armed prefix"""
+        if not self.enabled:
+            return False
+        if token is not None:
+            return self.check_token(token)
+        with self._lock:
+            for prefix, remaining in self.armed.items():
+                if path.startswith(prefix) and remaining > 0:
+                    return True
+        return False
+
+    def acquire(self, path: str) -> bool:
+        """Reserve the profiler for one request; False when busy or rate limited"""
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if self._busy or len(self._recent) >= self.max_per_minute:
+                return False
+            self._busy = True
+            self._recent.append(now)
+            for prefix, remaining in self.armed.items():
+                if path.startswith(prefix) and remaining > 0:
+                    self.armed[prefix] = remaining - 1
+                    break
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._busy = False
+
+
+profiler = RequestProfiler(
+    token=settings.PROFILER_TOKEN,
+    interval_ms=settings.PROFILER_INTERVAL_MS,
+    max_per_minute=settings.PROFILER_MAX_PER_MINUTE,
+    store=ProfileStore(settings.PROFILER_DIR, settings.PROFILER_KEEP),
+)
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware that samples the stack while a selected request runs.
+
+    Profiled responses carry `X-Profile-Id`; requests that asked for a profile
+    but were refused (busy / rate limited) carry `X-Profile-Status: skipped`.
+    """
+
+    def __init__(self, app, request_profiler: RequestProfiler = profiler):
+        self.app = app
+        self.profiler = request_profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_TOKEN_HEADER:
+                token = value.decode("latin-1")
+                break
+
+        path = scope["path"]
+        # Admin calls carry the token too; never spend the rate limit on them
+        if path.startswith(ADMIN_PATH_PREFIX) or not self.profiler.wants(path, token):
+            await self.app(scope, receive, send)
+            return
+
+        if not self.profiler.acquire(path):
+            async def send_skipped(message):
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": [*message.get("headers", []), (b"x-profile-status", b"skipped")]}
+                await send(message)
+
+            await self.app(scope, receive, send_skipped)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        sampler = StackSampler(self.profiler.interval)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            duration = time.perf_counter() - start
+            self.profiler.release()
+            # File writes stay off the event loop
+            await run_in_threadpool(
+                self.profiler.store.save,
+                {
+                    "id": profile_id,
+                    "method": scope["method"],
+                    "path": path,
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "samples": sampler.ticks,
+                    "interval_ms": self.profiler.interval * 1000,
+                    "created_at": datetime.utcnow().isoformat(),
+                },
+                sampler.collapsed(),
+            )
@@ -0,0 +1,180 @@
+"""
+Per-Request SQL Query Statistics
+
+SQLAlchemy engine events record, for the request currently being served:
+- number of queries and total time spent in the database
+- the slowest statements
+- how many times each statement shape ran (to spot N+1 patterns)
+
+QueryStatsMiddleware exposes the numbers in a `Server-Timing` header and in
+the /metrics histograms. In development/test, QUERY_BUDGET_MODE="warn" logs
+and QUERY_BUDGET_MODE="raise" fails the request when it runs more than
+QUERY_BUDGET queries or repeats one statement shape QUERY_REPEAT_LIMIT times.
+"""
+
+import logging
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.core.metrics import REGISTRY, Histogram
+
+logger = logging.getLogger(__name__)
+
+SLOWEST_KEPT = 3
+
+DB_QUERIES_PER_REQUEST = REGISTRY.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ["method", "route"],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+))
+DB_TIME_PER_REQUEST = REGISTRY.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent in the database per HTTP request", ["method", "route"],
+))
+
+# Literals left in raw SQL (text() queries); bound parameters are already placeholders
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in QUERY_BUDGET_MODE="raise" when a request breaks its query budget"""
+
+
+@dataclass
+class QueryStats:
+    """SQL activity of a single request"""
+    count: int = 0
+    total_time: float = 0.0
+    slowest: List[Tuple[float, str]] = field(default_factory=list)
+    shapes: Dict[str, int] = field(default_factory=dict)
+    warned: bool = False
+
+    def record(self, statement: str, duration: float) -> int:
+        """Record one statement and return how many times its shape has run"""
+        self.count += 1
+        self.total_time += duration
+
+        if len(self.slowest) < SLOWEST_KEPT or duration > self.slowest[-1][0]:
+            self.slowest.append((duration, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+        shape = statement_shape(statement)
+        repeats = self.shapes.get(shape, 0) + 1
+        self.shapes[shape] = repeats
+        return repeats
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_time * 1000:.1f};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the request being served, or None outside a request"""
+    return _current.get()
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so repeats with different literals compare equal"""
+    return _LITERALS.sub("?", " ".join(statement.split()))
+
+
+def install_query_instrumentation(
+    engine: Engine,
+    budget: int = 0,
+    repeat_limit: int = 0,
+    mode: str = "off",
+) -> None:
+    """
+    Attach the timing listeners to a (sync) engine.
+
+    For an AsyncEngine pass `engine.sync_engine`. `budget` / `repeat_limit`
+    of 0 disable the corresponding check; `mode` is "off", "warn" or "raise".
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is None:
+            return
+
+        repeats = stats.record(statement, duration)
+        if mode == "off":
+            return
+
+        problem = None
+        if budget and stats.count > budget:
+            problem = f"request exceeded its query budget ({stats.count} > {budget})"
+        elif repeat_limit and repeats >= repeat_limit:
+            problem = (
+                f"statement repeated {repeats} times in one request (possible N+1): "
+                f"{statement_shape(statement)[:200]}"
+            )
+
+        if problem is None:
+            return
+        if mode == "raise":
+            raise QueryBudgetExceeded(problem)
+        if not stats.warned:
+            stats.warned = True
+            logger.warning(problem)
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(exception_context):
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that opens a QueryStats scope per request.
+
+    Adds `Server-Timing: db;dur=<ms>;desc="<n> queries"` to the response and
+    records per-route query count and DB time histograms.
+    """
+
+    def __init__(self, app, slow_query_seconds: float = 0.5):
+        self.app = app
+        self.slow_query_seconds = slow_query_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            DB_QUERIES_PER_REQUEST.observe(stats.count, method=scope["method"], route=route)
+            DB_TIME_PER_REQUEST.observe(stats.total_time, method=scope["method"], route=route)
+            if stats.slowest and stats.slowest[0][0] > self.slow_query_seconds:
+                duration, statement = stats.slowest[0]
+                logger.warning(
+                    "Slow query (%.0f ms) in %s %s: %s",
+                    duration * 1000, scope["method"], route, " ".join(statement.split())[:300],
+                )
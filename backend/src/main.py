@@ -1,7 +1,25 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from src.core.config import settings
+from src.core.metrics import REGISTRY, MetricsMiddleware
+from src.core.query_stats import QueryStatsMiddleware
+from src.core.profiling import ProfilerMiddleware
 from src.api.v1.router import api_router
+from src.services.partitions import PartitionService
+from src.services.securities import SecurityService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # In-memory security master (ticker names / asset classes), see src/services/securities.py
+    await SecurityService.load_at_startup()
+    # Yearly partitions of the snapshot tables for this year and the next ones
+    await PartitionService.ensure_upcoming()
+    yield
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -11,6 +29,7 @@ app = FastAPI(
     docs_url="/docs",
     # ReDoc location (alternative documentation)
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS Configuration
@@ -26,10 +45,28 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+# Opt-in per-request profiler (no-op unless PROFILER_TOKEN is set)
+if settings.PROFILER_TOKEN:
+    app.add_middleware(ProfilerMiddleware)
+
+# Per-request SQL stats (Server-Timing header, query budget checks)
+if settings.QUERY_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware, slow_query_seconds=settings.SLOW_QUERY_MS / 1000)
+
+# Request metrics (added last so it wraps every other middleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include API Router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.get("/")
 def root():
     """Redirects to documentation for ease of use"""
-    return {"message": "Welcome to Financial Dashboard API. Go to /docs for Swagger UI"}
\ No newline at end of file
+    return {"message": "Welcome to Financial Dashboard API. Go to /docs for Swagger UI"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint (expose it on the internal network only)"""
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
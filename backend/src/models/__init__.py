@@ -2,6 +2,7 @@
 from src.models.base import Base
 from src.models.user import User
 from src.models.portfolio import Portfolio, Position
-from src.models.snapshot import PortfolioSnapshot, SnapshotPosition, UploadHistory
+from src.models.security import Security
+from src.models.snapshot import PortfolioSnapshot, SnapshotPosition, UploadHistory, PortfolioRollup
 
-__all__ = ["Base", "User", "Portfolio", "Position", "PortfolioSnapshot", "SnapshotPosition", "UploadHistory"]
+__all__ = ["Base", "User", "Portfolio", "Position", "PortfolioSnapshot", "SnapshotPosition", "UploadHistory", "PortfolioRollup", "Security"]
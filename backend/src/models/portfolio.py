@@ -32,6 +32,9 @@ class Portfolio(Base):
     cash_balance = Column(Numeric(precision=15, scale=2), nullable=False, default=Decimal("0.00"))
     invested_value = Column(Numeric(precision=15, scale=2), nullable=False, default=Decimal("0.00"))
 
+    # Number of snapshots, maintained by SnapshotService on create/delete (history total_count)
+    snapshot_count = Column(Integer, nullable=False, default=0)
+
     # Status
     is_active = Column(Boolean, default=True)
 
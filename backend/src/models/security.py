@@ -0,0 +1,40 @@
+"""
+Security Master Model
+
+One row per traded instrument (stock, ETF, ...). Snapshot positions reference
+a security by its integer id instead of repeating its name and type on every
+row; the API resolves ids through the in-memory SecurityIndex
+(src/services/securities.py).
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Integer
+from src.models.base import Base
+
+
+class Security(Base):
+    """
+    Reference data of a ticker: display name, asset class and listing exchange.
+
+    Rows are only ever added (the first statement that mentions an unknown
+    ticker registers it), so an id never changes meaning once handed out.
+    """
+    __tablename__ = "securities"
+
+    # Primary Key (small integer: referenced by every snapshot position)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Identification
+    ticker = Column(String, unique=True, nullable=False)  # Emisora, e.g. VOO, AEROMEX
+    name = Column(String, nullable=False)
+
+    # Classification
+    asset_class = Column(String, nullable=False, default="Stock")  # Stock, ETF, Bond, etc.
+    exchange = Column(String, nullable=True)  # SIC (international) or BMV (Mexican); None if unknown
+
+    # Metadata
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<Security(id={self.id}, ticker={self.ticker}, exchange={self.exchange})>"
@@ -5,11 +5,22 @@ These models enable historical tracking of portfolio states over time:
 - PortfolioSnapshot: Captures the complete portfolio state at a specific point in time
 - SnapshotPosition: Individual position data within a snapshot
 - UploadHistory: Tracks uploaded files to prevent duplicates
+- PortfolioRollup: Pre-aggregated month/quarter/year figures of the snapshots
+
+portfolio_snapshots and snapshot_positions are range-partitioned by snapshot_date,
+one partition per year (see src/services/partitions.py). PostgreSQL requires the
+partition key in every primary key and in the referenced key of a foreign key, so
+their primary keys are (id, snapshot_date); the ORM still identifies rows by id.
+Ids stay unique because the app assigns them, not because of a constraint (a
+unique index on a partitioned table must include the partition key): snapshot
+ids are uuid4 (SnapshotService.create_snapshot), position ids come from the one
+sequence shared by every partition. Nothing may insert rows with chosen ids.
 """
 
 import hashlib
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Numeric, Integer, ForeignKey, Boolean, Text, Index
+from sqlalchemy import Column, String, DateTime, Numeric, Integer, ForeignKey, ForeignKeyConstraint, Boolean, Text, Index
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from src.models.base import Base
 
@@ -27,11 +38,11 @@ class PortfolioSnapshot(Base):
     id = Column(String, primary_key=True, index=True)  # UUID
 
     # Foreign Keys
-    portfolio_id = Column(String, ForeignKey("portfolios.id", ondelete="CASCADE"), nullable=False, index=True)
+    portfolio_id = Column(String, ForeignKey("portfolios.id", ondelete="CASCADE"), nullable=False)
     upload_id = Column(String, ForeignKey("upload_history.id", ondelete="SET NULL"), nullable=True, index=True)
 
     # Snapshot Metadata
-    snapshot_date = Column(DateTime, nullable=False, index=True)  # Statement date from PDF
+    snapshot_date = Column(DateTime, primary_key=True, index=True)  # Statement date from PDF (partition key)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Portfolio Summary Values (from RESUMEN DEL PORTAFOLIO section)
@@ -49,6 +60,15 @@ class PortfolioSnapshot(Base):
     account_holder = Column(String, nullable=True)  # From PDF metadata
     notes = Column(Text, nullable=True)  # User notes about this snapshot
 
+    # Delta position storage (see src/services/position_storage.py): when set, only positions that
+    # differ from the base (keyframe) snapshot are stored; the rest are read from the keyframe.
+    # No foreign key (it would have to carry the keyframe's date too). The app keeps it valid:
+    # a delta locks its keyframe FOR KEY SHARE while it is written (PositionStorage.plan_delta),
+    # and deleting a keyframe locks it FOR UPDATE and writes out its dependents first
+    # (SnapshotService.delete_snapshot, PositionStorage.materialize_dependents)
+    base_snapshot_id = Column(String, nullable=True, index=True)
+    removed_tickers = Column(ARRAY(String), nullable=True)  # Keyframe tickers this snapshot no longer holds
+
     # Relationships
     portfolio = relationship("Portfolio", back_populates="snapshots")
     upload = relationship("UploadHistory", back_populates="snapshot")
@@ -57,7 +77,15 @@ class PortfolioSnapshot(Base):
     # Unique constraint: One snapshot per portfolio per date
     __table_args__ = (
         Index('idx_portfolio_snapshot_date', 'portfolio_id', 'snapshot_date', unique=True),
+        # Latest snapshot and history pages in index order; summary-only reads (series, version,
+        # rollups) are index-only scans
+        Index(
+            'idx_portfolio_snapshot_summary', portfolio_id, snapshot_date.desc(), id.desc(),
+            postgresql_include=['total_value', 'equity_value', 'fixed_income_value', 'cash_value', 'created_at'],
+        ),
+        {"postgresql_partition_by": "RANGE (snapshot_date)"},
     )
+    __mapper_args__ = {"primary_key": [id]}
 
     def __repr__(self):
         return f"<PortfolioSnapshot(id={self.id}, date={self.snapshot_date}, total={self.total_value})>"
@@ -74,13 +102,17 @@ class SnapshotPosition(Base):
     # Primary Key
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
 
-    # Foreign Key
-    snapshot_id = Column(String, ForeignKey("portfolio_snapshots.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Foreign Key (with snapshot_date, see __table_args__)
+    snapshot_id = Column(String, nullable=False, index=True)
 
-    # Position Identification
+    # Denormalized from the parent snapshot so one ticker's history is a single index range scan
+    # (snapshot_date is also the partition key)
+    portfolio_id = Column(String, nullable=False)
+    snapshot_date = Column(DateTime, primary_key=True)
+
+    # Position Identification (name, asset class and exchange live in the security master)
     ticker = Column(String, nullable=False, index=True)
-    name = Column(String, nullable=False)
-    asset_type = Column(String, nullable=True, default="Stock")  # Stock, ETF, Bond, etc.
+    security_id = Column(Integer, ForeignKey("securities.id"), nullable=False)
 
     # Position Metrics
     quantity = Column(Numeric(15, 4), nullable=False)
@@ -99,13 +131,54 @@ class SnapshotPosition(Base):
     snapshot = relationship("PortfolioSnapshot", back_populates="positions")
 
     __table_args__ = (
+        ForeignKeyConstraint(
+            ['snapshot_id', 'snapshot_date'],
+            ['portfolio_snapshots.id', 'portfolio_snapshots.snapshot_date'],
+            name='snapshot_positions_snapshot_id_fkey',
+            ondelete='CASCADE',
+        ),
         Index('idx_snapshot_ticker', 'snapshot_id', 'ticker'),
+        Index('idx_position_portfolio_ticker_date', 'portfolio_id', 'ticker', 'snapshot_date'),  # Per-ticker history
+        Index('idx_position_snapshot_market_value', 'snapshot_id', 'market_value', 'id'),  # Holdings sorted by value
+        Index('idx_position_snapshot_gain', 'snapshot_id', 'unrealized_gain', 'id'),  # Holdings sorted by gain
+        {"postgresql_partition_by": "RANGE (snapshot_date)"},
     )
+    __mapper_args__ = {"primary_key": [id]}
 
     def __repr__(self):
         return f"<SnapshotPosition(ticker={self.ticker}, qty={self.quantity}, value={self.market_value})>"
 
 
+class PortfolioRollup(Base):
+    """
+    Pre-aggregated snapshot figures of one calendar period (month, quarter or year).
+
+    Maintained by SnapshotService whenever a snapshot is created or deleted, so
+    long-horizon history is read from a handful of rows instead of aggregating
+    every snapshot on each request.
+    """
+    __tablename__ = "portfolio_rollups"
+
+    # Primary Key: one row per portfolio, granularity and period
+    portfolio_id = Column(String, ForeignKey("portfolios.id", ondelete="CASCADE"), primary_key=True)
+    granularity = Column(String, primary_key=True)  # month, quarter, year
+    period_start = Column(DateTime, primary_key=True)  # First day of the period (date_trunc)
+
+    # Period Figures
+    last_snapshot_date = Column(DateTime, nullable=False)  # Date of the period-end valuation
+    snapshot_count = Column(Integer, nullable=False)
+    close_value = Column(Numeric(15, 2), nullable=False)  # total_value of the last snapshot in the period
+    min_value = Column(Numeric(15, 2), nullable=False)
+    max_value = Column(Numeric(15, 2), nullable=False)
+    period_return = Column(Numeric(12, 2), nullable=True)  # % change vs. the previous period's close
+
+    # Metadata
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<PortfolioRollup({self.granularity} {self.period_start}, close={self.close_value})>"
+
+
 class UploadHistory(Base):
     """
     Tracks uploaded statement files to prevent duplicate uploads.
@@ -116,18 +189,18 @@ class UploadHistory(Base):
     __tablename__ = "upload_history"
 
     # Primary Key
-    id = Column(String, primary_key=True, index=True)  # UUID
+    id = Column(String, primary_key=True)  # UUID
 
     # Foreign Key
-    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     # File Information
     filename = Column(String, nullable=False)
-    file_hash = Column(String(64), nullable=False, index=True)  # SHA256 hash of file content
+    file_hash = Column(String(64), nullable=False)  # SHA256 hash of file content
     file_size_bytes = Column(Integer, nullable=False)
 
     # Statement Information
-    statement_date = Column(DateTime, nullable=False, index=True)  # Extracted from PDF
+    statement_date = Column(DateTime, nullable=False)  # Extracted from PDF
     account_holder = Column(String, nullable=True)
 
     # Upload Metadata
@@ -142,7 +215,7 @@ class UploadHistory(Base):
     user = relationship("User", back_populates="uploads")
     snapshot = relationship("PortfolioSnapshot", back_populates="upload", uselist=False)
 
-    # Unique constraints
+    # Unique constraints (lookups always filter by user_id, so no single-column indexes)
     __table_args__ = (
         Index('idx_user_file_hash', 'user_id', 'file_hash', unique=True),  # Prevent same file twice
         Index('idx_user_statement_date', 'user_id', 'statement_date'),  # Fast date lookups
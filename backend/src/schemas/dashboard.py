@@ -1,4 +1,5 @@
-from typing import List, Literal
+from datetime import date
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 
 class FinancialValue(BaseModel):
@@ -24,4 +25,112 @@ class HoldingItem(BaseModel):
     details: dict; financials: dict
 
 class HoldingsResponse(BaseModel):
-    count: int; items: List[HoldingItem]
\ No newline at end of file
+    count: int; items: List[HoldingItem]  # count: all holdings matching the filters, not just this page
+    limit: Optional[int] = None; offset: int = 0  # limit None: every holding
+
+class ReturnFigures(BaseModel):
+    cumulative: Optional[float] = None  # % over the period
+    annualized: Optional[float] = None  # % per year; only for periods of a year or more
+
+class PerformanceResponse(BaseModel):
+    period: str
+    startDate: Optional[date] = None
+    endDate: Optional[date] = None
+    snapshots: int
+    startValue: float = 0.0
+    endValue: float = 0.0
+    netContributions: float = 0.0  # Estimated deposits minus withdrawals
+    investmentGain: float = 0.0  # Value change not explained by contributions
+    timeWeighted: ReturnFigures = ReturnFigures()
+    moneyWeighted: ReturnFigures = ReturnFigures()
+
+class DrawdownInfo(BaseModel):
+    value: Optional[float] = None  # % (negative)
+    peakDate: Optional[date] = None
+    troughDate: Optional[date] = None
+    recoveryDate: Optional[date] = None  # None while still below the previous peak
+
+class MonthReturn(BaseModel):
+    date: date
+    value: float  # %
+
+class RollingSeries(BaseModel):
+    window: int
+    dates: List[date] = []
+    values: List[float] = []  # Annualized volatility %
+
+class RiskResponse(BaseModel):
+    snapshots: int
+    asOf: Optional[date] = None
+    riskFreeRate: Optional[float] = None  # Annual %
+    volatility: Optional[float] = None  # Annualized %
+    sharpeRatio: Optional[float] = None
+    sortinoRatio: Optional[float] = None
+    maxDrawdown: DrawdownInfo = DrawdownInfo()
+    currentDrawdown: Optional[float] = None  # %
+    bestMonth: Optional[MonthReturn] = None
+    worstMonth: Optional[MonthReturn] = None
+    rollingVolatility: Optional[RollingSeries] = None
+
+class TickerHistoryResponse(BaseModel):
+    """One ticker across snapshots as parallel arrays (index i = snapshot i, oldest first)"""
+    ticker: str
+    name: Optional[str] = None
+    count: int
+    dates: List[date] = []
+    quantity: List[float] = []
+    avgCost: List[float] = []
+    price: List[float] = []
+    marketValue: List[float] = []
+    unrealizedGain: List[float] = []
+    unrealizedGainPercent: List[float] = []
+
+class HistoryPoint(BaseModel):
+    date: date
+    value: float
+
+class HistorySeriesResponse(BaseModel):
+    """total_value over snapshot_date, downsampled to at most `resolution` points (oldest first)"""
+    resolution: int
+    totalPoints: int  # Snapshots before downsampling
+    points: List[HistoryPoint] = []
+
+class PositionAttribution(BaseModel):
+    ticker: str
+    name: str
+    priceEffect: float  # Quantity held before x price change
+    quantityEffect: float  # Shares bought/sold x new price
+    newPositionEffect: float
+    closedPositionEffect: float
+    totalEffect: float
+    contributionPercent: Optional[float] = None  # totalEffect as % of the starting portfolio value
+
+class AttributionInterval(BaseModel):
+    fromDate: date
+    toDate: date
+    priceEffect: float
+    quantityEffect: float
+    newPositionsEffect: float
+    closedPositionsEffect: float
+    fixedIncomeChange: float
+    cashChange: float
+    residual: float  # Equity change not explained by the listed positions
+    totalChange: float
+
+class AttributionResponse(BaseModel):
+    mode: str  # "pair" or "range"
+    fromDate: date
+    toDate: date
+    snapshots: int
+    startValue: float
+    endValue: float
+    totalChange: float
+    priceEffect: float
+    quantityEffect: float
+    newPositionsEffect: float
+    closedPositionsEffect: float
+    fixedIncomeChange: float
+    cashChange: float
+    residual: float
+    positions: List[PositionAttribution]
+    intervals: List[AttributionInterval]
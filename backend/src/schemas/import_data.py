@@ -7,6 +7,7 @@ class PositionBreakdown(BaseModel):
     """Individual position in the portfolio"""
     ticker: str
     name: str
+    exchange: Optional[str] = None  # SIC or BMV (statement section the position was listed in)
     quantity: int
     avg_cost: float
     current_price: float
@@ -95,10 +96,59 @@ class SnapshotDetailResponse(BaseModel):
         from_attributes = True
 
 
+class PeriodSummary(BaseModel):
+    """Pre-aggregated month/quarter/year figures for long-horizon history"""
+    granularity: str  # "month", "quarter", "year"
+    period_start: datetime
+    last_snapshot_date: datetime
+    snapshot_count: int
+    close_value: float
+    min_value: float
+    max_value: float
+    period_return: Optional[float] = None  # % vs. previous period's close
+
+    class Config:
+        from_attributes = True
+
+
 class SnapshotHistoryResponse(BaseModel):
-    """Response containing list of historical snapshots"""
+    """Response containing list of historical snapshots (or periods when a granularity is requested)"""
     snapshots: List[SnapshotSummary]
-    total_count: int
+    total_count: int  # All snapshots of the portfolio (all periods when a granularity is requested)
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next (older) page
+    has_more: bool = False
+    granularity: Optional[str] = None
+    periods: List[PeriodSummary] = []
+
+
+class PositionChange(BaseModel):
+    """One position that differs between two snapshots"""
+    ticker: str
+    name: str
+    change_type: str  # "new", "closed", "changed"
+    quantity_before: Optional[float] = None
+    quantity_after: Optional[float] = None
+    quantity_change: float
+    price_before: Optional[float] = None
+    price_after: Optional[float] = None
+    price_change: Optional[float] = None
+    price_change_percent: Optional[float] = None
+    market_value_before: Optional[float] = None
+    market_value_after: Optional[float] = None
+    market_value_change: float
+
+
+class SnapshotDiffResponse(BaseModel):
+    """Changed positions between two snapshots (unchanged positions are omitted)"""
+    from_snapshot_id: str
+    to_snapshot_id: str
+    from_date: datetime
+    to_date: datetime
+    total_value_change: float
+    new_positions: int
+    closed_positions: int
+    changed_positions: int
+    changes: List[PositionChange]
 
 
 class FileUploadResult(BaseModel):
@@ -0,0 +1,172 @@
+"""
+Production Server Entry Point
+
+    python -m src.serve
+
+SERVER_MODE="single" runs one uvicorn process (the previous behaviour).
+SERVER_MODE="multi" binds the socket once and runs several uvicorn worker
+processes behind a small supervisor that:
+- sizes the pool from the CPUs available to this process (WEB_CONCURRENCY=0)
+- checks that the app imports before spawning workers, and has each worker
+  import the app and the heavy parse modules before it accepts traffic
+  (WARM_WORKERS). Workers are spawned, not forked: nothing is shared with
+  the supervisor, each worker pays its own imports and memory
+- recycles each worker after WORKER_MAX_REQUESTS (+ random jitter) requests to
+  contain pandas/pdfplumber memory growth, and restarts any worker that exits
+
+uvicorn picks uvloop and httptools automatically when they are installed
+(SERVER_LOOP / SERVER_HTTP = "auto").
+"""
+
+import argparse
+import importlib
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from typing import List, Optional
+
+import uvicorn
+
+from src.core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+# Workers that die faster than this are considered crash-looping and restarted with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+multiprocessing.allow_connection_pickling()
+spawn = multiprocessing.get_context("spawn")
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects affinity / cpusets in containers)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    return settings.WEB_CONCURRENCY if settings.WEB_CONCURRENCY > 0 else available_cpus()
+
+
+def warm_up() -> None:
+    """Import the modules the first upload would otherwise pay for"""
+    for module in ("pandas", "pdfplumber"):
+        importlib.import_module(module)
+
+
+def _run_worker(options: dict, sockets: list, warm: bool) -> None:
+    """Entry point of a worker process"""
+    config = uvicorn.Config(**options)
+    config.configure_logging()
+    if warm:
+        config.load()
+        warm_up()
+    uvicorn.Server(config).run(sockets=sockets)
+
+
+class Supervisor:
+    """Keeps `workers` uvicorn processes serving one shared socket"""
+
+    def __init__(self, options: dict, workers: int, max_requests: int, jitter: int, warm: bool):
+        self.options = options
+        self.workers = workers
+        self.max_requests = max_requests
+        self.jitter = jitter
+        self.warm = warm
+        self.should_exit = threading.Event()
+        self.processes: List[multiprocessing.process.BaseProcess] = []
+        self.started_at: List[float] = []
+
+    def _spawn(self, sockets: list):
+        options = dict(self.options)
+        if self.max_requests:
+            # Jitter keeps workers from recycling at the same moment
+            options["limit_max_requests"] = self.max_requests + random.randint(0, self.jitter)
+        process = spawn.Process(target=_run_worker, args=(options, sockets, self.warm))
+        process.start()
+        return process
+
+    def _handle_signal(self, signum, frame) -> None:
+        self.should_exit.set()
+
+    def run(self) -> None:
+        config = uvicorn.Config(**self.options)
+        config.configure_logging()
+        if self.warm:
+            # Fail fast in the parent instead of crash-looping every worker
+            config.load()
+        sock = config.bind_socket()
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self._handle_signal)
+
+        logger.info("Starting %d workers (pid %d)", self.workers, os.getpid())
+        for _ in range(self.workers):
+            self.processes.append(self._spawn([sock]))
+            self.started_at.append(time.monotonic())
+
+        while not self.should_exit.wait(0.5):
+            for index, process in enumerate(self.processes):
+                if process.is_alive():
+                    continue
+                process.join()
+                lifetime = time.monotonic() - self.started_at[index]
+                logger.info("Worker %s exited with code %s, restarting", process.pid, process.exitcode)
+                if lifetime < MIN_WORKER_LIFETIME:
+                    time.sleep(MIN_WORKER_LIFETIME)
+                self.processes[index] = self._spawn([sock])
+                self.started_at[index] = time.monotonic()
+
+        logger.info("Shutting down %d workers", len(self.processes))
+        for process in self.processes:
+            process.terminate()
+        deadline = time.monotonic() + settings.GRACEFUL_TIMEOUT
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+        sock.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the API server")
+    parser.add_argument("--app", default="src.main:app", help="ASGI app import string")
+    parser.add_argument("--mode", choices=["single", "multi"], default=settings.SERVER_MODE)
+    parser.add_argument("--workers", type=int, help="Override the worker count in multi mode")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    args = parser.parse_args(argv)
+
+    options = {
+        "app": args.app,
+        "host": args.host,
+        "port": args.port,
+        "loop": settings.SERVER_LOOP,
+        "http": settings.SERVER_HTTP,
+        "timeout_graceful_shutdown": settings.GRACEFUL_TIMEOUT,
+        "proxy_headers": True,
+    }
+
+    if args.mode == "single":
+        uvicorn.run(**options)
+        return 0
+
+    Supervisor(
+        options,
+        workers=args.workers or worker_count(),
+        max_requests=settings.WORKER_MAX_REQUESTS,
+        jitter=settings.WORKER_MAX_REQUESTS_JITTER,
+        warm=settings.WARM_WORKERS,
+    ).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Portfolio Allocation Service
+
+Breaks a snapshot down into chart segments:
+- class: equity / fixed income / cash, from the snapshot summary values
+- ticker: market value per ticker (largest `top` tickers, the rest as "Otros")
+- type: market value per asset class (from the security master)
+
+Per-ticker and per-type totals come from one GROUP BY over snapshot_positions,
+so positions are never loaded into Python. Snapshots do not change once
+created, so each breakdown is cached per (snapshot_id, group_by, top).
+"""
+
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import LRUCache
+from src.models.security import Security
+from src.models.snapshot import PortfolioSnapshot
+from src.schemas.dashboard import ChartResponse, ChartSegment
+from src.services.position_storage import positions_of
+
+GROUP_BY_OPTIONS = ("class", "ticker", "type")
+
+# Matches the --color-chart-N variables of the frontend theme
+CHART_COLORS = [f"var(--color-chart-{i})" for i in range(1, 5)]
+
+CHART_TITLES = {
+    "class": "Distribución por clase de activo",
+    "ticker": "Distribución por emisora",
+    "type": "Distribución por tipo de activo",
+}
+
+OTHERS_LABEL = "Otros"
+
+allocation_cache = LRUCache("allocation", maxsize=2048)
+
+
+def build_chart(title: str, groups: List[Tuple[str, str, float]], top: Optional[int] = None) -> ChartResponse:
+    """
+    Turn (id, label, value) groups into chart segments with percentages.
+
+    Groups are expected largest first; with `top`, everything after the first
+    `top` groups is folded into a single "Otros" segment. Empty groups are dropped.
+    """
+    groups = [group for group in groups if group[2] > 0]
+    if top is not None and len(groups) > top:
+        rest = sum(value for _, _, value in groups[top:])
+        groups = groups[:top] + [("others", OTHERS_LABEL, rest)]
+
+    total = sum(value for _, _, value in groups)
+    segments = [
+        ChartSegment(
+            id=segment_id,
+            label=label,
+            value=round(value, 2),
+            percentage=round(value / total * 100, 2) if total else 0.0,
+            color=CHART_COLORS[index % len(CHART_COLORS)],
+        )
+        for index, (segment_id, label, value) in enumerate(groups)
+    ]
+    return ChartResponse(chartTitle=title, totalValue=round(total, 2), segments=segments)
+
+
+class AllocationService:
+    """Allocation breakdowns of a portfolio snapshot"""
+
+    @staticmethod
+    async def get_allocation(
+        db: AsyncSession,
+        snapshot: PortfolioSnapshot,
+        group_by: str = "class",
+        top: int = 10
+    ) -> ChartResponse:
+        """Allocation chart of `snapshot` grouped by asset class, ticker or asset type"""
+        if group_by not in GROUP_BY_OPTIONS:
+            raise ValueError(f"group_by must be one of {GROUP_BY_OPTIONS}")
+
+        key = (snapshot.id, group_by, top if group_by == "ticker" else None)
+        cached = allocation_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if group_by == "class":
+            # The statement summary already holds the per-class totals
+            chart = build_chart(CHART_TITLES["class"], sorted([
+                ("equity", "Renta Variable", float(snapshot.equity_value)),
+                ("fixed_income", "Deuda", float(snapshot.fixed_income_value)),
+                ("cash", "Efectivo", float(snapshot.cash_value)),
+            ], key=lambda group: group[2], reverse=True))
+        else:
+            positions = positions_of(snapshot)
+            column = positions.ticker if group_by == "ticker" else Security.asset_class
+            value = func.sum(positions.market_value)
+            query = select(column, value)
+            if group_by != "ticker":
+                query = query.join(Security, Security.id == positions.security_id)
+            result = await db.execute(
+                query
+                .where(positions.snapshot_id == snapshot.id, positions.snapshot_date == snapshot.snapshot_date)
+                .group_by(column)
+                .order_by(value.desc())
+            )
+            groups = [(str(label), str(label), float(total)) for label, total in result.all()]
+            chart = build_chart(CHART_TITLES[group_by], groups, top=top if group_by == "ticker" else None)
+
+        allocation_cache.set(key, chart)
+        return chart
@@ -1,17 +1,21 @@
-import pandas as pd
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert
 from src.models.portfolio import Portfolio, Position
 from src.schemas.dashboard import StatsResponse, ChartResponse, HoldingsResponse, ChartSegment, HoldingItem
 
 class PortfolioAnalytics:
     def __init__(self, raw_data: dict):
+        # pandas is imported on first use so API replicas that only serve reads never load it
+        import pandas as pd
+
         self.cash = float(raw_data.get("efectivo", 0))
         self.positions = raw_data.get("posiciones", [])
         self.df = pd.DataFrame(self.positions)
         self._standardize_df()
 
     def _standardize_df(self):
+        import numpy as np
+
         map_cols = {
             "emisora": "ticker", "descripcion": "name", "titulos": "qty",
             "costo_promedio": "avg_cost", "ultimo_precio": "price", "valor_mercado": "value"
@@ -19,11 +23,23 @@ class PortfolioAnalytics:
         self.df.rename(columns=map_cols, inplace=True)
         if "value" not in self.df.columns:
             self.df["value"] = self.df["qty"] * self.df["price"]
-        self.df["type"] = self.df["name"].apply(lambda x: "ETF" if "VANGUARD" in x.upper() else "Stock")
+        is_etf = self.df["name"].str.contains("VANGUARD", case=False, regex=False, na=False)
+        self.df["type"] = np.where(is_etf, "ETF", "Stock")
+
+    def position_rows(self, portfolio_id: str) -> list:
+        """Position insert parameters built column-wise from the DataFrame"""
+        columns = {
+            "ticker": "ticker", "name": "name", "asset_type": "type", "quantity": "qty",
+            "avg_cost": "avg_cost", "current_price": "price", "market_value": "value",
+        }
+        # .tolist() converts numpy scalars to native Python values the DB driver accepts
+        arrays = {field: self.df[col].tolist() for field, col in columns.items()}
+        arrays["portfolio_id"] = [portfolio_id] * len(self.df)
+        return [dict(zip(arrays, values)) for values in zip(*arrays.values())]
 
     async def save_to_db(self, db: AsyncSession, user_id: str) -> str:
         """Save portfolio data to database. Requires user_id for multi-tenancy."""
-        invested = self.df["value"].sum()
+        invested = float(self.df["value"].sum())
         portfolio = Portfolio(
             user_id=user_id,
             name="Mi Portafolio",
@@ -34,17 +50,9 @@ class PortfolioAnalytics:
         db.add(portfolio)
         await db.flush()
         
-        for _, row in self.df.iterrows():
-            db.add(Position(
-                portfolio_id=portfolio.id,
-                ticker=row["ticker"],
-                name=row["name"],
-                asset_type=row["type"],
-                quantity=row["qty"],
-                avg_cost=row["avg_cost"],
-                current_price=row["price"],
-                market_value=row["value"]
-            ))
+        # One executemany for every position instead of one ORM object per row
+        if len(self.df):
+            await db.execute(insert(Position), self.position_rows(portfolio.id))
         await db.commit()
         return portfolio.id
 
@@ -0,0 +1,169 @@
+"""
+Return Attribution
+
+Explains the change in portfolio value between snapshots, per position:
+- price effect: quantity held before x price change          q0 * (p1 - p0)
+- quantity (flow) effect: shares bought/sold x new price      (q1 - q0) * p1
+- new positions: full market value of tickers that appeared
+- closed positions: minus the last market value of tickers that disappeared
+
+For a position held in both snapshots the two effects add up exactly to its
+market value change. Fixed income and cash changes come from the snapshot
+summaries, and whatever the statement's equity total does not explain through
+the positions is reported as `residual`, so all parts sum to the total change.
+
+Positions come from the cached columnar PositionHistory of the portfolio
+(snapshot_series), sliced without copying for the snapshots involved, and are
+laid out as dense (ticker x snapshot) matrices. Range mode attributes every
+consecutive interval between two snapshots at once with array arithmetic,
+instead of running N pairwise diffs.
+"""
+
+from datetime import date
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.snapshot import PortfolioSnapshot
+from src.schemas.dashboard import AttributionInterval, AttributionResponse, PositionAttribution
+from src.services.snapshot_series import PositionHistory, SnapshotSeries, get_position_history
+
+
+def _money(value) -> float:
+    return round(float(value), 2)
+
+
+class PositionMatrix:
+    """quantity / price / value per (ticker, snapshot), NaN where a ticker is not held"""
+
+    def __init__(self, series: SnapshotSeries, history: PositionHistory, columns: np.ndarray):
+        # Summary values of the chosen snapshots (indices into the series, in attribution order)
+        self.dates = series.dates[columns]
+        self.total, self.equity = series.total[columns], series.equity[columns]
+        self.fixed_income, self.cash = series.fixed_income[columns], series.cash[columns]
+
+        offsets = history.offsets
+        counts = offsets[columns + 1] - offsets[columns]
+        if len(columns) > 1 and np.all(np.diff(columns) == 1):
+            # Consecutive snapshots (range mode): one zero-copy slice of the columns
+            rows = history.rows_of(int(columns[0]), int(columns[-1]))
+        else:
+            rows = np.concatenate([np.arange(offsets[c], offsets[c + 1]) for c in columns])
+        codes = history.column("ticker_codes")[rows]
+        snapshot_index = np.repeat(np.arange(len(columns)), counts)
+
+        # Tickers present, in alphabetical order
+        present, ticker_index = np.unique(codes, return_inverse=True)
+        tickers = np.array([history.tickers[c] for c in present], dtype=object)
+        order = np.argsort(tickers, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        ticker_index = rank[ticker_index]
+        self.tickers = tickers[order]
+        self.names = [history.names[c] for c in present[order]]
+
+        shape = (len(self.tickers), len(columns))
+        cells = (ticker_index, snapshot_index)
+        self.quantity = np.full(shape, np.nan)
+        self.price = np.full(shape, np.nan)
+        self.value = np.full(shape, np.nan)
+        self.quantity[cells] = history.column("quantity")[rows]
+        self.price[cells] = history.column("price")[rows]
+        self.value[cells] = history.column("value")[rows]
+
+
+def attribute(matrix: PositionMatrix, mode: str) -> AttributionResponse:
+    """Attribution over every consecutive interval of the matrix's snapshots"""
+    dates = [d.astype(date) for d in matrix.dates]
+    q0, q1 = matrix.quantity[:, :-1], matrix.quantity[:, 1:]
+    p0, p1 = matrix.price[:, :-1], matrix.price[:, 1:]
+    v0, v1 = matrix.value[:, :-1], matrix.value[:, 1:]
+    held_before, held_after = ~np.isnan(q0), ~np.isnan(q1)
+    held = held_before & held_after
+
+    # (ticker x interval) effect matrices
+    price_effect = np.where(held, q0 * (p1 - p0), 0.0)
+    quantity_effect = np.where(held, (q1 - q0) * p1, 0.0)
+    new_effect = np.where(~held_before & held_after, v1, 0.0)
+    closed_effect = np.where(held_before & ~held_after, -v0, 0.0)
+    position_effect = price_effect + quantity_effect + new_effect + closed_effect
+
+    total, equity = matrix.total, matrix.equity
+    fixed_income, cash = matrix.fixed_income, matrix.cash
+    start_value = total[0]
+
+    intervals = [
+        AttributionInterval(
+            fromDate=dates[i],
+            toDate=dates[i + 1],
+            priceEffect=_money(price_effect[:, i].sum()),
+            quantityEffect=_money(quantity_effect[:, i].sum()),
+            newPositionsEffect=_money(new_effect[:, i].sum()),
+            closedPositionsEffect=_money(closed_effect[:, i].sum()),
+            fixedIncomeChange=_money(fixed_income[i + 1] - fixed_income[i]),
+            cashChange=_money(cash[i + 1] - cash[i]),
+            residual=_money(equity[i + 1] - equity[i] - position_effect[:, i].sum()),
+            totalChange=_money(total[i + 1] - total[i]),
+        )
+        for i in range(len(dates) - 1)
+    ]
+
+    per_ticker = position_effect.sum(axis=1)
+    order = np.argsort(-np.abs(per_ticker), kind="stable")
+    positions = [
+        PositionAttribution(
+            ticker=str(matrix.tickers[t]),
+            name=matrix.names[t],
+            priceEffect=_money(price_effect[t].sum()),
+            quantityEffect=_money(quantity_effect[t].sum()),
+            newPositionEffect=_money(new_effect[t].sum()),
+            closedPositionEffect=_money(closed_effect[t].sum()),
+            totalEffect=_money(per_ticker[t]),
+            contributionPercent=round(float(per_ticker[t] / start_value * 100), 4) if start_value else None,
+        )
+        for t in order
+        if per_ticker[t] != 0 or price_effect[t].any() or quantity_effect[t].any()
+    ]
+
+    return AttributionResponse(
+        mode=mode,
+        fromDate=dates[0],
+        toDate=dates[-1],
+        snapshots=len(dates),
+        startValue=_money(start_value),
+        endValue=_money(total[-1]),
+        totalChange=_money(total[-1] - start_value),
+        priceEffect=_money(price_effect.sum()),
+        quantityEffect=_money(quantity_effect.sum()),
+        newPositionsEffect=_money(new_effect.sum()),
+        closedPositionsEffect=_money(closed_effect.sum()),
+        fixedIncomeChange=_money(fixed_income[-1] - fixed_income[0]),
+        cashChange=_money(cash[-1] - cash[0]),
+        residual=_money((equity[-1] - equity[0]) - position_effect.sum()),
+        positions=positions,
+        intervals=intervals,
+    )
+
+
+class AttributionService:
+    """Loads the snapshots of a pair or range and attributes the value change"""
+
+    @staticmethod
+    async def get_attribution(
+        db: AsyncSession,
+        from_snapshot: PortfolioSnapshot,
+        to_snapshot: PortfolioSnapshot,
+        mode: str = "pair"
+    ) -> AttributionResponse:
+        """
+        mode="pair": compare the two snapshots directly.
+        mode="range": attribute each consecutive interval between them (inclusive) and sum.
+        """
+        series, history = await get_position_history(db, from_snapshot.portfolio_id)
+        position = {snapshot_id: i for i, snapshot_id in enumerate(series.ids)}
+        first, last = position[from_snapshot.id], position[to_snapshot.id]
+        if mode == "range":
+            columns = np.arange(min(first, last), max(first, last) + 1)
+        else:
+            columns = np.array([first, last])
+        return attribute(PositionMatrix(series, history, columns), mode)
@@ -0,0 +1,76 @@
+"""
+History Downsampling
+
+Shape-preserving downsampling of the portfolio value history for charts,
+with Largest-Triangle-Three-Buckets (LTTB): the first and last snapshots are
+always kept, the rest are split into equal buckets, and from each bucket the
+point forming the largest triangle with the previously kept point and the
+average of the next bucket is chosen. Peaks and troughs survive, flat
+stretches collapse.
+
+Bucket bounds and next-bucket averages are computed with array operations up
+front; the per-bucket pass only runs an argmax over that bucket's slice, so
+the whole downsample is O(n). Results are memoized per (portfolio, portfolio
+version, resolution).
+"""
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import LRUCache
+from src.schemas.dashboard import HistoryPoint, HistorySeriesResponse
+from src.services.snapshot_series import get_snapshot_series
+
+downsample_cache = LRUCache("history_downsample", maxsize=2048)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the `threshold` points LTTB keeps from (x, y); every index when there are fewer points"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket i covers points [edges[i], edges[i + 1]); first and last points are their own buckets
+    buckets = threshold - 2
+    edges = (np.arange(buckets + 1) * (n - 2) // buckets + 1).astype(np.intp)
+    counts = np.diff(edges)
+    average_x = np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts
+    average_y = np.add.reduceat(y[1:-1], edges[:-1] - 1) / counts
+    # Third triangle vertex of bucket i: average of bucket i + 1 (the last point for the final bucket)
+    next_x = np.append(average_x[1:], x[-1])
+    next_y = np.append(average_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(buckets):
+        start, end = edges[i], edges[i + 1]
+        px, py = x[previous], y[previous]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((px - next_x[i]) * (y[start:end] - py) - (px - x[start:end]) * (next_y[i] - py))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+class DownsampleService:
+    """Memoized, downsampled value history of a portfolio"""
+
+    @staticmethod
+    async def get_value_series(db: AsyncSession, portfolio_id: str, resolution: int) -> HistorySeriesResponse:
+        series = await get_snapshot_series(db, portfolio_id)
+        key = (portfolio_id, series.version, resolution)
+        response = downsample_cache.get(key)
+        if response is None:
+            days = series.dates.astype(np.int64).astype(np.float64)
+            keep = lttb(days, series.total, resolution)
+            response = HistorySeriesResponse(
+                resolution=resolution,
+                totalPoints=len(series),
+                points=[
+                    HistoryPoint(date=day, value=round(value, 2))
+                    for day, value in zip(series.dates[keep].tolist(), series.total[keep].tolist())
+                ],
+            )
+            downsample_cache.set(key, response)
+        return response
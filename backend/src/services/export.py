@@ -0,0 +1,180 @@
+"""
+Snapshot History Export
+
+Streams every snapshot of a portfolio joined with its positions (one row per
+position; snapshots without positions appear once with empty position
+columns) as CSV, NDJSON or Parquet.
+
+Rows are read through a server-side cursor in chunks of EXPORT_CHUNK_ROWS and
+each chunk is encoded and handed to the response as soon as it arrives, so
+memory stays flat no matter how many rows the export has. Parquet (pyarrow,
+imported on first use) writes one row group per chunk.
+
+The stream opens its own session: the request's session (get_db) is closed
+before a streaming response body is sent.
+"""
+
+import csv
+import io
+import json
+from typing import AsyncIterator, List, Sequence
+
+from sqlalchemy import Date, and_, cast, select
+
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.models.security import Security
+from src.models.snapshot import PortfolioSnapshot
+from src.services.position_storage import effective_positions
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+EXPORT_COLUMNS = [
+    "snapshot_id", "snapshot_date", "total_value", "equity_value", "fixed_income_value", "cash_value",
+    "ticker", "name", "asset_type", "quantity", "avg_cost", "current_price", "market_value",
+    "unrealized_gain", "unrealized_gain_percent",
+]
+
+# Columns after snapshot_date are Numeric (Decimal) unless listed here
+_TEXT_COLUMNS = {"snapshot_id", "ticker", "name", "asset_type"}
+
+
+def export_query(portfolio_id: str):
+    """Snapshots joined with their (effective) positions, oldest snapshot first"""
+    positions = effective_positions()
+    return (
+        select(
+            PortfolioSnapshot.id,
+            cast(PortfolioSnapshot.snapshot_date, Date),
+            PortfolioSnapshot.total_value,
+            PortfolioSnapshot.equity_value,
+            PortfolioSnapshot.fixed_income_value,
+            PortfolioSnapshot.cash_value,
+            positions.ticker,
+            Security.name,
+            Security.asset_class,
+            positions.quantity,
+            positions.avg_cost,
+            positions.current_price,
+            positions.market_value,
+            positions.unrealized_gain,
+            positions.unrealized_gain_percent,
+        )
+        # portfolio_id repeated on the position side so it is pushed into both branches of the union
+        .outerjoin(positions, and_(
+            positions.snapshot_id == PortfolioSnapshot.id,
+            positions.snapshot_date == PortfolioSnapshot.snapshot_date,
+            positions.portfolio_id == portfolio_id,
+        ))
+        .outerjoin(Security, Security.id == positions.security_id)
+        .where(PortfolioSnapshot.portfolio_id == portfolio_id)
+        .order_by(PortfolioSnapshot.snapshot_date, PortfolioSnapshot.id, positions.id)
+    )
+
+
+async def stream_chunks(portfolio_id: str, chunk_rows: int) -> AsyncIterator[Sequence[tuple]]:
+    """Export rows in chunks of `chunk_rows`, read through a server-side cursor"""
+    async with SessionLocal() as db:
+        result = await db.stream(export_query(portfolio_id).execution_options(yield_per=chunk_rows))
+        async for chunk in result.partitions():
+            yield [tuple(row) for row in chunk]
+
+
+async def encode_csv(chunks: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _json_value(value):
+    # Decimal -> float like the rest of the API, date -> ISO string
+    if value is None or isinstance(value, str):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return float(value)
+
+
+async def encode_ndjson(chunks: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        lines = [
+            json.dumps(dict(zip(EXPORT_COLUMNS, map(_json_value, row))), ensure_ascii=False)
+            for row in chunk
+        ]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands its bytes back after each row group (tell() keeps counting)"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def encode_parquet(chunks: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def numeric(scale: int) -> "pa.DataType":
+        return pa.decimal128(15, scale)
+
+    types = {name: pa.string() for name in _TEXT_COLUMNS}
+    types.update({
+        "snapshot_date": pa.date32(),
+        "quantity": numeric(4),
+        "unrealized_gain_percent": pa.decimal128(8, 2),
+    })
+    schema = pa.schema([(name, types.get(name, numeric(2))) for name in EXPORT_COLUMNS])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        async for chunk in chunks:
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+_ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson, "parquet": encode_parquet}
+
+
+def export_snapshots(portfolio_id: str, export_format: str) -> AsyncIterator[bytes]:
+    """Byte stream of the portfolio's snapshot history in `export_format`"""
+    return _ENCODERS[export_format](stream_chunks(portfolio_id, settings.EXPORT_CHUNK_ROWS))
@@ -1,5 +1,4 @@
 import json
-import pandas as pd
 from fastapi import UploadFile, HTTPException
 
 class PortfolioParser:
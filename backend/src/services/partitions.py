@@ -0,0 +1,114 @@
+"""
+Snapshot Table Partitions
+
+portfolio_snapshots and snapshot_positions are range-partitioned by
+snapshot_date with one partition per calendar year (<table>_y<year>), so:
+- queries bounded by date (history pages, rollup refreshes, a known snapshot's
+  positions) only touch the partitions of those years
+- get_latest_snapshot reads partitions newest first and stops at the first row
+- indexes and vacuum work per year instead of on one ever-growing heap
+
+There is no default partition: a row for a year without a partition is an
+error. Partitions are created
+- at startup, for the current year and SNAPSHOT_PARTITION_YEARS_AHEAD more
+- on demand by SnapshotService.create_snapshot, for statements of other years
+  (old statements uploaded late)
+
+CREATE TABLE ... PARTITION OF locks the parent table exclusively, so it runs
+in its own short transaction (never inside a request's transaction, which may
+already hold locks on the parent), serialized across workers by an advisory
+lock and bounded by a lock timeout.
+"""
+
+import logging
+import re
+from datetime import datetime
+from typing import Iterable, Set
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Parents first: a positions partition references the snapshots of its year
+PARTITIONED_TABLES = ("portfolio_snapshots", "snapshot_positions")
+
+PARTITION_LOCK_TIMEOUT = "5s"
+
+_PARTITION_NAME = re.compile(r"_y(\d{4})$")
+
+# Years known to have partitions in every table (partitions are never dropped by the app)
+_known_years: Set[int] = set()
+
+
+def partition_name(table: str, year: int) -> str:
+    return f"{table}_y{year}"
+
+
+def create_partition_sql(table: str, year: int) -> str:
+    """DDL of one yearly partition (idempotent)"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, year)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+    )
+
+
+class PartitionService:
+    """Creation of the yearly partitions of the snapshot tables"""
+
+    @staticmethod
+    async def existing_years(db: AsyncSession) -> Set[int]:
+        """Years with a partition in every partitioned table (catalog read, takes no table locks)"""
+        years = None
+        for table in PARTITIONED_TABLES:
+            result = await db.execute(
+                text(
+                    "SELECT c.relname FROM pg_inherits AS i JOIN pg_class AS c ON c.oid = i.inhrelid "
+                    "WHERE i.inhparent = CAST(:table AS regclass)"
+                ),
+                {"table": table},
+            )
+            table_years = {int(m.group(1)) for m in map(_PARTITION_NAME.search, result.scalars()) if m}
+            years = table_years if years is None else years & table_years
+        return years
+
+    @staticmethod
+    async def ensure_years(db: AsyncSession, years: Iterable[int]) -> None:
+        """
+        Make sure every table has a partition for each year. Only the first
+        call per process reads the catalog; years already known cost nothing.
+        """
+        missing = set(years) - _known_years
+        if not missing:
+            return
+        _known_years.update(await PartitionService.existing_years(db))
+        missing -= _known_years
+        if not missing:
+            return
+
+        # Own transaction on the caller's engine, committed before any row needs the partition
+        async with AsyncSession(db.bind) as session:
+            await session.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+            await session.execute(text("SELECT pg_advisory_xact_lock(hashtext('snapshot_partitions'))"))
+            for year in sorted(missing):
+                for table in PARTITIONED_TABLES:
+                    await session.execute(text(create_partition_sql(table, year)))
+            await session.commit()
+        logger.info("Created snapshot partitions for %s", ", ".join(map(str, sorted(missing))))
+        _known_years.update(missing)
+
+    @staticmethod
+    async def ensure_upcoming() -> None:
+        """Create this year's and the next years' partitions; on failure they are created on first use"""
+        year = datetime.utcnow().year
+        try:
+            async with SessionLocal() as db:
+                await PartitionService.ensure_years(
+                    db, range(year, year + settings.SNAPSHOT_PARTITION_YEARS_AHEAD + 1)
+                )
+        except (SQLAlchemyError, OSError) as e:
+            logger.warning("Snapshot partitions not checked at startup: %s", e)
@@ -1,8 +1,25 @@
 import io
 import re
+import time
 from decimal import Decimal
 from typing import Dict
-import pdfplumber
+
+from src.core.metrics import PDF_PARSE_DURATION, PDF_PAGES_PARSED, PDF_POSITIONS_EXTRACTED
+
+# Names of common tickers, used while the security master has not been loaded
+# (e.g. a failed startup load, or parsing outside the API)
+KNOWN_TICKER_NAMES = {
+    "PFE": "Pfizer Inc.",
+    "VEA": "Vanguard FTSE Developed Markets ETF",
+    "VNQ": "Vanguard Real Estate ETF",
+    "VOO": "Vanguard S&P 500 ETF",
+    "VWO": "Vanguard FTSE Emerging Markets ETF",
+    "AEROMEX": "Grupo Aeromexico",
+    "AAPL": "Apple Inc.",
+    "MSFT": "Microsoft Corporation",
+    "GOOGL": "Alphabet Inc.",
+    "VTI": "Vanguard Total Stock Market ETF"
+}
 
 
 class GBMStatementParser:
@@ -27,14 +44,16 @@ class GBMStatementParser:
             "extracted_from": "filename.pdf"
         }
         """
+        # pdfplumber (and pdfminer) load on the first parse, not at API startup
+        import pdfplumber
+
+        start = time.perf_counter()
+        outcome = "error"
         try:
             with pdfplumber.open(io.BytesIO(file_content)) as pdf:
                 # Extract text from all pages
-                full_text = ""
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        full_text += text + "\n"
+                full_text = GBMStatementParser._extract_text(pdf)
+                PDF_PAGES_PARSED.inc(len(pdf.pages))
 
                 # Extract data from the "RESUMEN DEL PORTAFOLIO" section
                 account_holder = GBMStatementParser._extract_account_holder(full_text)
@@ -52,6 +71,8 @@ class GBMStatementParser:
 
                 # Extract individual positions
                 positions = GBMStatementParser._extract_positions(full_text)
+                PDF_POSITIONS_EXTRACTED.inc(len(positions))
+                outcome = "success"
 
                 return {
                     "statement_date": statement_date,
@@ -68,6 +89,18 @@ class GBMStatementParser:
 
         except Exception as e:
             raise ValueError(f"Error processing PDF: {str(e)}")
+        finally:
+            PDF_PARSE_DURATION.observe(time.perf_counter() - start, outcome=outcome)
+
+    @staticmethod
+    def _extract_text(pdf) -> str:
+        """Concatenate the text of every page, one page per block"""
+        full_text = ""
+        for page in pdf.pages:
+            text = page.extract_text()
+            if text:
+                full_text += text + "\n"
+        return full_text
 
     @staticmethod
     def _extract_account_holder(text: str) -> str:
@@ -179,6 +212,7 @@ class GBMStatementParser:
             positions.append({
                 "ticker": ticker,
                 "name": GBMStatementParser._get_ticker_name(ticker),
+                "exchange": "SIC",
                 "quantity": quantity,
                 "avg_cost": avg_cost,
                 "current_price": current_price,
@@ -212,6 +246,7 @@ class GBMStatementParser:
             positions.append({
                 "ticker": ticker,
                 "name": GBMStatementParser._get_ticker_name(ticker),
+                "exchange": "BMV",
                 "quantity": quantity,
                 "avg_cost": avg_cost,
                 "current_price": current_price,
@@ -224,20 +259,15 @@ class GBMStatementParser:
 
     @staticmethod
     def _get_ticker_name(ticker: str) -> str:
-        """Get company/fund name for a ticker symbol"""
-        names = {
-            "PFE": "Pfizer Inc.",
-            "VEA": "Vanguard FTSE Developed Markets ETF",
-            "VNQ": "Vanguard Real Estate ETF",
-            "VOO": "Vanguard S&P 500 ETF",
-            "VWO": "Vanguard FTSE Emerging Markets ETF",
-            "AEROMEX": "Grupo Aeromexico",
-            "AAPL": "Apple Inc.",
-            "MSFT": "Microsoft Corporation",
-            "GOOGL": "Alphabet Inc.",
-            "VTI": "Vanguard Total Stock Market ETF"
-        }
-        return names.get(ticker, f"{ticker} Stock")
+        """Get company/fund name for a ticker symbol from the security master"""
+        # Imported here: the security master pulls in the database and settings, which
+        # parsing (and benchmarks/parser_bench.py) must not need
+        from src.services.securities import is_real_name, placeholder_name, security_index
+
+        security = security_index.by_ticker(ticker)
+        if security and is_real_name(ticker, security.name):
+            return security.name
+        return KNOWN_TICKER_NAMES.get(ticker, placeholder_name(ticker))
 
 
 def parse_gbm_pdf(file_content: bytes) -> dict:
@@ -0,0 +1,222 @@
+"""
+Delta Position Storage
+
+Optional compact storage of snapshot positions (SNAPSHOT_POSITION_STORAGE=delta).
+Most holdings keep the same quantity, cost and often price from one statement
+to the next, so instead of writing every position every month:
+- a keyframe snapshot stores all of its positions (base_snapshot_id NULL)
+- a delta snapshot points at a keyframe (base_snapshot_id) and stores only the
+  positions that differ from it; keyframe tickers it no longer holds are listed
+  in removed_tickers
+- a new keyframe is written every SNAPSHOT_KEYFRAME_INTERVAL snapshots, so the
+  stored rows stay bounded and rebuilding any snapshot reads two snapshots'
+  positions, never a chain
+
+Deltas are taken against the keyframe rather than the previous snapshot, so a
+snapshot is always reconstructed in one step (keyframe + its own rows).
+
+Readers see complete snapshots either way:
+- effective_positions(): a UNION ALL selectable with the columns of
+  snapshot_positions (stored rows + inherited keyframe rows), used by the SQL
+  readers (diff, ticker history, series, export, ...). Filters on snapshot_id /
+  portfolio_id / ticker are pushed into both branches by PostgreSQL.
+- attach_positions(): fills PortfolioSnapshot.positions of snapshots loaded
+  through the ORM (get_snapshot_by_id and friends), delta snapshots included.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import all_, exists, func, insert, or_, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
+
+from src.core.config import settings
+from src.models.snapshot import PortfolioSnapshot, SnapshotPosition
+
+# Stored fields compared to decide whether a position changed since the keyframe
+COMPARED_FIELDS = (
+    "security_id", "quantity", "avg_cost", "current_price", "market_value",
+    "unrealized_gain", "unrealized_gain_percent",
+)
+
+# Columns an inherited row takes from the delta snapshot instead of the keyframe row
+_SNAPSHOT_COLUMNS = {
+    "snapshot_id": PortfolioSnapshot.id,
+    "portfolio_id": PortfolioSnapshot.portfolio_id,
+    "snapshot_date": PortfolioSnapshot.snapshot_date,
+}
+
+
+def delta_storage_enabled() -> bool:
+    return settings.SNAPSHOT_POSITION_STORAGE == "delta"
+
+
+def effective_positions():
+    """
+    Positions of every snapshot as stored in full, as an entity alias of
+    SnapshotPosition (use its columns, e.g. positions.ticker; selecting the
+    alias itself would map inherited rows onto the keyframe's ORM objects).
+    """
+    table = SnapshotPosition.__table__
+    keyframe = table.alias("keyframe")
+    own = table.alias("own")
+    stored = select(*table.c)
+    inherited = (
+        select(*[
+            _SNAPSHOT_COLUMNS[column.name].label(column.name) if column.name in _SNAPSHOT_COLUMNS
+            else keyframe.c[column.name]
+            for column in table.c
+        ])
+        .select_from(PortfolioSnapshot)
+        .join(keyframe, keyframe.c.snapshot_id == PortfolioSnapshot.base_snapshot_id)
+        .where(
+            or_(PortfolioSnapshot.removed_tickers.is_(None), keyframe.c.ticker != all_(PortfolioSnapshot.removed_tickers)),
+            ~exists().where(
+                own.c.snapshot_id == PortfolioSnapshot.id,
+                own.c.snapshot_date == PortfolioSnapshot.snapshot_date,
+                own.c.ticker == keyframe.c.ticker,
+            ),
+        )
+    )
+    return aliased(SnapshotPosition, union_all(stored, inherited).subquery("effective_positions"))
+
+
+def positions_of(snapshot: PortfolioSnapshot):
+    """snapshot_positions itself for a fully stored snapshot, effective_positions() for a delta"""
+    return effective_positions() if snapshot.base_snapshot_id else SnapshotPosition
+
+
+def _stored_value(position, field: str):
+    """Field value as the Numeric column stores it (PostgreSQL rounds half away from zero)"""
+    value = getattr(position, field)
+    scale = getattr(SnapshotPosition.__table__.c[field].type, "scale", None)
+    if scale is None or value is None:
+        return value
+    return Decimal(value).quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_UP)
+
+
+def _fingerprint(position) -> tuple:
+    return tuple(_stored_value(position, field) for field in COMPARED_FIELDS)
+
+
+class PositionStorage:
+    """Write-side helpers of the delta storage"""
+
+    @staticmethod
+    async def plan_delta(
+        db: AsyncSession,
+        previous_snapshot: Optional[PortfolioSnapshot],
+        positions: List[SnapshotPosition]
+    ) -> Optional[Tuple[str, List[SnapshotPosition], List[str]]]:
+        """
+        (keyframe id, positions to store, removed tickers) for a new snapshot
+        stored as a delta, or None if it must be stored in full (delta storage
+        off, first snapshot, keyframe deleted, keyframe interval reached, or
+        duplicate tickers).
+        """
+        if not delta_storage_enabled() or previous_snapshot is None:
+            return None
+        keyframe_id = previous_snapshot.base_snapshot_id or previous_snapshot.id
+
+        # Stands in for a foreign key on base_snapshot_id: the keyframe cannot be deleted until
+        # this snapshot commits (delete_snapshot locks it FOR UPDATE before writing out its
+        # dependents), and one deleted meanwhile is not found, so the snapshot is stored in full
+        keyframe_held = await db.scalar(
+            select(PortfolioSnapshot.id)
+            .where(PortfolioSnapshot.id == keyframe_id, PortfolioSnapshot.portfolio_id == previous_snapshot.portfolio_id)
+            .with_for_update(read=True, key_share=True)
+        )
+        if keyframe_held is None:
+            return None
+
+        dependents = await db.scalar(
+            select(func.count(PortfolioSnapshot.id)).where(PortfolioSnapshot.base_snapshot_id == keyframe_id)
+        )
+        if dependents + 1 >= settings.SNAPSHOT_KEYFRAME_INTERVAL:
+            return None
+
+        result = await db.execute(
+            select(SnapshotPosition.ticker, *[getattr(SnapshotPosition, f) for f in COMPARED_FIELDS])
+            .where(SnapshotPosition.snapshot_id == keyframe_id)
+        )
+        keyframe_rows = result.all()
+        keyframe = {row[0]: tuple(row[1:]) for row in keyframe_rows}
+        tickers = [p.ticker for p in positions]
+        if len(keyframe) != len(keyframe_rows) or len(set(tickers)) != len(tickers):
+            # One row per ticker is what makes "same ticker, same fields" unambiguous
+            return None
+
+        changed = [p for p in positions if keyframe.get(p.ticker) != _fingerprint(p)]
+        removed = sorted(set(keyframe) - set(tickers))
+        return keyframe_id, changed, removed
+
+    @staticmethod
+    async def materialize_dependents(db: AsyncSession, keyframe_id: str) -> None:
+        """Write out the inherited positions of a keyframe's deltas (before the keyframe is deleted)"""
+        positions = effective_positions()
+        table = SnapshotPosition.__table__
+        columns = [c.name for c in table.c if c.name != "id"]
+        dependents = select(PortfolioSnapshot.id).where(PortfolioSnapshot.base_snapshot_id == keyframe_id)
+
+        await db.execute(
+            insert(table).from_select(
+                columns,
+                select(*[getattr(positions, c) for c in columns])
+                .where(
+                    positions.snapshot_id.in_(dependents),
+                    # Inherited rows carry the id of the keyframe row they come from
+                    positions.id.in_(select(SnapshotPosition.id).where(SnapshotPosition.snapshot_id == keyframe_id)),
+                )
+            )
+        )
+        await db.execute(
+            update(PortfolioSnapshot)
+            .where(PortfolioSnapshot.base_snapshot_id == keyframe_id)
+            .values(base_snapshot_id=None, removed_tickers=None)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def attach_positions(db: AsyncSession, snapshots: Sequence[PortfolioSnapshot]) -> None:
+    """
+    Load `positions` of snapshots (instead of selectinload): stored rows with one
+    query bounded by the snapshots' dates, so only their yearly partitions are
+    read, and the keyframe rows inherited by delta snapshots with one more. The
+    collections are set as loaded state (nothing is written back on flush);
+    inherited entries are the keyframe's own position objects.
+    """
+    if not snapshots:
+        return
+    result = await db.execute(
+        select(SnapshotPosition)
+        .where(
+            SnapshotPosition.snapshot_id.in_({s.id for s in snapshots}),
+            # Exact (each id has one date), and lets PostgreSQL prune partitions
+            SnapshotPosition.snapshot_date.in_({s.snapshot_date for s in snapshots}),
+        )
+        .order_by(SnapshotPosition.id)
+    )
+    by_snapshot: Dict[str, List[SnapshotPosition]] = {}
+    for position in result.scalars().all():
+        by_snapshot.setdefault(position.snapshot_id, []).append(position)
+
+    keyframe_ids = {s.base_snapshot_id for s in snapshots if s.base_snapshot_id}
+    by_keyframe: Dict[str, List[SnapshotPosition]] = {}
+    if keyframe_ids:
+        result = await db.execute(
+            select(SnapshotPosition)
+            .where(SnapshotPosition.snapshot_id.in_(keyframe_ids))
+            .order_by(SnapshotPosition.id)
+        )
+        for position in result.scalars().all():
+            by_keyframe.setdefault(position.snapshot_id, []).append(position)
+
+    for snapshot in snapshots:
+        positions = by_snapshot.get(snapshot.id, [])
+        if snapshot.base_snapshot_id:
+            skip = set(snapshot.removed_tickers or ()) | {p.ticker for p in positions}
+            inherited = [p for p in by_keyframe.get(snapshot.base_snapshot_id, []) if p.ticker not in skip]
+            positions = sorted(inherited + positions, key=lambda p: p.id)
+        set_committed_value(snapshot, "positions", positions)
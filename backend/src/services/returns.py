@@ -0,0 +1,191 @@
+"""
+Portfolio Returns Engine
+
+Return figures over a portfolio's snapshot series, computed with vectorized NumPy:
+- time-weighted return (TWR): Modified Dietz return of every interval between
+  two snapshots, chained; insensitive to when money was added or withdrawn
+- money-weighted return (MWR): XIRR of the opening value, the net
+  contributions and the closing value; reflects the timing of those flows
+
+GBM statements carry no deposit/withdrawal movements, so the net contribution
+between two snapshots is estimated as the change in cash + fixed income plus
+the net value of the shares traded (quantity changes x price, see
+PositionHistory.trades): buying or selling shares only moves money between
+cash and equity (no flow, whatever the gain realized by a sale), a deposit
+raises cash (inflow) and a withdrawal lowers it (outflow), while price moves
+only change equity market value and count as performance. A cash dividend
+cannot be told apart from a deposit and is counted as a contribution.
+
+Results are memoized per (portfolio, portfolio version, period). Percentages
+are percent values (5.0 == 5%); annualized figures are only reported for
+periods of at least one year.
+"""
+
+import calendar
+from datetime import date, datetime
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import LRUCache
+from src.schemas.dashboard import PerformanceResponse, ReturnFigures
+from src.services.snapshot_series import SnapshotSeries, get_position_history
+
+PERIODS = ("1m", "3m", "6m", "ytd", "1y", "3y", "5y", "all")
+PERIOD_MONTHS = {"1m": 1, "3m": 3, "6m": 6, "1y": 12, "3y": 36, "5y": 60}
+
+DAYS_PER_YEAR = 365.0
+
+performance_cache = LRUCache("performance", maxsize=2048)
+
+
+def months_before(day: date, months: int) -> date:
+    """Same day `months` earlier, clamped to the end of shorter months"""
+    year, month = divmod(day.year * 12 + day.month - 1 - months, 12)
+    last_day = calendar.monthrange(year, month + 1)[1]
+    return date(year, month + 1, min(day.day, last_day))
+
+
+def period_start(period: str, end: date) -> Optional[datetime]:
+    """Start of `period` ending at `end` (None for "all")"""
+    if period == "all":
+        return None
+    if period == "ytd":
+        # Measured from the last statement of the previous year
+        return datetime(end.year - 1, 12, 31)
+    return datetime.combine(months_before(end, PERIOD_MONTHS[period]), datetime.min.time())
+
+
+def net_contributions(series: SnapshotSeries, trades: np.ndarray) -> np.ndarray:
+    """
+    Estimated money added (+) or withdrawn (-) in each interval between snapshots.
+
+    `trades` is the net value of the shares traded into each snapshot of the series.
+    """
+    return np.diff(series.cash + series.fixed_income) + trades[1:]
+
+
+def interval_returns(series: SnapshotSeries, trades: np.ndarray) -> np.ndarray:
+    """Modified Dietz return of each interval (flows assumed mid-interval)"""
+    start, end = series.total[:-1], series.total[1:]
+    flows = net_contributions(series, trades)
+    denominator = start + 0.5 * flows
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, (end - start - flows) / denominator, 0.0)
+
+
+def time_weighted_return(series: SnapshotSeries, trades: np.ndarray) -> float:
+    """Chained cumulative return as a fraction"""
+    return float(np.prod(1.0 + interval_returns(series, trades)) - 1.0) if len(series) > 1 else 0.0
+
+
+def xirr(amounts: np.ndarray, days: np.ndarray, guess: float = 0.1, tol: float = 1e-9, max_iter: int = 100) -> Optional[float]:
+    """
+    Annual rate r with sum(amounts / (1 + r) ** (days / 365)) == 0.
+
+    Newton's method from `guess`, falling back to bisection when it diverges.
+    Returns None when the flows have no sign change (no rate exists).
+    """
+    if not (np.any(amounts > 0) and np.any(amounts < 0)):
+        return None
+    years = days / DAYS_PER_YEAR
+
+    def npv(rate: float) -> float:
+        return float(np.sum(amounts * np.power(1.0 + rate, -years)))
+
+    rate = guess
+    for _ in range(max_iter):
+        factors = np.power(1.0 + rate, -years)
+        value = np.sum(amounts * factors)
+        derivative = np.sum(-years * amounts * factors / (1.0 + rate))
+        if derivative == 0 or not np.isfinite(derivative):
+            break
+        step = value / derivative
+        rate -= step
+        if rate <= -1.0 or not np.isfinite(rate):
+            break
+        if abs(step) < tol:
+            return float(rate)
+
+    low, high = -0.9999, 10.0
+    if npv(low) * npv(high) > 0:
+        return None
+    for _ in range(200):
+        mid = (low + high) / 2
+        if npv(low) * npv(mid) <= 0:
+            high = mid
+        else:
+            low = mid
+        if high - low < tol:
+            break
+    return (low + high) / 2
+
+
+def money_weighted_return(series: SnapshotSeries, trades: np.ndarray) -> Optional[float]:
+    """XIRR (annual rate) from the investor's side: pay the opening value and contributions, receive the closing value"""
+    if len(series) < 2:
+        return None
+    amounts = np.concatenate(([-series.total[0]], -net_contributions(series, trades)))
+    amounts[-1] += series.total[-1]
+    days = (series.dates - series.dates[0]).astype(np.float64)
+    return xirr(amounts, days)
+
+
+def annualize(cumulative: float, days: float) -> Optional[float]:
+    if days < DAYS_PER_YEAR or cumulative <= -1.0:
+        return None
+    return (1.0 + cumulative) ** (DAYS_PER_YEAR / days) - 1.0
+
+
+def _percent(value: Optional[float]) -> Optional[float]:
+    return round(value * 100, 4) if value is not None else None
+
+
+def compute_performance(series: SnapshotSeries, trades: np.ndarray, period: str) -> PerformanceResponse:
+    """Performance figures of the part of `series` (and its `trades`) covered by `period`"""
+    if not len(series):
+        return PerformanceResponse(period=period, snapshots=0)
+
+    end = series.dates[-1].astype(date)
+    start = period_start(period, end)
+    window, trades = series.since(start), trades[series.start_index(start):]
+    days = float((window.dates[-1] - window.dates[0]).astype(np.float64))
+    contributions = float(net_contributions(window, trades).sum())
+
+    twr = time_weighted_return(window, trades)
+    mwr = money_weighted_return(window, trades)
+    # XIRR is an annual rate; its cumulative counterpart compounds it over the period
+    mwr_cumulative = (1.0 + mwr) ** (days / DAYS_PER_YEAR) - 1.0 if mwr is not None else None
+
+    return PerformanceResponse(
+        period=period,
+        startDate=window.dates[0].astype(date),
+        endDate=end,
+        snapshots=len(window),
+        startValue=round(float(window.total[0]), 2),
+        endValue=round(float(window.total[-1]), 2),
+        netContributions=round(contributions, 2),
+        investmentGain=round(float(window.total[-1] - window.total[0]) - contributions, 2),
+        timeWeighted=ReturnFigures(cumulative=_percent(twr), annualized=_percent(annualize(twr, days))),
+        moneyWeighted=ReturnFigures(
+            cumulative=_percent(mwr_cumulative),
+            annualized=_percent(mwr if days >= DAYS_PER_YEAR else None),
+        ),
+    )
+
+
+class ReturnsService:
+    """Memoized performance figures of a portfolio"""
+
+    @staticmethod
+    async def get_performance(db: AsyncSession, portfolio_id: str, period: str = "all") -> PerformanceResponse:
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {PERIODS}")
+        series, history = await get_position_history(db, portfolio_id)
+        key = (portfolio_id, series.version, period)
+        performance = performance_cache.get(key)
+        if performance is None:
+            performance = compute_performance(series, history.trades, period)
+            performance_cache.set(key, performance)
+        return performance
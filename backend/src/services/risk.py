@@ -0,0 +1,300 @@
+"""
+Portfolio Risk Metrics
+
+Risk figures over a portfolio's snapshot series:
+- volatility of the interval returns (annualized) and a rolling volatility
+  over the last RISK_ROLLING_WINDOW snapshots
+- maximum drawdown with its peak, trough and recovery dates
+- Sharpe and Sortino ratios against RISK_FREE_RATE
+- best and worst month
+
+Returns are the flow-adjusted interval returns of src.services.returns, and
+drawdowns are measured on the time-weighted wealth index they chain into, so a
+deposit never hides a loss.
+
+RiskState keeps running accumulators (Welford mean/variance, running peak,
+rolling-window sums, extremes). It is built once from the whole series with
+vectorized NumPy; when the portfolio gains exactly one newer snapshot, a copy
+of the cached state is advanced with that one interval instead of rescanning
+the history, and replaces the cached one together with its version. Any other
+change (delete, back-dated upload) rebuilds it. The
+series and positions it reads are appended in place as well (see
+snapshot_series), and the rolling volatility is kept in its response form
+(rounded percents), so an upload does no work proportional to the history
+beyond copying those lists into the response.
+"""
+
+import math
+from collections import deque
+from dataclasses import dataclass, field, replace
+from datetime import date
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import LRUCache
+from src.core.config import settings
+from src.schemas.dashboard import DrawdownInfo, MonthReturn, RiskResponse, RollingSeries
+from src.services.returns import DAYS_PER_YEAR, interval_returns
+from src.services.snapshot_series import SnapshotSeries, get_position_history
+
+risk_cache = LRUCache("risk", maxsize=1024)
+
+
+def _as_date(value: np.datetime64) -> date:
+    return value.astype(date)
+
+
+@dataclass
+class RiskState:
+    """Running risk accumulators of one portfolio, up to snapshot `last_id`"""
+    risk_free_rate: float
+    window: int
+    snapshots: int = 0
+    last_id: Optional[str] = None
+    last_date: Optional[date] = None
+
+    # Welford accumulators of the raw and excess (over risk-free) interval returns
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    excess_mean: float = 0.0
+    excess_m2: float = 0.0
+    downside_sq: float = 0.0
+    total_days: float = 0.0
+
+    # Time-weighted wealth index and drawdown tracking
+    wealth: float = 1.0
+    peak: float = 1.0
+    peak_date: Optional[date] = None
+    max_drawdown: float = 0.0
+    drawdown_peak: float = 1.0
+    drawdown_peak_date: Optional[date] = None
+    drawdown_trough_date: Optional[date] = None
+    drawdown_recovery_date: Optional[date] = None
+
+    best: Optional[Tuple[float, date]] = None
+    worst: Optional[Tuple[float, date]] = None
+
+    # Last `window` (return, days) pairs with running sums, and the rolling volatility history
+    recent: Deque[Tuple[float, float]] = field(default_factory=deque)
+    recent_sum: float = 0.0
+    recent_sq: float = 0.0
+    recent_days: float = 0.0
+    rolling_dates: List[date] = field(default_factory=list)
+    rolling_values: List[float] = field(default_factory=list)  # Annualized volatility %, rounded
+
+    def copy(self) -> "RiskState":
+        """Independent copy (the window and the rolling history are not shared)"""
+        return replace(
+            self, recent=deque(self.recent), rolling_dates=list(self.rolling_dates), rolling_values=list(self.rolling_values)
+        )
+
+    def _risk_free(self, days: float) -> float:
+        return (1.0 + self.risk_free_rate) ** (days / DAYS_PER_YEAR) - 1.0
+
+    @classmethod
+    def from_series(cls, series: SnapshotSeries, trades: np.ndarray, risk_free_rate: float, window: int) -> "RiskState":
+        """Build the state for the whole series (and its traded values) with vectorized NumPy"""
+        state = cls(risk_free_rate=risk_free_rate, window=window, snapshots=len(series))
+        if not len(series):
+            return state
+        state.last_id = series.ids[-1]
+        state.last_date = _as_date(series.dates[-1])
+        state.peak_date = state.drawdown_peak_date = _as_date(series.dates[0])
+        if len(series) < 2:
+            return state
+
+        returns = interval_returns(series, trades)
+        days = np.diff(series.dates).astype(np.float64)
+        excess = returns - ((1.0 + risk_free_rate) ** (days / DAYS_PER_YEAR) - 1.0)
+        dates = series.dates[1:]
+
+        state.count = len(returns)
+        state.mean = float(returns.mean())
+        state.m2 = float(((returns - state.mean) ** 2).sum())
+        state.excess_mean = float(excess.mean())
+        state.excess_m2 = float(((excess - state.excess_mean) ** 2).sum())
+        state.downside_sq = float((np.minimum(excess, 0.0) ** 2).sum())
+        state.total_days = float(days.sum())
+
+        wealth = np.concatenate(([1.0], np.cumprod(1.0 + returns)))
+        running_peak = np.maximum.accumulate(wealth)
+        drawdowns = wealth / running_peak - 1.0
+        trough = int(np.argmin(drawdowns))
+        state.wealth = float(wealth[-1])
+        state.peak = float(running_peak[-1])
+        state.peak_date = _as_date(series.dates[int(np.flatnonzero(wealth == running_peak)[-1])])
+        if drawdowns[trough] < 0:
+            peak_index = int(np.argmax(wealth[:trough + 1]))
+            state.max_drawdown = float(drawdowns[trough])
+            state.drawdown_peak = float(wealth[peak_index])
+            state.drawdown_peak_date = _as_date(series.dates[peak_index])
+            state.drawdown_trough_date = _as_date(series.dates[trough])
+            recovered = np.flatnonzero(wealth[trough:] >= wealth[peak_index])
+            if len(recovered):
+                state.drawdown_recovery_date = _as_date(series.dates[trough + int(recovered[0])])
+
+        best, worst = int(np.argmax(returns)), int(np.argmin(returns))
+        state.best = (float(returns[best]), _as_date(dates[best]))
+        state.worst = (float(returns[worst]), _as_date(dates[worst]))
+
+        tail = slice(max(len(returns) - window, 0), None)
+        state.recent = deque(zip(returns[tail].tolist(), days[tail].tolist()))
+        state.recent_sum = float(returns[tail].sum())
+        state.recent_sq = float((returns[tail] ** 2).sum())
+        state.recent_days = float(days[tail].sum())
+
+        if len(returns) >= window > 1:
+            # Rolling sample std (and annualization from each window's own span) via cumulative sums
+            def window_sums(values: np.ndarray) -> np.ndarray:
+                cumulative = np.concatenate(([0.0], np.cumsum(values)))
+                return cumulative[window:] - cumulative[:-window]
+
+            sums, squares, spans = window_sums(returns), window_sums(returns ** 2), window_sums(days)
+            variance = np.maximum((squares - sums ** 2 / window) / (window - 1), 0.0)
+            rolling = np.sqrt(variance) * np.sqrt(DAYS_PER_YEAR * window / spans)
+            state.rolling_dates = [_as_date(d) for d in dates[window - 1:]]
+            state.rolling_values = [round(value * 100, 4) for value in rolling.tolist()]
+        return state
+
+    def append(self, snapshot_id: str, snapshot_date: date, interval_return: float, days: float) -> None:
+        """Advance the state by one newer snapshot in O(1)"""
+        self.snapshots += 1
+        self.last_id = snapshot_id
+        self.last_date = snapshot_date
+
+        self.count += 1
+        delta = interval_return - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (interval_return - self.mean)
+        excess = interval_return - self._risk_free(days)
+        delta = excess - self.excess_mean
+        self.excess_mean += delta / self.count
+        self.excess_m2 += delta * (excess - self.excess_mean)
+        self.downside_sq += min(excess, 0.0) ** 2
+        self.total_days += days
+
+        self.wealth *= 1.0 + interval_return
+        if self.wealth >= self.peak:
+            self.peak, self.peak_date = self.wealth, snapshot_date
+        if self.drawdown_trough_date and self.drawdown_recovery_date is None and self.wealth >= self.drawdown_peak:
+            self.drawdown_recovery_date = snapshot_date
+        drawdown = self.wealth / self.peak - 1.0
+        if drawdown < self.max_drawdown:
+            self.max_drawdown = drawdown
+            self.drawdown_peak, self.drawdown_peak_date = self.peak, self.peak_date
+            self.drawdown_trough_date = snapshot_date
+            self.drawdown_recovery_date = None
+
+        if self.best is None or interval_return > self.best[0]:
+            self.best = (interval_return, snapshot_date)
+        if self.worst is None or interval_return < self.worst[0]:
+            self.worst = (interval_return, snapshot_date)
+
+        self.recent.append((interval_return, days))
+        self.recent_sum += interval_return
+        self.recent_sq += interval_return ** 2
+        self.recent_days += days
+        if len(self.recent) > self.window:
+            old_return, old_days = self.recent.popleft()
+            self.recent_sum -= old_return
+            self.recent_sq -= old_return ** 2
+            self.recent_days -= old_days
+        if len(self.recent) == self.window > 1:
+            variance = max((self.recent_sq - self.recent_sum ** 2 / self.window) / (self.window - 1), 0.0)
+            self.rolling_dates.append(snapshot_date)
+            volatility = math.sqrt(variance) * math.sqrt(DAYS_PER_YEAR * self.window / self.recent_days)
+            self.rolling_values.append(round(volatility * 100, 4))
+
+    @property
+    def periods_per_year(self) -> Optional[float]:
+        return DAYS_PER_YEAR * self.count / self.total_days if self.total_days else None
+
+    def to_response(self) -> RiskResponse:
+        def percent(value: Optional[float]) -> Optional[float]:
+            return round(value * 100, 4) if value is not None else None
+
+        def ratio(value: Optional[float]) -> Optional[float]:
+            return round(value, 4) if value is not None else None
+
+        ppy = self.periods_per_year
+        volatility = sharpe = sortino = None
+        if self.count >= 2 and ppy:
+            std = math.sqrt(self.m2 / (self.count - 1))
+            excess_std = math.sqrt(self.excess_m2 / (self.count - 1))
+            volatility = std * math.sqrt(ppy)
+            if excess_std > 0:
+                sharpe = self.excess_mean / excess_std * math.sqrt(ppy)
+            if self.downside_sq > 0:
+                sortino = self.excess_mean / math.sqrt(self.downside_sq / self.count) * math.sqrt(ppy)
+
+        return RiskResponse(
+            snapshots=self.snapshots,
+            asOf=self.last_date,
+            riskFreeRate=percent(self.risk_free_rate),
+            volatility=percent(volatility),
+            sharpeRatio=ratio(sharpe),
+            sortinoRatio=ratio(sortino),
+            maxDrawdown=DrawdownInfo(
+                value=percent(self.max_drawdown),
+                peakDate=self.drawdown_peak_date if self.drawdown_trough_date else None,
+                troughDate=self.drawdown_trough_date,
+                recoveryDate=self.drawdown_recovery_date,
+            ),
+            currentDrawdown=percent(self.wealth / self.peak - 1.0),
+            bestMonth=MonthReturn(date=self.best[1], value=percent(self.best[0])) if self.best else None,
+            worstMonth=MonthReturn(date=self.worst[1], value=percent(self.worst[0])) if self.worst else None,
+            # Validation copies the lists, so later appends do not change this response
+            rollingVolatility=RollingSeries(window=self.window, dates=self.rolling_dates, values=self.rolling_values),
+        )
+
+
+def advance_or_rebuild(
+    state: Optional[RiskState], series: SnapshotSeries, trades: np.ndarray, risk_free_rate: float, window: int
+) -> RiskState:
+    """
+    State with the newest snapshot appended to a copy of `state` when that is
+    the only change, else rebuilt. `state` itself is never modified: it stays
+    consistent with the version it is cached under.
+    """
+    appended = (
+        state is not None
+        and state.risk_free_rate == risk_free_rate
+        and state.window == window
+        and len(series) >= 2
+        and state.snapshots == len(series) - 1
+        and state.last_id == series.ids[-2]
+    )
+    if not appended:
+        return RiskState.from_series(series, trades, risk_free_rate, window)
+
+    # Only the last interval is needed: a two-snapshot view of the series
+    tail = series.since(_as_date(series.dates[-2]))
+    state = state.copy()
+    state.append(
+        series.ids[-1],
+        _as_date(series.dates[-1]),
+        float(interval_returns(tail, trades[-len(tail):])[-1]),
+        float((series.dates[-1] - series.dates[-2]).astype(np.float64)),
+    )
+    return state
+
+
+class RiskService:
+    """Cached, incrementally maintained risk metrics of a portfolio"""
+
+    @staticmethod
+    async def get_risk(db: AsyncSession, portfolio_id: str) -> RiskResponse:
+        series, history = await get_position_history(db, portfolio_id)
+        cached = risk_cache.get(portfolio_id)
+        if cached is not None and cached[0] == series.version:
+            return cached[1]
+
+        state = advance_or_rebuild(
+            cached[2] if cached else None, series, history.trades, settings.RISK_FREE_RATE, settings.RISK_ROLLING_WINDOW
+        )
+        response = state.to_response()
+        risk_cache.set(portfolio_id, (series.version, response, state))
+        return response
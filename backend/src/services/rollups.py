@@ -0,0 +1,184 @@
+"""
+Snapshot Rollups
+
+Month, quarter and year figures of a portfolio's snapshots, kept in the
+portfolio_rollups table:
+- close_value: total value of the last snapshot in the period
+- min_value / max_value: lowest and highest snapshot value in the period
+- period_return: % change of close_value vs. the previous period's close
+
+Rollups are maintained incrementally: creating or deleting a snapshot only
+re-aggregates the three periods containing its date (one month, one quarter,
+one year) and re-chains the return of those periods and of the period right
+after each of them. Everything runs in three statements inside the caller's
+transaction, so the rollups commit (or roll back) together with the snapshot.
+
+Periods match PostgreSQL's date_trunc, which the backfill migration uses.
+"""
+
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import DateTime, Numeric, String, and_, case, column, delete, func, insert, literal, or_, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.models.snapshot import PortfolioRollup, PortfolioSnapshot
+
+GRANULARITIES = ("month", "quarter", "year")
+
+
+def period_bounds(granularity: str, day: datetime) -> Tuple[datetime, datetime]:
+    """[start, end) of the month/quarter/year containing `day`"""
+    if granularity == "year":
+        start_month, months = 1, 12
+    elif granularity == "quarter":
+        start_month, months = (day.month - 1) // 3 * 3 + 1, 3
+    else:
+        start_month, months = day.month, 1
+    start = datetime(day.year, start_month, 1)
+    year, month = divmod(start_month - 1 + months, 12)
+    return start, datetime(day.year + year, month + 1, 1)
+
+
+class RollupService:
+    """Incremental maintenance and reads of the snapshot rollups"""
+
+    @staticmethod
+    async def refresh(db: AsyncSession, portfolio_id: str, snapshot_date: datetime) -> None:
+        """
+        Re-aggregate the periods containing `snapshot_date` after a snapshot was
+        created or deleted on that date. Does not commit.
+        """
+        bounds = [(g, *period_bounds(g, snapshot_date)) for g in GRANULARITIES]
+        rollup = PortfolioRollup
+
+        # 1. Drop the affected period rows (re-inserted below if they still have snapshots)
+        await db.execute(
+            delete(rollup)
+            .where(
+                rollup.portfolio_id == portfolio_id,
+                tuple_(rollup.granularity, rollup.period_start).in_([(g, start) for g, start, _ in bounds]),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        # 2. Aggregate each period's snapshots in one grouped query
+        periods = values(
+            column("granularity", String), column("period_start", DateTime), column("period_end", DateTime),
+            name="periods",
+        ).data(bounds)
+        snapshot = PortfolioSnapshot
+        # Constant range spanning every period (the year): lets the planner read one partition only
+        first_start, last_end = min(start for _, start, _ in bounds), max(end for _, _, end in bounds)
+        close_value = func.array_agg(
+            aggregate_order_by(snapshot.total_value, snapshot.snapshot_date.desc()),
+            type_=ARRAY(Numeric(15, 2)),
+        )[1]
+        aggregates = (
+            select(
+                literal(portfolio_id),
+                periods.c.granularity,
+                periods.c.period_start,
+                func.max(snapshot.snapshot_date),
+                func.count(snapshot.id),
+                close_value,
+                func.min(snapshot.total_value),
+                func.max(snapshot.total_value),
+                literal(datetime.utcnow()),
+            )
+            .select_from(periods)
+            .join(snapshot, and_(
+                snapshot.portfolio_id == portfolio_id,
+                snapshot.snapshot_date >= first_start,
+                snapshot.snapshot_date < last_end,
+                snapshot.snapshot_date >= periods.c.period_start,
+                snapshot.snapshot_date < periods.c.period_end,
+            ))
+            .group_by(periods.c.granularity, periods.c.period_start)
+        )
+        await db.execute(
+            insert(rollup).from_select(
+                ["portfolio_id", "granularity", "period_start", "last_snapshot_date", "snapshot_count",
+                 "close_value", "min_value", "max_value", "updated_at"],
+                aggregates,
+            )
+        )
+
+        # 3. Re-chain period_return of each affected period and of the period after it
+        other = aliased(PortfolioRollup)
+
+        def neighbour(expression, condition):
+            return (
+                select(expression)
+                .where(other.portfolio_id == rollup.portfolio_id, other.granularity == rollup.granularity, condition)
+            )
+
+        previous_close = (
+            neighbour(other.close_value, other.period_start < rollup.period_start)
+            .order_by(other.period_start.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        affected = [
+            and_(
+                rollup.granularity == g,
+                rollup.period_start >= start,
+                rollup.period_start <= func.coalesce(
+                    neighbour(func.min(other.period_start), other.period_start > start).scalar_subquery(),
+                    start,
+                ),
+            )
+            for g, start, _ in bounds
+        ]
+        await db.execute(
+            update(rollup)
+            .where(rollup.portfolio_id == portfolio_id, or_(*affected))
+            .values(period_return=case(
+                (previous_close > 0, func.round((rollup.close_value / previous_close - 1) * 100, 2)),
+                else_=None,
+            ))
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    async def get_rollups(
+        db: AsyncSession,
+        portfolio_id: str,
+        granularity: str,
+        limit: int = 12,
+        before: Optional[datetime] = None
+    ) -> List[PortfolioRollup]:
+        """
+        Most recent `limit` periods of a granularity, newest first; with `before`
+        (the period_start of the last period of the previous page) the page
+        continues right after it on the primary key.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {GRANULARITIES}")
+        query = (
+            select(PortfolioRollup)
+            .where(
+                PortfolioRollup.portfolio_id == portfolio_id,
+                PortfolioRollup.granularity == granularity,
+            )
+            .order_by(PortfolioRollup.period_start.desc())
+            .limit(limit)
+        )
+        if before is not None:
+            query = query.where(PortfolioRollup.period_start < before)
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def count_rollups(db: AsyncSession, portfolio_id: str, granularity: str) -> int:
+        """Number of periods of a granularity (one per month/quarter/year with snapshots)"""
+        return await db.scalar(
+            select(func.count())
+            .select_from(PortfolioRollup)
+            .where(
+                PortfolioRollup.portfolio_id == portfolio_id,
+                PortfolioRollup.granularity == granularity,
+            )
+        )
@@ -0,0 +1,186 @@
+"""
+Security Master
+
+Every process keeps the whole securities table in memory (it holds one row per
+traded ticker, not per position) as two dicts, so resolving a position's name,
+asset class or exchange is an O(1) lookup instead of a join or a string stored
+on every snapshot position.
+
+The index is loaded at startup and reloaded whenever it is asked about an id
+or ticker it does not know: securities are only ever added, so an unknown key
+is exactly the signal that another worker registered something new. Names can
+still be filled in later, so an index older than INDEX_MAX_AGE_SECONDS is
+reloaded as well.
+
+A ticker no statement has named yet is registered under the ticker itself
+(the parser's "<ticker> Stock" placeholder is for display only) and renamed
+by the first statement that carries its real name.
+
+Tickers seen for the first time are registered in their own short transaction
+(INSERT ... ON CONFLICT DO NOTHING), so an id in the index always refers to a
+committed row, even if the snapshot that introduced it is rolled back.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.security import Security
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAX_AGE_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class SecurityInfo:
+    """Immutable copy of a securities row"""
+    id: int
+    ticker: str
+    name: str
+    asset_class: str
+    exchange: Optional[str]
+
+
+class SecurityIndex:
+    """id -> security and ticker -> security, replaced wholesale on reload"""
+
+    def __init__(self):
+        self._by_id: Dict[int, SecurityInfo] = {}
+        self._by_ticker: Dict[str, SecurityInfo] = {}
+        self.loaded = False
+        self._loaded_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, security_id: int) -> Optional[SecurityInfo]:
+        return self._by_id.get(security_id)
+
+    def by_ticker(self, ticker: str) -> Optional[SecurityInfo]:
+        return self._by_ticker.get(ticker)
+
+    def replace(self, securities: Iterable[SecurityInfo]) -> None:
+        by_id = {s.id: s for s in securities}
+        # Swap both dicts at once so readers never see a half-built index
+        self._by_id, self._by_ticker = by_id, {s.ticker: s for s in by_id.values()}
+        self.loaded = True
+        self._loaded_at = time.monotonic()
+
+    def stale(self) -> bool:
+        """Never loaded, or loaded long enough ago to miss renamed securities"""
+        return not self.loaded or time.monotonic() - self._loaded_at > INDEX_MAX_AGE_SECONDS
+
+
+security_index = SecurityIndex()
+
+
+def infer_asset_class(name: str) -> str:
+    """Asset class of a newly seen ticker, from its statement description"""
+    return "ETF" if "ETF" in name.upper() else "Stock"
+
+
+def placeholder_name(ticker: str) -> str:
+    """Display name of a ticker nothing has named yet (never stored in the master)"""
+    return f"{ticker} Stock"
+
+
+def is_real_name(ticker: str, name: Optional[str]) -> bool:
+    return bool(name) and name not in (ticker, placeholder_name(ticker))
+
+
+def _new_security(position: dict, now: datetime) -> dict:
+    ticker, name = position["ticker"], position["name"]
+    if not is_real_name(ticker, name):
+        name = ticker
+    return {
+        "ticker": ticker,
+        "name": name,
+        "asset_class": infer_asset_class(name),
+        "exchange": position.get("exchange"),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class SecurityService:
+    """Loading and maintenance of the in-memory security master"""
+
+    @staticmethod
+    async def load(db: AsyncSession) -> SecurityIndex:
+        """(Re)load the whole table into the index"""
+        result = await db.execute(
+            select(Security.id, Security.ticker, Security.name, Security.asset_class, Security.exchange)
+        )
+        security_index.replace(SecurityInfo(*row) for row in result.all())
+        return security_index
+
+    @staticmethod
+    async def load_at_startup() -> None:
+        """Warm the index before serving; on failure it loads on first use instead"""
+        # Imported here so statement parsing can read the index without a configured database
+        from src.core.database import SessionLocal
+
+        try:
+            async with SessionLocal() as db:
+                await SecurityService.load(db)
+        except (SQLAlchemyError, OSError) as e:
+            logger.warning("Security index not loaded at startup: %s", e)
+
+    @staticmethod
+    async def describe(db: AsyncSession, security_ids: Iterable[int]) -> Dict[int, SecurityInfo]:
+        """Securities by id, reloading the index once if any id is unknown"""
+        ids = set(security_ids)
+        if security_index.stale() or any(security_index.get(i) is None for i in ids):
+            await SecurityService.load(db)
+        return {i: security_index.get(i) for i in ids if security_index.get(i) is not None}
+
+    @staticmethod
+    async def resolve(db: AsyncSession, positions: List[dict]) -> Dict[str, int]:
+        """
+        Security id per ticker of parsed positions (dicts with ticker, name and
+        optionally exchange), registering tickers the master does not know yet
+        and naming the ones registered without a name.
+        """
+        tickers = {p["ticker"]: p for p in positions}
+        if security_index.stale() or any(security_index.by_ticker(t) is None for t in tickers):
+            await SecurityService.load(db)
+
+        missing, named = [], []
+        for ticker, p in tickers.items():
+            security = security_index.by_ticker(ticker)
+            if security is None:
+                missing.append(p)
+            elif is_real_name(ticker, p["name"]) and not is_real_name(ticker, security.name):
+                named.append(p)
+        if missing or named:
+            now = datetime.utcnow()
+            # Own transaction on the caller's engine: committed before any position references it
+            async with AsyncSession(db.bind) as session:
+                if missing:
+                    await session.execute(
+                        insert(Security)
+                        .values([_new_security(p, now) for p in missing])
+                        .on_conflict_do_nothing(index_elements=["ticker"])
+                    )
+                for p in named:
+                    # Only while still unnamed: a concurrent upload may have named it already
+                    await session.execute(
+                        update(Security)
+                        .where(
+                            Security.ticker == p["ticker"],
+                            Security.name.in_([p["ticker"], placeholder_name(p["ticker"])]),
+                        )
+                        .values(name=p["name"], asset_class=infer_asset_class(p["name"]), updated_at=now)
+                    )
+                await session.commit()
+            await SecurityService.load(db)
+
+        return {t: security_index.by_ticker(t).id for t in tickers}
@@ -0,0 +1,90 @@
+"""
+Snapshot Diff Service
+
+What changed between two statements: new and closed positions, quantity
+changes and price moves, with the deltas already computed. Only changed
+positions are returned (see SnapshotService.get_position_changes).
+
+Snapshots never change once created, so a diff is cached per (from, to)
+snapshot-id pair. Ownership must be checked by the caller before a cached
+diff is served.
+"""
+
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import LRUCache
+from src.models.snapshot import PortfolioSnapshot
+from src.schemas.import_data import PositionChange, SnapshotDiffResponse
+from src.services.snapshot_service import SnapshotService
+
+diff_cache = LRUCache("snapshot_diff", maxsize=2048)
+
+
+def _float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def build_position_change(row) -> PositionChange:
+    """Deltas of one (ticker, name, qty before/after, price before/after, value before/after) row"""
+    ticker, name, qty_before, qty_after, price_before, price_after, value_before, value_after = row
+    if qty_before is None:
+        change_type = "new"
+    elif qty_after is None:
+        change_type = "closed"
+    else:
+        change_type = "changed"
+
+    price_change = price_change_percent = None
+    if price_before is not None and price_after is not None:
+        price_change = round(float(price_after - price_before), 2)
+        if price_before:
+            price_change_percent = round(float((price_after - price_before) / price_before * 100), 2)
+
+    return PositionChange(
+        ticker=ticker,
+        name=name,
+        change_type=change_type,
+        quantity_before=_float(qty_before),
+        quantity_after=_float(qty_after),
+        quantity_change=float((qty_after or 0) - (qty_before or 0)),
+        price_before=_float(price_before),
+        price_after=_float(price_after),
+        price_change=price_change,
+        price_change_percent=price_change_percent,
+        market_value_before=_float(value_before),
+        market_value_after=_float(value_after),
+        market_value_change=round(float((value_after or 0) - (value_before or 0)), 2),
+    )
+
+
+class SnapshotDiffService:
+    """Cached position diffs between two snapshots of the same portfolio"""
+
+    @staticmethod
+    async def diff(
+        db: AsyncSession,
+        from_snapshot: PortfolioSnapshot,
+        to_snapshot: PortfolioSnapshot
+    ) -> SnapshotDiffResponse:
+        key = (from_snapshot.id, to_snapshot.id)
+        cached = diff_cache.get(key)
+        if cached is not None:
+            return cached
+
+        rows = await SnapshotService.get_position_changes(db, from_snapshot, to_snapshot)
+        changes = [build_position_change(row) for row in rows]
+        response = SnapshotDiffResponse(
+            from_snapshot_id=from_snapshot.id,
+            to_snapshot_id=to_snapshot.id,
+            from_date=from_snapshot.snapshot_date,
+            to_date=to_snapshot.snapshot_date,
+            total_value_change=round(float(to_snapshot.total_value - from_snapshot.total_value), 2),
+            new_positions=sum(1 for c in changes if c.change_type == "new"),
+            closed_positions=sum(1 for c in changes if c.change_type == "closed"),
+            changed_positions=sum(1 for c in changes if c.change_type == "changed"),
+            changes=changes,
+        )
+        diff_cache.set(key, response)
+        return response
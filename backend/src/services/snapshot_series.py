@@ -0,0 +1,435 @@
+"""
+Snapshot Series
+
+Loads a portfolio's whole snapshot history as NumPy arrays (one element per
+snapshot, oldest first) for the analytics engines (returns, risk, ...).
+
+The series is memoized per portfolio *version*: (number of snapshots, newest
+created_at). Creating or deleting a snapshot changes the version, so stale
+series are never served, and a request that hits the cache costs one small
+aggregate query instead of a full load. The arrays live in buffers with spare
+capacity (SeriesBuffer): when the only change is newer snapshots, just those
+rows are fetched and written past the end of the arrays, so an upload costs
+O(1) instead of reloading the history; any other change rebuilds the series.
+
+PositionHistory does the same for the positions: every position of every
+snapshot as column arrays, ticker strings dictionary-encoded as int32 codes,
+laid out per snapshot (CSR style) so any snapshot or date range is a
+zero-copy slice. Numerics are cast to float in SQL, skipping the Decimal
+round trip of ORM rows. When the portfolio gains newer snapshots, only their
+positions are loaded and appended to the cached columns; any other change
+rebuilds them. It also keeps the net value traded into each snapshot (shares
+bought minus shares sold since the previous one), which the returns engines
+use to tell contributions from performance.
+
+NumPy is imported on first use so importing the API does not load it.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import LRUCache
+from src.models.security import Security
+from src.models.snapshot import PortfolioSnapshot
+from src.services.position_storage import effective_positions
+
+if TYPE_CHECKING:
+    import numpy as np
+
+PortfolioVersion = Tuple[int, Optional[datetime]]
+
+series_cache = LRUCache("snapshot_series", maxsize=1024)
+position_cache = LRUCache("position_history", maxsize=256)
+
+SERIES_COLUMNS = ("total", "equity", "fixed_income", "cash")
+POSITION_COLUMNS = ("quantity", "avg_cost", "price", "value")
+
+
+@dataclass(frozen=True)
+class SnapshotSeries:
+    """Column arrays of a portfolio's snapshots, ordered by snapshot_date"""
+    portfolio_id: str
+    version: PortfolioVersion
+    ids: "np.ndarray"  # object (snapshot id strings)
+    dates: "np.ndarray"  # datetime64[D]
+    total: "np.ndarray"  # total_value
+    equity: "np.ndarray"  # equity_value
+    fixed_income: "np.ndarray"  # fixed_income_value
+    cash: "np.ndarray"  # cash_value
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def start_index(self, start: Optional[Union[date, datetime]]) -> int:
+        """Index of the last snapshot on or before `start` (0 when there is none or `start` is None)"""
+        if start is None or not len(self):
+            return 0
+        import numpy as np
+
+        return max(int(np.searchsorted(self.dates, np.datetime64(start, "D"), side="right")) - 1, 0)
+
+    def since(self, start: Optional[Union[date, datetime]]) -> "SnapshotSeries":
+        """
+        Sub-series for a period starting at `start`.
+
+        Keeps the last snapshot on or before `start` as the opening valuation,
+        so a period always measures from a known value.
+        """
+        first = self.start_index(start)
+        if not first:
+            return self
+        return SnapshotSeries(
+            portfolio_id=self.portfolio_id,
+            version=self.version,
+            ids=self.ids[first:],
+            dates=self.dates[first:],
+            total=self.total[first:],
+            equity=self.equity[first:],
+            fixed_income=self.fixed_income[first:],
+            cash=self.cash[first:],
+        )
+
+
+def _reserve(buffer: "np.ndarray", used: int, needed: int, minimum: int) -> "np.ndarray":
+    """`buffer`, or a copy of its first `used` elements with room for `needed` (views of the old one stay valid)"""
+    import numpy as np
+
+    if needed <= len(buffer):
+        return buffer
+    grown = np.empty(max(needed, len(buffer) * 2, minimum), dtype=buffer.dtype)
+    grown[:used] = buffer[:used]
+    return grown
+
+
+class SeriesBuffer:
+    """
+    A portfolio's snapshot series in buffers with spare capacity.
+
+    `series` views the filled part of the buffers. Appending newer snapshots
+    writes past that part, so series handed out earlier stay valid.
+    """
+
+    def __init__(self, portfolio_id: str):
+        import numpy as np
+
+        self.portfolio_id = portfolio_id
+        self.last_date: Optional[datetime] = None  # snapshot_date of the newest snapshot held
+        self._count = 0
+        self._buffers = {"ids": np.empty(0, dtype=object), "dates": np.empty(0, dtype="datetime64[D]")}
+        self._buffers.update({name: np.empty(0, dtype=np.float64) for name in SERIES_COLUMNS})
+        self.series = self._view(None)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _view(self, version: Optional[PortfolioVersion]) -> SnapshotSeries:
+        return SnapshotSeries(
+            portfolio_id=self.portfolio_id,
+            version=version,
+            **{name: buffer[:self._count] for name, buffer in self._buffers.items()},
+        )
+
+    def append(self, version: PortfolioVersion, rows: list) -> None:
+        """Append (id, snapshot_date, total, equity, fixed_income, cash) rows newer than every snapshot held"""
+        import numpy as np
+
+        start, end = self._count, self._count + len(rows)
+        for name, buffer in self._buffers.items():
+            self._buffers[name] = _reserve(buffer, start, end, 64)
+        if rows:
+            ids, dates, *values = zip(*rows)
+            self._buffers["ids"][start:end] = ids
+            self._buffers["dates"][start:end] = [d.date() for d in dates]
+            for name, column in zip(SERIES_COLUMNS, values):
+                self._buffers[name][start:end] = np.array(column, dtype=np.float64)
+            self.last_date = dates[-1]
+        self._count = end
+        self.series = self._view(version)
+
+    @property
+    def version(self) -> Optional[PortfolioVersion]:
+        return self.series.version
+
+
+async def get_portfolio_version(
+    db: AsyncSession, portfolio_id: str, until: Optional[datetime] = None
+) -> PortfolioVersion:
+    """Cheap fingerprint of a portfolio's snapshots (up to `until`); changes on every create/delete"""
+    query = (
+        select(func.count(PortfolioSnapshot.id), func.max(PortfolioSnapshot.created_at))
+        .where(PortfolioSnapshot.portfolio_id == portfolio_id)
+    )
+    if until is not None:
+        query = query.where(PortfolioSnapshot.snapshot_date <= until)
+    count, newest = (await db.execute(query)).one()
+    return count, newest
+
+
+def build_series(portfolio_id: str, version: PortfolioVersion, rows: list) -> SnapshotSeries:
+    """Series of (id, snapshot_date, total, equity, fixed_income, cash) rows"""
+    buffer = SeriesBuffer(portfolio_id)
+    buffer.append(version, rows)
+    return buffer.series
+
+
+async def load_snapshot_rows(db: AsyncSession, portfolio_id: str, after: Optional[datetime] = None) -> list:
+    """Summary rows of a portfolio's snapshots (optionally only those after `after`) in date order"""
+    query = (
+        select(
+            PortfolioSnapshot.id,
+            PortfolioSnapshot.snapshot_date,
+            PortfolioSnapshot.total_value,
+            PortfolioSnapshot.equity_value,
+            PortfolioSnapshot.fixed_income_value,
+            PortfolioSnapshot.cash_value,
+        )
+        .where(PortfolioSnapshot.portfolio_id == portfolio_id)
+        .order_by(PortfolioSnapshot.snapshot_date)
+    )
+    if after is not None:
+        query = query.where(PortfolioSnapshot.snapshot_date > after)
+    result = await db.execute(query)
+    return result.all()
+
+
+async def get_snapshot_series(db: AsyncSession, portfolio_id: str) -> SnapshotSeries:
+    """
+    Memoized series of the current portfolio version.
+
+    The cached buffer is advanced in place when the snapshots it holds are
+    unchanged (same count and newest created_at up to its last date) and the
+    rest are newer; anything else rebuilds it.
+    """
+    version = await get_portfolio_version(db, portfolio_id)
+    buffer = series_cache.get(portfolio_id)
+    if buffer is not None and buffer.version == version:
+        return buffer.series
+
+    held = len(buffer) if buffer is not None else 0
+    if 0 < held < version[0]:
+        held_version = buffer.version
+        if await get_portfolio_version(db, portfolio_id, until=buffer.last_date) == held_version:
+            rows = await load_snapshot_rows(db, portfolio_id, after=buffer.last_date)
+            if buffer.version == version:
+                # A concurrent request appended the same snapshots while this one was loading
+                return buffer.series
+            if buffer.version == held_version and held + len(rows) == version[0]:
+                buffer.append(version, rows)
+                series_cache.set(portfolio_id, buffer)
+                return buffer.series
+
+    buffer = SeriesBuffer(portfolio_id)
+    buffer.append(version, await load_snapshot_rows(db, portfolio_id))
+    series_cache.set(portfolio_id, buffer)
+    return buffer.series
+
+
+def traded_value(codes: "np.ndarray", quantity: "np.ndarray", price: "np.ndarray", value: "np.ndarray",
+                 counts: "np.ndarray") -> "np.ndarray":
+    """
+    Net value of the shares bought (+) and sold (-) into each snapshot since the previous one.
+
+    Rows are grouped per snapshot (`counts` rows each). A position held in both
+    snapshots trades its quantity change at the new price, a new position its
+    whole market value and a closed one minus its last market value (the sale
+    price is unknown). The first snapshot is the opening valuation: 0.
+    """
+    import numpy as np
+
+    snapshots = len(counts)
+    if not len(codes):
+        return np.zeros(snapshots)
+    # One key per (snapshot, ticker); the same ticker in the previous snapshot is `key - stride`
+    stride = int(codes.max()) + 1
+    keys = np.repeat(np.arange(snapshots, dtype=np.int64), counts) * stride + codes
+    unique, first_row, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    held = np.bincount(inverse, weights=quantity, minlength=len(unique))
+    worth = np.bincount(inverse, weights=value, minlength=len(unique))
+    snapshot = unique // stride
+
+    def held_in(offset: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Whether each key's ticker is held `offset` snapshots away, and that key's position"""
+        other = np.minimum(np.searchsorted(unique, unique + offset * stride), len(unique) - 1)
+        return unique[other] == unique + offset * stride, other
+
+    before, previous = held_in(-1)
+    bought = np.where(before, (held - held[previous]) * price[first_row], worth)
+    bought[snapshot == 0] = 0.0
+    trades = np.bincount(snapshot, weights=bought, minlength=snapshots)
+
+    after, _ = held_in(1)
+    closed = ~after & (snapshot < snapshots - 1)
+    trades -= np.bincount(snapshot[closed] + 1, weights=worth[closed], minlength=snapshots)
+    return trades
+
+
+class PositionHistory:
+    """
+    Positions of every snapshot of a portfolio as column arrays.
+
+    Rows of snapshot i (in snapshot_date order) are offsets[i]:offsets[i + 1]
+    of ticker_codes / quantity / avg_cost / price / value; tickers[code] and
+    names[code] decode a ticker code. Columns live in buffers with spare
+    capacity, so appending a snapshot does not copy the history, and views
+    handed out earlier stay valid. trades[i] is the traded_value of snapshot i.
+    """
+
+    def __init__(self, portfolio_id: str):
+        import numpy as np
+
+        self.portfolio_id = portfolio_id
+        self.version: Optional[PortfolioVersion] = None
+        self.snapshot_ids: List[str] = []
+        self.tickers: List[str] = []
+        self.names: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._offsets = [0]
+        self._trades = np.empty(0, dtype=np.float64)
+        self._rows = 0
+        self._buffers = {name: np.empty(0, dtype=np.float64) for name in POSITION_COLUMNS}
+        self._buffers["ticker_codes"] = np.empty(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.snapshot_ids)
+
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    @property
+    def offsets(self) -> "np.ndarray":
+        import numpy as np
+
+        return np.array(self._offsets, dtype=np.int64)
+
+    @property
+    def trades(self) -> "np.ndarray":
+        """Net value traded into each snapshot (no copy)"""
+        return self._trades[:len(self)]
+
+    def column(self, name: str) -> "np.ndarray":
+        """View of one column over every row (no copy)"""
+        return self._buffers[name][:self._rows]
+
+    def rows_of(self, first: int, last: int) -> slice:
+        """Row range of snapshots first..last (inclusive)"""
+        return slice(self._offsets[first], self._offsets[last + 1])
+
+    def _reserve(self, extra: int) -> None:
+        for name, buffer in self._buffers.items():
+            self._buffers[name] = _reserve(buffer, self._rows, self._rows + extra, 1024)
+
+    def append(self, snapshot_ids: List[str], rows: list) -> None:
+        """
+        Append snapshots (newer than every snapshot held) and their positions.
+
+        `rows` are (snapshot_id, ticker, name, quantity, avg_cost, price, value)
+        grouped by snapshot in `snapshot_ids` order; rows of any other snapshot
+        are skipped.
+        """
+        import numpy as np
+
+        # load_positions may see snapshots committed after the series was read
+        position = {snapshot_id: i for i, snapshot_id in enumerate(snapshot_ids)}
+        rows = [row for row in rows if row[0] in position]
+        count = len(rows)
+        self._reserve(count)
+        start, end = self._rows, self._rows + count
+        if count:
+            row_snapshots, tickers, names, *values = zip(*rows)
+            codes = self._buffers["ticker_codes"]
+            for i, (ticker, name) in enumerate(zip(tickers, names)):
+                code = self._codes.get(ticker)
+                if code is None:
+                    code = self._codes[ticker] = len(self.tickers)
+                    self.tickers.append(ticker)
+                    self.names.append(name)
+                else:
+                    self.names[code] = name  # Latest name wins
+                codes[start + i] = code
+            for name, column in zip(POSITION_COLUMNS, values):
+                self._buffers[name][start:end] = np.array(column, dtype=np.float64)
+        else:
+            row_snapshots = ()
+
+        # Rows arrive grouped by snapshot: count per snapshot -> CSR offsets
+        counts = np.bincount([position[s] for s in row_snapshots], minlength=len(snapshot_ids))
+        held = len(self)
+        self._offsets.extend((start + np.cumsum(counts)).tolist())
+        self.snapshot_ids.extend(snapshot_ids)
+        self._rows = end
+
+        # Trades into the new snapshots, measured from the last snapshot held before them
+        first = max(held - 1, 0)
+        rows = self.rows_of(first, len(self) - 1)
+        trades = traded_value(
+            self.column("ticker_codes")[rows],
+            self.column("quantity")[rows],
+            self.column("price")[rows],
+            self.column("value")[rows],
+            np.diff(self._offsets[first:]),
+        )
+        self._trades = _reserve(self._trades, held, len(self), 64)
+        self._trades[held:len(self)] = trades[held - first:]
+
+
+async def load_positions(db: AsyncSession, portfolio_id: str, after: Optional[datetime] = None) -> list:
+    """Position rows of a portfolio (optionally only of snapshots after `after`), grouped by snapshot in date order"""
+    positions = effective_positions()
+    query = (
+        select(
+            positions.snapshot_id,
+            positions.ticker,
+            Security.name,
+            cast(positions.quantity, Float),
+            cast(positions.avg_cost, Float),
+            cast(positions.current_price, Float),
+            cast(positions.market_value, Float),
+        )
+        .join(Security, Security.id == positions.security_id)
+        .where(positions.portfolio_id == portfolio_id)
+        .order_by(positions.snapshot_date, positions.id)
+    )
+    if after is not None:
+        query = query.where(positions.snapshot_date > after)
+    result = await db.execute(query)
+    return result.all()
+
+
+async def get_position_history(db: AsyncSession, portfolio_id: str) -> Tuple[SnapshotSeries, PositionHistory]:
+    """
+    Snapshot series and position columns of the current portfolio version.
+
+    The cached columns are advanced in place when the only change is newer
+    snapshots (one query for their positions); anything else rebuilds them.
+    """
+    series = await get_snapshot_series(db, portfolio_id)
+    history = position_cache.get(portfolio_id)
+    if history is not None and history.version == series.version:
+        return series, history
+
+    held = len(history) if history is not None else 0
+    appendable = (
+        history is not None
+        and 0 < held < len(series)
+        and series.ids[:held].tolist() == history.snapshot_ids
+    )
+    if appendable:
+        last_date = datetime.combine(series.dates[held - 1].astype(date), datetime.min.time())
+        rows = await load_positions(db, portfolio_id, after=last_date)
+        if history.version == series.version:
+            # A concurrent request appended the same snapshots while this one was loading
+            return series, history
+        appendable = len(history) == held
+    if appendable:
+        history.append(series.ids[held:].tolist(), rows)
+    else:
+        history = PositionHistory(portfolio_id)
+        history.append(series.ids.tolist(), await load_positions(db, portfolio_id))
+    history.version = series.version
+    position_cache.set(portfolio_id, history)
+    return series, history
@@ -8,13 +8,22 @@ All heavy lifting happens in the backend - frontend just displays results.
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, delete, and_, or_, desc, func, tuple_
 
 from src.models.snapshot import PortfolioSnapshot, SnapshotPosition, UploadHistory
 from src.models.portfolio import Portfolio
+from src.models.security import Security
+from src.core.pagination import SnapshotKey
+from src.services.partitions import PartitionService
+from src.services.position_storage import PositionStorage, attach_positions, effective_positions, positions_of
+from src.services.rollups import RollupService
+from src.services.securities import SecurityService
+
+# Sort keys accepted by get_holdings: position columns (market value and gain are backed by
+# indexes), or "name" which joins the security master
+HOLDING_SORT_COLUMNS = ("market_value", "unrealized_gain", "unrealized_gain_percent", "quantity", "ticker", "name")
 
 
 class SnapshotService:
@@ -76,9 +85,11 @@ class SnapshotService:
         This method:
         1. Creates UploadHistory record with file hash
         2. Creates PortfolioSnapshot with summary data
-        3. Creates SnapshotPosition records for each holding
+        3. Creates SnapshotPosition records for each holding (registering unknown tickers in the security master);
+           with delta storage only the ones that differ from the keyframe snapshot
         4. Calculates month-over-month changes vs. previous snapshot
-        5. Commits everything in a transaction
+        5. Updates the month/quarter/year rollups and the portfolio's snapshot counter
+        6. Commits everything in a transaction
 
         Args:
             db: Database session
@@ -92,6 +103,10 @@ class SnapshotService:
         Returns:
             The created PortfolioSnapshot with all relationships loaded
         """
+        # Yearly partition of the statement date (own transaction, before this one locks the tables)
+        statement_date = datetime.fromisoformat(upload_data["statement_date"])
+        await PartitionService.ensure_years(db, [statement_date.year])
+
         # 1. Create upload history record
         file_hash = UploadHistory.compute_file_hash(file_content)
         upload_id = str(uuid.uuid4())
@@ -102,7 +117,7 @@ class SnapshotService:
             filename=filename,
             file_hash=file_hash,
             file_size_bytes=len(file_content),
-            statement_date=datetime.fromisoformat(upload_data["statement_date"]),
+            statement_date=statement_date,
             account_holder=upload_data["account_holder"],
             uploaded_at=datetime.utcnow(),
             upload_ip=upload_ip,
@@ -111,11 +126,10 @@ class SnapshotService:
         db.add(upload_history)
 
         # 2. Get previous snapshot for change calculation
-        previous_snapshot = await SnapshotService.get_latest_snapshot(db, portfolio_id)
+        previous_snapshot = await SnapshotService.get_latest_snapshot(db, portfolio_id, with_positions=False)
 
         # 3. Create portfolio snapshot
         snapshot_id = str(uuid.uuid4())
-        statement_date = datetime.fromisoformat(upload_data["statement_date"])
         portfolio_summary = upload_data["portfolio_summary"]
 
         total_value = Decimal(str(portfolio_summary["total_value"]))
@@ -144,13 +158,15 @@ class SnapshotService:
         )
         db.add(portfolio_snapshot)
 
-        # 4. Create snapshot positions
-        for position_data in upload_data["breakdown"]:
-            position = SnapshotPosition(
+        # 4. Create snapshot positions (name / asset class come from the security master)
+        security_ids = await SecurityService.resolve(db, upload_data["breakdown"])
+        positions = [
+            SnapshotPosition(
                 snapshot_id=snapshot_id,
+                portfolio_id=portfolio_id,
+                snapshot_date=statement_date,
                 ticker=position_data["ticker"],
-                name=position_data["name"],
-                asset_type="Stock",  # Could be inferred from ticker if needed
+                security_id=security_ids[position_data["ticker"]],
                 quantity=Decimal(str(position_data["quantity"])),
                 avg_cost=Decimal(str(position_data["avg_cost"])),
                 current_price=Decimal(str(position_data["current_price"])),
@@ -159,61 +175,242 @@ class SnapshotService:
                 unrealized_gain_percent=Decimal(str(position_data["unrealized_gain_percent"])),
                 created_at=datetime.utcnow()
             )
-            db.add(position)
+            for position_data in upload_data["breakdown"]
+        ]
 
-        # 5. Commit transaction
+        # Delta storage: positions unchanged since the keyframe are inherited, not written
+        delta = await PositionStorage.plan_delta(db, previous_snapshot, positions)
+        if delta:
+            portfolio_snapshot.base_snapshot_id, positions, portfolio_snapshot.removed_tickers = delta
+        db.add_all(positions)
+
+        # 5. Re-aggregate the rollup periods containing the statement date, bump the counter
+        await db.flush()
+        await RollupService.refresh(db, portfolio_id, statement_date)
+        await SnapshotService._count_snapshots(db, portfolio_id, 1)
+
+        # 6. Commit transaction
         await db.commit()
 
-        # 6. Return the snapshot object directly
+        # 7. Return the snapshot object directly
         # Note: positions are not loaded to avoid session issues in bulk operations
         return portfolio_snapshot
 
     @staticmethod
     async def get_latest_snapshot(
         db: AsyncSession,
-        portfolio_id: str
+        portfolio_id: str,
+        with_positions: bool = True
     ) -> Optional[PortfolioSnapshot]:
-        """Get the most recent snapshot for a portfolio with positions eagerly loaded"""
-        result = await db.execute(
+        """
+        Get the most recent snapshot for a portfolio.
+        Positions are eagerly loaded (delta snapshots completed from their keyframe)
+        unless with_positions=False (summary values only).
+        """
+        query = (
             select(PortfolioSnapshot)
-            .options(selectinload(PortfolioSnapshot.positions))
             .where(PortfolioSnapshot.portfolio_id == portfolio_id)
             .order_by(desc(PortfolioSnapshot.snapshot_date))
             .limit(1)
         )
-        return result.scalar_one_or_none()
+        result = await db.execute(query)
+        snapshot = result.scalar_one_or_none()
+        if with_positions and snapshot:
+            await attach_positions(db, [snapshot])
+        return snapshot
 
     @staticmethod
     async def get_snapshots_history(
         db: AsyncSession,
         portfolio_id: str,
-        limit: int = 12
+        limit: int = 12,
+        before: Optional[SnapshotKey] = None,
+        with_positions: bool = True
     ) -> List[PortfolioSnapshot]:
         """
         Get historical snapshots for a portfolio, ordered by date descending.
         Default limit of 12 for 12 months of data.
+
+        `before` is the (snapshot_date, id) key of the last snapshot of the previous
+        page (keyset pagination): the page starts right after it with a range scan on
+        idx_portfolio_snapshot_summary, so deep pages cost the same as the first one.
         """
-        result = await db.execute(
+        query = (
             select(PortfolioSnapshot)
-            .options(selectinload(PortfolioSnapshot.positions))
             .where(PortfolioSnapshot.portfolio_id == portfolio_id)
-            .order_by(desc(PortfolioSnapshot.snapshot_date))
+            .order_by(desc(PortfolioSnapshot.snapshot_date), desc(PortfolioSnapshot.id))
             .limit(limit)
         )
-        return list(result.scalars().all())
+        if before is not None:
+            query = query.where(
+                tuple_(PortfolioSnapshot.snapshot_date, PortfolioSnapshot.id) < tuple_(*before),
+                # Redundant with the row comparison, but prunes the newer yearly partitions
+                PortfolioSnapshot.snapshot_date <= before[0],
+            )
+        result = await db.execute(query)
+        snapshots = list(result.scalars().all())
+        if with_positions:
+            await attach_positions(db, snapshots)
+        return snapshots
+
+    @staticmethod
+    async def get_holdings(
+        db: AsyncSession,
+        snapshot: PortfolioSnapshot,
+        sort: str = "market_value",
+        descending: bool = True,
+        asset_type: Optional[str] = None,
+        ticker: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Tuple[list, int]:
+        """
+        One page of a snapshot's positions, filtered and sorted in SQL.
+
+        `ticker` matches as a prefix (case-insensitive). `asset_type` and sorting
+        by name join the (small) securities table; other requests read
+        snapshot_positions only. Returns (position rows with the columns of
+        SnapshotPosition, total matching positions); without `limit` every
+        matching position. A page reads only `limit` rows off the sort index;
+        the total is a separate index-only count (a window count would force
+        reading every matching row), skipped when the rows read run to the end
+        of the matches. Delta snapshots are paged over their
+        effective positions.
+        """
+        if sort not in HOLDING_SORT_COLUMNS:
+            raise ValueError(f"sort must be one of {HOLDING_SORT_COLUMNS}")
+        positions = positions_of(snapshot)
+        sort_column = Security.name if sort == "name" else getattr(positions, sort)
+        order = [desc(sort_column), desc(positions.id)] if descending else [sort_column, positions.id]
+
+        # snapshot_date prunes the scan to the snapshot's yearly partition
+        conditions = [positions.snapshot_id == snapshot.id, positions.snapshot_date == snapshot.snapshot_date]
+        if asset_type:
+            conditions.append(Security.asset_class == asset_type)
+        if ticker:
+            conditions.append(positions.ticker.startswith(ticker.upper(), autoescape=True))
+
+        def from_positions(*columns):
+            query = select(*columns)
+            if asset_type or sort == "name":
+                query = query.join(Security, Security.id == positions.security_id)
+            return query.where(*conditions)
+
+        columns = [getattr(positions, column.key) for column in SnapshotPosition.__table__.c]
+        result = await db.execute(
+            from_positions(*columns)
+            .order_by(*order)
+            .limit(limit)
+            .offset(offset)
+        )
+        rows = list(result.all())
+        if limit is None and (rows or not offset):
+            # Everything from `offset` on was read (an offset past the end still needs the count)
+            return rows, offset + len(rows)
+        total = await db.scalar(from_positions(func.count(positions.id)))
+        return rows, total
+
+    @staticmethod
+    async def get_ticker_history(
+        db: AsyncSession,
+        portfolio_id: str,
+        ticker: str
+    ) -> list:
+        """
+        Get one ticker's position in every snapshot of a portfolio, oldest first.
+
+        Single range scan on idx_position_portfolio_ticker_date (plus the keyframe
+        rows inherited by delta snapshots); returns rows of
+        (snapshot_date, security_id, quantity, avg_cost, current_price, market_value,
+        unrealized_gain, unrealized_gain_percent).
+        """
+        positions = effective_positions()
+        result = await db.execute(
+            select(
+                positions.snapshot_date,
+                positions.security_id,
+                positions.quantity,
+                positions.avg_cost,
+                positions.current_price,
+                positions.market_value,
+                positions.unrealized_gain,
+                positions.unrealized_gain_percent,
+            )
+            .where(and_(
+                positions.portfolio_id == portfolio_id,
+                positions.ticker == ticker
+            ))
+            .order_by(positions.snapshot_date)
+        )
+        return list(result.all())
+
+    @staticmethod
+    async def get_position_changes(
+        db: AsyncSession,
+        from_snapshot: PortfolioSnapshot,
+        to_snapshot: PortfolioSnapshot
+    ) -> list:
+        """
+        Get the positions that differ between two snapshots, in one query.
+
+        Positions (effective ones for a delta snapshot) are summed per ticker in
+        each snapshot (read from its yearly partition only) and FULL OUTER JOINed on
+        ticker; rows present in both with the same quantity and price are dropped.
+        Returns rows of (ticker, name, quantity_before, quantity_after,
+        price_before, price_after, value_before, value_after), with None on the
+        missing side for new and closed positions.
+        """
+        def per_ticker(snapshot: PortfolioSnapshot):
+            positions = positions_of(snapshot)
+            return (
+                select(
+                    positions.ticker,
+                    func.max(Security.name).label("name"),
+                    func.sum(positions.quantity).label("quantity"),
+                    func.max(positions.current_price).label("price"),
+                    func.sum(positions.market_value).label("value"),
+                )
+                .join(Security, Security.id == positions.security_id)
+                .where(positions.snapshot_id == snapshot.id, positions.snapshot_date == snapshot.snapshot_date)
+                .group_by(positions.ticker)
+                .subquery()
+            )
+
+        before = per_ticker(from_snapshot)
+        after = per_ticker(to_snapshot)
+        result = await db.execute(
+            select(
+                func.coalesce(after.c.ticker, before.c.ticker).label("ticker"),
+                func.coalesce(after.c.name, before.c.name).label("name"),
+                before.c.quantity, after.c.quantity,
+                before.c.price, after.c.price,
+                before.c.value, after.c.value,
+            )
+            .select_from(before.join(after, before.c.ticker == after.c.ticker, full=True))
+            .where(or_(
+                before.c.ticker.is_(None),
+                after.c.ticker.is_(None),
+                before.c.quantity != after.c.quantity,
+                before.c.price != after.c.price,
+            ))
+            .order_by(func.coalesce(after.c.ticker, before.c.ticker))
+        )
+        return list(result.all())
 
     @staticmethod
     async def get_snapshot_by_id(
         db: AsyncSession,
         snapshot_id: str
     ) -> Optional[PortfolioSnapshot]:
-        """Get a specific snapshot with all positions"""
+        """Get a specific snapshot with all positions (a delta snapshot is completed from its keyframe)"""
         result = await db.execute(
             select(PortfolioSnapshot)
-            .options(selectinload(PortfolioSnapshot.positions))
             .where(PortfolioSnapshot.id == snapshot_id)
         )
-        return result.scalar_one_or_none()
+        snapshot = result.scalar_one_or_none()
+        if snapshot:
+            await attach_positions(db, [snapshot])
+        return snapshot
 
     @staticmethod
     async def delete_snapshot(
@@ -222,18 +419,44 @@ class SnapshotService:
     ) -> bool:
         """
         Delete a snapshot and all its positions.
-        Upload history is preserved (SET NULL on upload_id).
+        Upload history is preserved (SET NULL on upload_id); delta snapshots based on it
+        are stored in full first.
+        Rollups of the snapshot's periods are re-aggregated in the same transaction.
         Returns True if deleted, False if not found.
         """
+        # Locked before its dependents are written out: a delta being uploaded against it holds
+        # it FOR KEY SHARE (PositionStorage.plan_delta), so this waits for that delta to commit
         result = await db.execute(
             select(PortfolioSnapshot)
             .where(PortfolioSnapshot.id == snapshot_id)
+            .with_for_update()
         )
         snapshot = result.scalar_one_or_none()
 
         if not snapshot:
             return False
 
-        await db.delete(snapshot)
+        portfolio_id, snapshot_date = snapshot.portfolio_id, snapshot.snapshot_date
+        # Delta snapshots based on this one get their inherited positions written out first.
+        # Deleted in SQL (positions go with the FK cascade): a delta snapshot's loaded
+        # positions collection also holds its keyframe's rows, which must not cascade.
+        await PositionStorage.materialize_dependents(db, snapshot_id)
+        await db.execute(
+            delete(PortfolioSnapshot)
+            .where(PortfolioSnapshot.id == snapshot_id, PortfolioSnapshot.snapshot_date == snapshot_date)
+        )
+        await db.flush()
+        await RollupService.refresh(db, portfolio_id, snapshot_date)
+        await SnapshotService._count_snapshots(db, portfolio_id, -1)
         await db.commit()
         return True
+
+    @staticmethod
+    async def _count_snapshots(db: AsyncSession, portfolio_id: str, delta: int) -> None:
+        """Adjust Portfolio.snapshot_count in SQL (atomic, no read-modify-write race)"""
+        await db.execute(
+            update(Portfolio)
+            .where(Portfolio.id == portfolio_id)
+            .values(snapshot_count=Portfolio.snapshot_count + delta)
+            .execution_options(synchronize_session=False)
+        )
@@ -0,0 +1,29 @@
+"""
+Settings without defaults, set before the app modules are imported.
+
+Values already in the environment win. Tests on a database (tests/database.py)
+are skipped when it is unreachable.
+"""
+
+import os
+
+import pytest
+
+REQUIRED_SETTINGS = {
+    "PROJECT_NAME": "Financial Dashboard API",
+    "SECRET_KEY": "test",
+    "AUTH0_DOMAIN": "example.auth0.com",
+    "AUTH0_AUDIENCE": "https://api.example.com",
+    "POSTGRES_SERVER": "localhost",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_DB": "financial_db",
+}
+
+for name, value in REQUIRED_SETTINGS.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
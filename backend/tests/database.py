@@ -0,0 +1,102 @@
+"""
+Throwaway accounts on the local database (python -m benchmarks.seed, or just migrated).
+
+Each test gets its own event loop (anyio), so the engine's pooled connections
+are disposed of with the account. api_client() calls the app in that same loop
+as the account's user (benchmarks.loadtest_app's authentication stub).
+"""
+
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+import httpx
+import pytest
+from sqlalchemy import delete, inspect
+from sqlalchemy.exc import DBAPIError
+
+from src.core.config import settings
+from src.core.database import SessionLocal, engine
+from src.models.portfolio import Portfolio
+from src.models.user import User
+from src.services.snapshot_service import SnapshotService
+
+
+@dataclass(frozen=True)
+class Account:
+    user_id: str
+    portfolio_id: str
+
+
+def statement(day: str, cash: float, positions) -> dict:
+    """Parsed statement (create_snapshot's upload_data) of [(ticker, quantity, avg_cost, price)]"""
+    breakdown = []
+    for ticker, quantity, avg_cost, price in positions:
+        gain = round((price - avg_cost) * quantity, 2)
+        breakdown.append({
+            "ticker": ticker,
+            "name": ticker,
+            "quantity": quantity,
+            "avg_cost": avg_cost,
+            "current_price": price,
+            "market_value": round(price * quantity, 2),
+            "unrealized_gain": gain,
+            "unrealized_gain_percent": round(gain / (avg_cost * quantity) * 100, 2),
+        })
+    equity = round(sum(p["market_value"] for p in breakdown), 2)
+    return {
+        "statement_date": day,
+        "account_holder": "Test Account",
+        "currency": "MXN",
+        "portfolio_summary": {
+            "total_value": equity + cash, "equity_value": equity,
+            "fixed_income_value": 0, "cash_value": cash,
+        },
+        "breakdown": breakdown,
+    }
+
+
+async def upload(account: Account, day: str, cash: float, positions) -> str:
+    """Upload a statement in its own session; returns the snapshot id"""
+    async with SessionLocal() as db:
+        snapshot = await SnapshotService.create_snapshot(
+            db, account.portfolio_id, statement(day, cash, positions),
+            f"{account.portfolio_id} {day}".encode(), f"{day}.pdf", account.user_id,
+        )
+        return inspect(snapshot).identity[0]  # Expired by the commit
+
+
+@asynccontextmanager
+async def api_client(account: Account):
+    """HTTP client of the API (without its lifespan) authenticated as the account's user"""
+    from benchmarks.loadtest_app import LOADTEST_USER_HEADER, app
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url=f"http://test{settings.API_V1_STR}",
+        headers={LOADTEST_USER_HEADER: f"test|{account.user_id}"},
+    ) as client:
+        yield client
+
+
+@asynccontextmanager
+async def temporary_account():
+    """User with one empty portfolio, deleted (with everything it owns) on exit; skips without a database"""
+    if settings.ENVIRONMENT == "production":
+        pytest.skip("never writes test accounts to a production environment")
+    user_id, portfolio_id = str(uuid.uuid4()), str(uuid.uuid4())
+    try:
+        async with SessionLocal() as db:
+            db.add(User(id=user_id, auth0_id=f"test|{user_id}", email=f"{user_id}@test.invalid"))
+            db.add(Portfolio(id=portfolio_id, user_id=user_id, name="Test"))
+            await db.commit()
+    except (OSError, DBAPIError) as error:
+        await engine.dispose()
+        pytest.skip(f"no database: {error}")
+    try:
+        yield Account(user_id, portfolio_id)
+    finally:
+        async with SessionLocal() as db:
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
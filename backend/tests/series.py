@@ -0,0 +1,30 @@
+"""Snapshot series and position histories built in memory, without a database"""
+
+from datetime import datetime
+
+from src.services.snapshot_series import PositionHistory, build_series
+
+VERSION = (0, None)
+
+
+def position_rows(snapshots):
+    return [
+        (f"s{i}", ticker, ticker, quantity, avg_cost, price, quantity * price)
+        for i, (_, _, positions) in enumerate(snapshots)
+        for ticker, quantity, avg_cost, price in positions
+    ]
+
+
+def summary_rows(snapshots):
+    rows = []
+    for i, (day, cash, positions) in enumerate(snapshots):
+        equity = sum(quantity * price for _, quantity, _, price in positions)
+        rows.append((f"s{i}", datetime.fromisoformat(day), equity + cash, equity, 0.0, cash))
+    return rows
+
+
+def make(snapshots):
+    """Series and position history of [(date, cash, [(ticker, quantity, avg_cost, price)])], ids s0, s1, ..."""
+    history = PositionHistory("p")
+    history.append([f"s{i}" for i in range(len(snapshots))], position_rows(snapshots))
+    return build_series("p", VERSION, summary_rows(snapshots)), history
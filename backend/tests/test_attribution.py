@@ -0,0 +1,75 @@
+"""
+Return attribution: the parts always add up to the total change.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from src.services.attribution import PositionMatrix, attribute
+from tests.series import make
+
+PARTS = ("priceEffect", "quantityEffect", "newPositionsEffect", "closedPositionsEffect", "fixedIncomeChange", "cashChange", "residual")
+
+
+def trading_months(months: int):
+    """Four tickers repriced every month; some bought, sold out or bought back"""
+    rng = random.Random(11)
+    price = {"AAPL": 150.0, "MSFT": 300.0, "NVDA": 400.0, "VOO": 380.0}
+    quantity = {"AAPL": 10, "MSFT": 5, "NVDA": 0, "VOO": 8}
+    cash = 5_000.0
+    snapshots = []
+    for month in range(months):
+        for ticker in price:
+            price[ticker] = round(price[ticker] * rng.uniform(0.92, 1.1), 2)
+        ticker = rng.choice(sorted(price))
+        if rng.random() < 0.5:
+            quantity[ticker] += rng.randint(1, 5)
+        else:
+            quantity[ticker] = 0
+        cash = round(cash + rng.uniform(-200, 500), 2)
+        positions = [(t, q, 100.0, price[t]) for t, q in sorted(quantity.items()) if q]
+        snapshots.append((f"{2021 + month // 12}-{month % 12 + 1:02d}-01", cash, positions))
+    return snapshots
+
+
+def attribution(snapshots, first, last, mode):
+    series, history = make(snapshots)
+    columns = np.arange(first, last + 1) if mode == "range" else np.array([first, last])
+    return attribute(PositionMatrix(series, history, columns), mode)
+
+
+def test_pair_effects():
+    result = attribution([
+        ("2024-01-01", 100.0, [("AAPL", 10, 100.0, 100.0), ("MSFT", 2, 300.0, 300.0)]),
+        ("2024-02-01", 50.0, [("AAPL", 12, 100.0, 110.0), ("NVDA", 1, 400.0, 400.0)]),
+    ], 0, 1, "pair")
+    assert result.priceEffect == 100.0  # 10 x (110 - 100)
+    assert result.quantityEffect == 220.0  # 2 x 110
+    assert result.newPositionsEffect == 400.0
+    assert result.closedPositionsEffect == -600.0
+    assert result.cashChange == -50.0 and result.residual == 0.0
+    assert result.totalChange == 70.0  # 1770 - 1700
+    assert {p.ticker: p.totalEffect for p in result.positions} == {"AAPL": 320.0, "MSFT": -600.0, "NVDA": 400.0}
+
+
+@pytest.mark.parametrize("mode", ["pair", "range"])
+def test_parts_sum_to_total_change(mode):
+    snapshots = trading_months(30)
+    result = attribution(snapshots, 3, 27, mode)
+    assert sum(getattr(result, part) for part in PARTS) == pytest.approx(result.totalChange, abs=0.05)
+    assert result.residual == pytest.approx(0.0, abs=0.05)  # Equity is exactly the listed positions
+    assert sum(p.totalEffect for p in result.positions) == pytest.approx(
+        result.priceEffect + result.quantityEffect + result.newPositionsEffect + result.closedPositionsEffect, abs=0.5
+    )
+
+
+def test_range_intervals_sum_to_range_totals():
+    result = attribution(trading_months(30), 3, 27, "range")
+    assert len(result.intervals) == result.snapshots - 1 == 24
+    for interval in result.intervals:
+        assert sum(getattr(interval, part) for part in PARTS) == pytest.approx(interval.totalChange, abs=0.05)
+    for part in PARTS + ("totalChange",):
+        assert sum(getattr(interval, part) for interval in result.intervals) == pytest.approx(getattr(result, part), abs=0.5)
+    assert result.endValue - result.startValue == pytest.approx(result.totalChange, abs=0.01)
@@ -0,0 +1,65 @@
+"""
+LTTB downsampling of the value history, against a plain-Python reference.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from src.services.downsample import lttb
+
+
+def reference_lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets as originally described, one point at a time"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected, previous = [0], 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, n)
+        if i == threshold - 3:
+            next_start, next_end = n - 1, n
+        next_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        next_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        areas = [
+            abs((x[previous] - next_x) * (y[j] - y[previous]) - (x[previous] - x[j]) * (next_y - y[previous]))
+            for j in range(start, end)
+        ]
+        previous = start + areas.index(max(areas))
+        selected.append(previous)
+    return selected + [n - 1]
+
+
+def random_walk(n, seed):
+    rng = random.Random(seed)
+    x = np.cumsum([rng.choice([28.0, 30.0, 31.0]) for _ in range(n)])
+    y = np.cumsum([rng.gauss(0, 1000) for _ in range(n)]) + 100_000
+    return x, y
+
+
+@pytest.mark.parametrize("n, threshold", [(10, 3), (100, 7), (1000, 100), (1001, 250), (5000, 4999)])
+def test_matches_reference(n, threshold):
+    x, y = random_walk(n, seed=n)
+    keep = lttb(x, y, threshold)
+    assert len(keep) == threshold
+    assert keep[0] == 0 and keep[-1] == n - 1
+    # One point from each of the threshold - 2 equal buckets between the first and last
+    buckets = threshold - 2
+    for i, index in enumerate(keep[1:-1]):
+        assert i * (n - 2) // buckets + 1 <= index < (i + 1) * (n - 2) // buckets + 1
+    assert keep.tolist() == reference_lttb(x.tolist(), y.tolist(), threshold)
+
+
+@pytest.mark.parametrize("threshold", [2, 10, 11])
+def test_short_series_kept_whole(threshold):
+    x, y = random_walk(10, seed=1)
+    assert lttb(x, y, threshold).tolist() == list(range(10))
+
+
+def test_spike_survives():
+    x = np.arange(500, dtype=np.float64)
+    y = np.full(500, 100.0)
+    y[137], y[401] = 1_000.0, -500.0
+    keep = lttb(x, y, 20).tolist()
+    assert 137 in keep and 401 in keep
@@ -0,0 +1,49 @@
+"""
+Streamed snapshot export read back from its bytes.
+"""
+
+import io
+from datetime import date
+from decimal import Decimal
+
+import pyarrow.parquet as pq
+import pytest
+
+from src.core.config import settings
+from src.services.export import EXPORT_COLUMNS, export_snapshots
+from tests.database import temporary_account, upload
+
+pytestmark = pytest.mark.anyio
+
+STATEMENTS = [
+    ("2024-01-31", 1000.0, [("AAPL", 10, 100.0, 120.0), ("MSFT", 5, 300.0, 310.0)]),
+    ("2024-02-29", 2500.0, []),
+    ("2024-03-31", 0.0, [("AAPL", 10, 100.0, 130.0), ("MSFT", 5, 300.0, 305.5), ("NVDA", 2, 400.0, 450.0)]),
+]
+
+
+def by_snapshot_and_ticker(row):
+    return row[0], row[1] or ""
+
+
+async def test_parquet_export_reads_back(monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_ROWS", 2)
+    async with temporary_account() as account:
+        for day, cash, positions in STATEMENTS:
+            await upload(account, day, cash, positions)
+        parts = [part async for part in export_snapshots(account.portfolio_id, "parquet")]
+
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(parts)))
+    assert parquet.schema_arrow.names == EXPORT_COLUMNS
+    assert parquet.metadata.num_row_groups == 3  # One per chunk of 2 rows
+    rows = parquet.read().to_pylist()
+
+    expected = []
+    for day, _, positions in STATEMENTS:
+        if not positions:
+            expected.append((date.fromisoformat(day), None, None, None))
+        for ticker, quantity, _, price in positions:
+            expected.append((date.fromisoformat(day), ticker, Decimal(quantity), Decimal(str(round(quantity * price, 2)))))
+    exported = [(row["snapshot_date"], row["ticker"], row["quantity"], row["market_value"]) for row in rows]
+    assert sorted(exported, key=by_snapshot_and_ticker) == expected
+    assert {row["snapshot_date"]: row["cash_value"] for row in rows}[date(2024, 2, 29)] == Decimal("2500.00")
@@ -0,0 +1,99 @@
+"""
+Holdings (/portfolio/transactions): SQL sorting, filtering and paging against
+the same operations done in Python on the uploaded statement.
+"""
+
+import random
+import uuid
+
+import pytest
+from sqlalchemy import delete
+
+from src.core.config import settings
+from src.core.database import SessionLocal, engine
+from src.models.security import Security
+from tests.database import api_client, temporary_account, upload
+
+pytestmark = pytest.mark.anyio
+
+SORTS = ["market_value", "unrealized_gain", "unrealized_gain_percent", "quantity", "ticker", "name"]
+WINDOWS = [(None, 0), (None, 10), (5, 0), (5, 5), (7, 20), (10, 100)]
+
+
+def holdings_statement(tag: str, count: int):
+    """(positions, names): tickers Q<tag>A.. and Q<tag>B.., every third one an ETF, repeated quantities"""
+    rng = random.Random(5)
+    numbers = list(range(count))
+    rng.shuffle(numbers)  # Name order differs from ticker order
+    positions, names = [], {}
+    for i in range(count):
+        ticker = f"Q{tag}{'AB'[i % 2]}{i:02d}"
+        names[ticker] = f"Holding {numbers[i]:02d}" + (" ETF" if i % 3 == 0 else "")
+        price = round(rng.uniform(10, 500), 2)
+        positions.append((ticker, rng.choice([5, 10, 20]), round(price * rng.uniform(0.7, 1.3), 2), price))
+    return positions, names
+
+
+def expected_page(holdings, ids, sort, descending, asset_type, prefix, limit, offset):
+    """Tickers of the page, sorted like SQL: by the column, then by position id, both in `order`"""
+    matching = [
+        h for h in holdings
+        if (asset_type is None or h["type"] == asset_type) and (prefix is None or h["ticker"].startswith(prefix.upper()))
+    ]
+    matching.sort(key=lambda h: (h[sort], ids[h["ticker"]]), reverse=descending)
+    page = matching[offset:offset + limit if limit is not None else None]
+    return [h["ticker"] for h in page], len(matching)
+
+
+@pytest.mark.parametrize("storage", ["full", "delta"])
+async def test_holdings_match_python_baseline(monkeypatch, storage):
+    monkeypatch.setattr(settings, "SNAPSHOT_POSITION_STORAGE", storage)
+    tag = uuid.uuid4().hex[:6].upper()
+    positions, names = holdings_statement(tag, 24)
+    created = False
+    try:
+        async with temporary_account() as account:
+            created = True
+            async with SessionLocal() as db:
+                db.add_all(
+                    Security(ticker=t, name=n, asset_class="ETF" if n.endswith("ETF") else "Stock") for t, n in names.items()
+                )
+                await db.commit()
+            # The latest snapshot repeats most positions of the previous one (a delta in delta storage)
+            await upload(account, "2024-01-31", 100.0, positions[:20] + [(f"Q{tag}C99", 1, 1.0, 1.0)])
+            latest = positions[:10] + [(t, q, c, round(p * 1.1, 2)) for t, q, c, p in positions[10:]]
+            await upload(account, "2024-02-29", 100.0, latest)
+
+            async with api_client(account) as client:
+                everything = (await client.get("/portfolio/transactions")).json()
+                ids = {item["ticker"]: int(item["id"]) for item in everything["items"]}
+                holdings = [
+                    {
+                        "ticker": item["ticker"], "name": item["name"], "type": item["type"],
+                        "quantity": item["details"]["quantity"], "market_value": item["financials"]["totalValue"],
+                        "unrealized_gain": item["financials"]["unrealizedGain"],
+                        "unrealized_gain_percent": item["financials"]["unrealizedGainPercent"],
+                    }
+                    for item in everything["items"]
+                ]
+                assert sorted(ids) == sorted(t for t, *_ in latest) and everything["count"] == len(latest)
+                assert {h["ticker"]: h["name"] for h in holdings} == names
+
+                for sort in SORTS:
+                    for order in ("asc", "desc"):
+                        for asset_type, prefix in [(None, None), ("ETF", None), ("Stock", f"q{tag.lower()}b")]:
+                            for limit, offset in WINDOWS:
+                                params = {"sort": sort, "order": order, "offset": offset}
+                                params.update({k: v for k, v in (("limit", limit), ("asset_type", asset_type), ("ticker", prefix)) if v})
+                                response = (await client.get("/portfolio/transactions", params=params)).json()
+                                expected, count = expected_page(
+                                    holdings, ids, sort, order == "desc", asset_type, prefix, limit, offset
+                                )
+                                assert [item["ticker"] for item in response["items"]] == expected, params
+                                assert response["count"] == count, params
+    finally:
+        if created:  # Once the account's positions no longer reference them
+            async with SessionLocal() as db:
+                await db.execute(delete(Security).where(Security.ticker.startswith(f"Q{tag}")))
+                await db.commit()
+            await engine.dispose()
@@ -0,0 +1,56 @@
+"""
+Cached position history against uploads racing its queries.
+
+get_position_history reads the snapshot series, then the positions; an upload
+committed in between must neither break the request nor leave the cache ahead
+of (or out of step with) the series it is versioned by.
+"""
+
+import pytest
+
+from src.core.database import SessionLocal
+from src.services import snapshot_series
+from src.services.snapshot_series import PositionHistory, get_position_history, position_cache
+from tests.database import temporary_account, upload
+
+pytestmark = pytest.mark.anyio
+
+HOLDINGS = [("AAPL", 10, 100.0, 120.0), ("MSFT", 5, 300.0, 310.0)]
+
+
+@pytest.mark.parametrize("cached", [True, False], ids=["append", "rebuild"])
+@pytest.mark.parametrize("raced_day", ["2024-02-15", "2024-12-31"], ids=["back-dated", "newest"])
+async def test_upload_between_series_and_positions(monkeypatch, cached, raced_day):
+    async with temporary_account() as account:
+        for day in ("2024-01-31", "2024-02-29", "2024-03-31"):
+            await upload(account, day, 1000.0, HOLDINGS)
+        async with SessionLocal() as db:
+            await get_position_history(db, account.portfolio_id)
+        if not cached:
+            position_cache.pop(account.portfolio_id)
+        await upload(account, "2024-04-30", 500.0, HOLDINGS + [("NVDA", 2, 400.0, 450.0)])
+
+        load_positions = snapshot_series.load_positions
+
+        async def racing_load_positions(db, portfolio_id, after=None):
+            monkeypatch.setattr(snapshot_series, "load_positions", load_positions)
+            await upload(account, raced_day, 0.0, [("AMZN", 1, 150.0, 160.0)])
+            return await load_positions(db, portfolio_id, after)
+
+        monkeypatch.setattr(snapshot_series, "load_positions", racing_load_positions)
+        async with SessionLocal() as db:
+            series, history = await get_position_history(db, account.portfolio_id)
+        assert len(series) == 4
+        assert history.snapshot_ids == series.ids.tolist()
+        assert history.trades.tolist()[-1] == pytest.approx(2 * 450.0)
+        assert position_cache.get(account.portfolio_id) is history
+
+        # The next request sees the raced upload and ends where a full load does
+        async with SessionLocal() as db:
+            series, history = await get_position_history(db, account.portfolio_id)
+            full = PositionHistory(account.portfolio_id)
+            full.append(series.ids.tolist(), await load_positions(db, account.portfolio_id))
+        assert len(series) == 5
+        assert history.snapshot_ids == full.snapshot_ids
+        assert history.tickers == full.tickers
+        assert history.trades.tolist() == full.trades.tolist()
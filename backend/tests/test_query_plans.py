@@ -0,0 +1,46 @@
+"""
+Query plans of the hot lookups, one test case per check of benchmarks/query_plans.py.
+
+A hot query no longer served by its expected index fails the run. The checks
+read the seeded local database (python -m benchmarks.seed) and are skipped
+when it is unreachable or not seeded.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from benchmarks import query_plans
+from src.core.config import settings
+from src.core.database import engine
+
+
+@pytest.fixture(scope="module")
+def plans():
+    """(event loop, context, parent indexes) shared by the checks; the engine's connections belong to the loop"""
+    if settings.ENVIRONMENT == "production":
+        pytest.skip("never VACUUMs and EXPLAINs against a production environment")
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(query_plans.vacuum())
+        context = loop.run_until_complete(query_plans.build_context(query_plans.DEFAULT_USER))
+        parents = loop.run_until_complete(query_plans.parent_indexes())
+    except (OSError, DBAPIError, LookupError) as error:
+        loop.run_until_complete(engine.dispose())
+        loop.close()
+        pytest.skip(f"no seeded database: {error}")
+    yield loop, context, parents
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+@pytest.mark.parametrize("check", query_plans.CHECKS, ids=lambda check: check.label)
+def test_hot_query_uses_its_index(plans, check):
+    loop, context, parents = plans
+    findings = loop.run_until_complete(query_plans.verify(check, context, parents))
+    failures = [
+        f"{finding.table}: {finding.node} on {finding.index or '-'} x{finding.count}, {finding.failure}"
+        for finding in findings if finding.failure
+    ]
+    assert failures == []
@@ -0,0 +1,81 @@
+"""
+Returns engine on hand-computed series.
+
+Contributions are estimated from cash + fixed income and the shares traded
+(quantity changes x price), so selling at a gain moves money from equity to
+cash without counting as a flow, and only money entering or leaving the
+account changes the figures.
+"""
+
+import pytest
+
+from src.services.returns import compute_performance, money_weighted_return, net_contributions, time_weighted_return
+from tests.series import make, position_rows
+
+
+# Bought at 100 with all the cash, half sold at 150 six months later
+BUY_THEN_SELL_AT_A_GAIN = [
+    ("2023-01-01", 1000.0, []),
+    ("2023-07-01", 0.0, [("AAPL", 10, 100.0, 100.0)]),
+    ("2024-01-01", 750.0, [("AAPL", 5, 100.0, 150.0)]),
+]
+
+
+def test_sale_at_a_gain_is_not_a_contribution():
+    # Worth 100 (cost 50), sold: the 100 in cash is the same money
+    series, history = make([
+        ("2023-01-01", 0.0, [("AAPL", 1, 50.0, 100.0)]),
+        ("2024-01-01", 100.0, []),
+    ])
+    assert history.trades.tolist() == [0.0, -100.0]
+    assert net_contributions(series, history.trades).tolist() == [0.0]
+    assert time_weighted_return(series, history.trades) == 0.0
+    assert money_weighted_return(series, history.trades) == pytest.approx(0.0, abs=1e-9)
+
+
+def test_buy_then_sell_at_a_gain():
+    series, history = make(BUY_THEN_SELL_AT_A_GAIN)
+    assert history.trades.tolist() == [0.0, 1000.0, -750.0]
+    assert net_contributions(series, history.trades).tolist() == [0.0, 0.0]
+    # 1000 -> 1000 -> 1500 with no flows
+    assert time_weighted_return(series, history.trades) == pytest.approx(0.5)
+    # -1000 on day 0, +1500 on day 365
+    assert money_weighted_return(series, history.trades) == pytest.approx(0.5)
+
+
+def test_deposit():
+    # 1000 in shares, 500 deposited, shares up 15%: 1000 * 1.15 + 500
+    series, history = make([
+        ("2023-01-01", 0.0, [("AAPL", 10, 100.0, 100.0)]),
+        ("2024-01-01", 500.0, [("AAPL", 10, 100.0, 115.0)]),
+    ])
+    assert net_contributions(series, history.trades).tolist() == [500.0]
+    # Modified Dietz: (1650 - 1000 - 500) / (1000 + 500 / 2)
+    assert time_weighted_return(series, history.trades) == pytest.approx(0.12)
+    # -1000 on day 0, -500 + 1650 on day 365
+    assert money_weighted_return(series, history.trades) == pytest.approx(0.15)
+
+
+def test_cash_dividend_counts_as_contribution():
+    # Statements carry no movements: 50 of dividends in cash look like a deposit
+    series, history = make(BUY_THEN_SELL_AT_A_GAIN + [("2024-07-01", 800.0, [("AAPL", 5, 100.0, 150.0)])])
+    assert net_contributions(series, history.trades).tolist() == [0.0, 0.0, 50.0]
+    assert time_weighted_return(series, history.trades) == pytest.approx(0.5)
+
+
+def test_performance_window():
+    series, history = make(BUY_THEN_SELL_AT_A_GAIN)
+    performance = compute_performance(series, history.trades, "6m")
+    assert performance.startDate.isoformat() == "2023-07-01"
+    assert performance.snapshots == 2
+    assert performance.netContributions == 0.0
+    assert performance.investmentGain == 500.0
+    assert performance.timeWeighted.cumulative == pytest.approx(50.0)
+
+
+def test_trades_of_appended_snapshots_match_a_full_build():
+    snapshots = BUY_THEN_SELL_AT_A_GAIN + [("2024-07-01", 0.0, [("AAPL", 5, 100.0, 160.0), ("MSFT", 2, 400.0, 400.0)])]
+    _, full = make(snapshots)
+    _, history = make(snapshots[:2])
+    history.append(["s2", "s3"], [row for row in position_rows(snapshots) if row[0] in ("s2", "s3")])
+    assert history.trades.tolist() == full.trades.tolist() == [0.0, 1000.0, -750.0, 800.0]
@@ -0,0 +1,95 @@
+"""
+Incremental risk state and snapshot series.
+
+Advancing the cached state (and series) one upload at a time must end where
+a full rebuild over the whole history does, without touching the cached state.
+"""
+
+import random
+from collections import deque
+from dataclasses import fields
+
+import numpy as np
+import pytest
+
+from src.services.risk import RiskState, advance_or_rebuild
+from src.services.snapshot_series import SeriesBuffer, build_series
+from tests.series import VERSION, make, summary_rows
+
+RISK_FREE_RATE = 0.04
+WINDOW = 6
+
+
+def monthly_snapshots(months: int):
+    """Two stocks on a random walk, with purchases, sales at a gain or loss and deposits"""
+    rng = random.Random(7)
+    cash, quantity = 10_000.0, {"AAPL": 0, "MSFT": 0}
+    price = {"AAPL": 100.0, "MSFT": 250.0}
+    snapshots = []
+    for month in range(months):
+        for ticker in price:
+            price[ticker] = round(price[ticker] * rng.uniform(0.9, 1.12), 2)
+        if month % 6 == 5:
+            cash += 2_000.0
+        ticker = rng.choice(sorted(price))
+        if month % 3 == 0 and cash >= price[ticker]:
+            bought = int(cash // price[ticker] // 2)
+            quantity[ticker] += bought
+            cash -= bought * price[ticker]
+        elif month % 4 == 1 and quantity[ticker]:
+            sold = quantity[ticker] // 2 or quantity[ticker]
+            quantity[ticker] -= sold
+            cash += sold * price[ticker]
+        day = f"{2020 + month // 12}-{month % 12 + 1:02d}-01"
+        positions = [(t, q, 100.0, price[t]) for t, q in sorted(quantity.items()) if q]
+        snapshots.append((day, round(cash, 2), positions))
+    return snapshots
+
+
+def close(a, b) -> bool:
+    if isinstance(a, float):
+        return a == pytest.approx(b, rel=1e-9, abs=1e-12)
+    if isinstance(a, (list, tuple, deque)):
+        return len(a) == len(b) and all(close(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def test_incremental_state_equals_full_rebuild(monkeypatch):
+    snapshots = monthly_snapshots(40)
+    series, history = make(snapshots[:10])
+    state = RiskState.from_series(series, history.trades, RISK_FREE_RATE, WINDOW)
+
+    def no_rebuild(*args):
+        raise AssertionError("rebuilt instead of appended")
+
+    monkeypatch.setattr(RiskState, "from_series", no_rebuild)
+    for count in range(11, len(snapshots) + 1):
+        series, history = make(snapshots[:count])
+        cached = state.to_response()
+        advanced = advance_or_rebuild(state, series, history.trades, RISK_FREE_RATE, WINDOW)
+        # Appended to a copy: the cached state still matches its (previous) version
+        assert advanced is not state and state.to_response() == cached
+        assert advanced.snapshots == state.snapshots + 1
+        state = advanced
+    monkeypatch.undo()
+
+    rebuilt = RiskState.from_series(series, history.trades, RISK_FREE_RATE, WINDOW)
+    different = [f.name for f in fields(RiskState) if not close(getattr(state, f.name), getattr(rebuilt, f.name))]
+    assert different == []
+    assert state.to_response() == rebuilt.to_response()
+
+
+def test_series_append_equals_full_build():
+    rows = summary_rows(monthly_snapshots(100))
+    buffer = SeriesBuffer("p")
+    buffer.append(VERSION, rows[:10])
+    first = buffer.series
+    for row in rows[10:]:  # Grows the buffers past their initial capacity
+        buffer.append(VERSION, [row])
+
+    full = build_series("p", VERSION, rows)
+    for name in ("ids", "dates", "total", "equity", "fixed_income", "cash"):
+        assert np.array_equal(getattr(buffer.series, name), getattr(full, name)), name
+    # Series handed out before the appends are unchanged
+    assert len(first) == 10
+    assert np.array_equal(first.total, full.total[:10])
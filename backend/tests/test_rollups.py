@@ -0,0 +1,70 @@
+"""
+Snapshot rollups maintained on upload and delete, against an aggregation of
+the remaining snapshots done from scratch.
+"""
+
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+import pytest
+
+from src.core.database import SessionLocal
+from src.services.rollups import GRANULARITIES, RollupService, period_bounds
+from src.services.snapshot_service import SnapshotService
+from tests.database import temporary_account, upload
+
+pytestmark = pytest.mark.anyio
+
+# (statement date, total value): cash only, so the total is exact
+UPLOADS = [
+    ("2023-01-31", 1000.0), ("2023-02-28", 1100.0), ("2023-03-31", 900.0), ("2023-05-31", 1200.0),
+    ("2023-07-31", 1250.0), ("2023-12-31", 1400.0), ("2024-01-31", 1350.0),
+    ("2023-04-30", 950.0),  # Back-dated: lands between existing periods
+]
+
+
+def expected_rollups(snapshots, granularity):
+    """(period_start, last_snapshot_date, snapshot_count, close, min, max, return) per period, newest first"""
+    periods = {}
+    for day, value in sorted(snapshots.items()):
+        periods.setdefault(period_bounds(granularity, day)[0], []).append((day, value))
+    rows, previous_close = [], None
+    for start, members in sorted(periods.items()):
+        values = [value for _, value in members]
+        close = values[-1]
+        period_return = None
+        if previous_close:
+            period_return = ((close / previous_close - 1) * 100).quantize(Decimal("0.01"), ROUND_HALF_UP)
+        rows.append((start, members[-1][0], len(members), close, min(values), max(values), period_return))
+        previous_close = close
+    return rows[::-1]
+
+
+async def stored_rollups(portfolio_id, granularity):
+    async with SessionLocal() as db:
+        rollups = await RollupService.get_rollups(db, portfolio_id, granularity, limit=100)
+    return [
+        (r.period_start, r.last_snapshot_date, r.snapshot_count, r.close_value, r.min_value, r.max_value, r.period_return)
+        for r in rollups
+    ]
+
+
+async def assert_rollups_match(portfolio_id, snapshots):
+    for granularity in GRANULARITIES:
+        assert await stored_rollups(portfolio_id, granularity) == expected_rollups(snapshots, granularity), granularity
+
+
+async def test_rollups_follow_uploads_and_deletes():
+    async with temporary_account() as account:
+        snapshots, ids = {}, {}
+        for day, value in UPLOADS:
+            ids[day] = await upload(account, day, value, [])
+            snapshots[datetime.fromisoformat(day)] = Decimal(str(value)).quantize(Decimal("0.01"))
+            await assert_rollups_match(account.portfolio_id, snapshots)
+
+        # The only snapshot of July / Q3 (the next quarter re-chains to Q2), then a quarter's close
+        for day in ("2023-07-31", "2023-03-31", "2024-01-31"):
+            async with SessionLocal() as db:
+                assert await SnapshotService.delete_snapshot(db, ids[day])
+            del snapshots[datetime.fromisoformat(day)]
+            await assert_rollups_match(account.portfolio_id, snapshots)
@@ -0,0 +1,47 @@
+"""
+Security master names: what the parser shows and what gets registered.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import delete, select
+
+from src.core.database import SessionLocal
+from src.models.security import Security
+from src.services import securities
+from src.services.pdf_parser import GBMStatementParser
+from src.services.securities import SecurityIndex, SecurityService
+from tests.database import temporary_account
+
+
+def test_parser_names_known_tickers_with_a_cold_index(monkeypatch):
+    monkeypatch.setattr(securities, "security_index", SecurityIndex())
+    assert GBMStatementParser._get_ticker_name("VOO") == "Vanguard S&P 500 ETF"
+    assert GBMStatementParser._get_ticker_name("ZZZ") == "ZZZ Stock"
+
+
+@pytest.mark.anyio
+async def test_unknown_ticker_is_registered_unnamed_then_named():
+    ticker = f"T{uuid.uuid4().hex[:8].upper()}"
+    async with temporary_account():
+        try:
+            async with SessionLocal() as db:
+                await SecurityService.resolve(db, [{"ticker": ticker, "name": f"{ticker} Stock"}])
+                stored = (await db.execute(select(Security).where(Security.ticker == ticker))).scalar_one()
+                assert (stored.name, stored.asset_class) == (ticker, "Stock")
+                assert GBMStatementParser._get_ticker_name(ticker) == f"{ticker} Stock"
+
+                await SecurityService.resolve(db, [{"ticker": ticker, "name": "Test Dividend ETF"}])
+                await db.refresh(stored)
+                assert (stored.name, stored.asset_class) == ("Test Dividend ETF", "ETF")
+                assert GBMStatementParser._get_ticker_name(ticker) == "Test Dividend ETF"
+
+                # A named security keeps its name
+                await SecurityService.resolve(db, [{"ticker": ticker, "name": "Something Else"}])
+                await db.refresh(stored)
+                assert stored.name == "Test Dividend ETF"
+        finally:
+            async with SessionLocal() as db:
+                await db.execute(delete(Security).where(Security.ticker == ticker))
+                await db.commit()
@@ -0,0 +1,45 @@
+"""
+Snapshot diff (/import/diff): which positions are new, closed or changed.
+"""
+
+import pytest
+
+from src.core.config import settings
+from tests.database import api_client, temporary_account, upload
+
+pytestmark = pytest.mark.anyio
+
+BEFORE = [("AAPL", 10, 100.0, 120.0), ("MSFT", 5, 300.0, 310.0), ("TSLA", 3, 250.0, 200.0), ("GOOGL", 4, 130.0, 140.0)]
+# AAPL unchanged, MSFT bought, GOOGL repriced, TSLA sold, NVDA bought
+AFTER = [("AAPL", 10, 100.0, 120.0), ("MSFT", 8, 302.0, 310.0), ("GOOGL", 4, 130.0, 150.0), ("NVDA", 2, 400.0, 450.0)]
+
+
+@pytest.mark.parametrize("storage", ["full", "delta"])
+async def test_diff_classifies_positions(monkeypatch, storage):
+    monkeypatch.setattr(settings, "SNAPSHOT_POSITION_STORAGE", storage)
+    async with temporary_account() as account:
+        before = await upload(account, "2024-01-31", 1000.0, BEFORE)
+        after = await upload(account, "2024-02-29", 1000.0, AFTER)
+        async with api_client(account) as client:
+            forward = await client.get("/import/diff", params={"from_id": before, "to_id": after})
+            backward = await client.get("/import/diff", params={"from_id": after, "to_id": before})
+    assert forward.status_code == backward.status_code == 200
+
+    diff = forward.json()
+    changes = {change["ticker"]: change for change in diff["changes"]}
+    assert {ticker: change["change_type"] for ticker, change in changes.items()} == {
+        "MSFT": "changed", "GOOGL": "changed", "NVDA": "new", "TSLA": "closed",
+    }
+    assert (diff["new_positions"], diff["closed_positions"], diff["changed_positions"]) == (1, 1, 2)
+    assert changes["MSFT"]["quantity_change"] == 3.0 and changes["MSFT"]["price_change"] == 0.0
+    assert changes["GOOGL"]["quantity_change"] == 0.0
+    assert (changes["GOOGL"]["price_change"], changes["GOOGL"]["price_change_percent"]) == (10.0, 7.14)
+    assert changes["NVDA"]["quantity_before"] is None and changes["NVDA"]["market_value_change"] == 900.0
+    assert changes["TSLA"]["quantity_after"] is None and changes["TSLA"]["market_value_change"] == -600.0
+    total_before = 1000.0 + sum(q * p for _, q, _, p in BEFORE)
+    total_after = 1000.0 + sum(q * p for _, q, _, p in AFTER)
+    assert diff["total_value_change"] == pytest.approx(total_after - total_before)
+
+    # The other way round, new and closed swap
+    reverse = {change["ticker"]: change["change_type"] for change in backward.json()["changes"]}
+    assert reverse == {"MSFT": "changed", "GOOGL": "changed", "NVDA": "closed", "TSLA": "new"}
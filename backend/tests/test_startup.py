@@ -0,0 +1,30 @@
+"""
+Startup budget: importing the app must not load the heavy libraries.
+
+pandas/numpy (analytics), pdfplumber (statement parsing), pyarrow (Parquet
+export) and httpx (Auth0 JWKS) are imported on first use; a new replica only pays for them when a request
+needs them. See benchmarks/startup_bench.py for the timing budget.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+HEAVY_MODULES = ["pandas", "numpy", "pdfplumber", "pyarrow", "httpx"]
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PROBE = (
+    "import json, sys\n"
+    "import src.main\n"
+    f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+)
+
+
+def test_app_import_does_not_load_heavy_modules():
+    # Inherits the settings of conftest.py
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    assert loaded == [], f"imported at startup: {loaded}"
@@ -2,10 +2,14 @@ import { queryOptions } from "@tanstack/react-query";
 import { apiClient } from "~/shared/api/client";
 import { type HistoryResponse } from "../model/types";
 
+// Upper bound on chart points; the backend downsamples longer histories (LTTB)
+const CHART_POINTS = 200;
+
 export const historyQueries = {
-  chart: () =>
+  chart: (points: number = CHART_POINTS) =>
     queryOptions({
-      queryKey: ["history", "chart"],
-      queryFn: async () => (await apiClient.get<HistoryResponse>("/dashboard/chart")).data,
+      queryKey: ["history", "chart", points],
+      queryFn: async () =>
+        (await apiClient.get<HistoryResponse>("/portfolio/history/series", { params: { points } })).data,
     }),
 };
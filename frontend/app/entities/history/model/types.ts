@@ -3,5 +3,7 @@ export interface HistoryPoint {
   value: number;
 }
 export interface HistoryResponse {
+  resolution: number;
+  totalPoints: number;
   points: HistoryPoint[];
 }
@@ -15,11 +15,16 @@ export interface SnapshotSummary {
 export interface SnapshotHistoryResponse {
   snapshots: SnapshotSummary[];
   total_count: number;
+  next_cursor: string | null;
+  has_more: boolean;
 }
 
-export async function getSnapshotHistory(limit: number = 12): Promise<SnapshotHistoryResponse> {
-  const response = await apiClient.get<SnapshotHistoryResponse>(
-    `/import/history?limit=${limit}`
-  );
+export async function getSnapshotHistory(
+  limit: number = 12,
+  cursor?: string
+): Promise<SnapshotHistoryResponse> {
+  const response = await apiClient.get<SnapshotHistoryResponse>("/import/history", {
+    params: { limit, cursor },
+  });
   return response.data;
 }